@@ -98,7 +98,10 @@ def main() -> None:
 	if model_override:
 		selected_model = local_llm_wrapper.llm_utils.choose_model(model_override)
 	else:
-		selected_model = local_llm_wrapper.llm_utils.choose_model(None)
+		selected_model = local_llm_wrapper.llm_utils.choose_model(
+			None,
+			cache_path=local_llm_wrapper.llm_utils.DEFAULT_HARDWARE_CACHE_PATH,
+		)
 	client = local_llm_wrapper.llm_client.LLMClient(
 		transports=[
 			local_llm_wrapper.transports.OllamaTransport(model=selected_model),
@@ -118,11 +121,22 @@ def main() -> None:
 		if user_text.lower() in EXIT_WORDS:
 			break
 		messages.append({"role": "user", "content": user_text})
-		response = client.generate(messages=messages, max_tokens=args.max_tokens)
+		stream = client.generate_stream(messages=messages, max_tokens=args.max_tokens)
+		# the first chunk is pulled before the prefix, so any progress line
+		# the stream prints lands on its own line
+		first_chunk = next(stream, "")
+		sys.stdout.write("Assistant: " + first_chunk)
+		sys.stdout.flush()
+		# print tokens as they arrive instead of waiting for the full reply
+		for chunk in stream:
+			sys.stdout.write(chunk)
+			sys.stdout.flush()
+		response = stream.text
 		messages.append({"role": "assistant", "content": response})
-		sys.stdout.write(f"Assistant: {response}")
 		if not response.endswith("\n"):
 			sys.stdout.write("\n")
+		if not args.quiet and stream.ttft is not None:
+			sys.stdout.write(f"[time to first token: {stream.ttft:.2f}s]\n")
 
 
 if __name__ == "__main__":
@@ -100,7 +100,10 @@ def main() -> None:
 	if model_override:
 		selected_model = local_llm_wrapper.llm_utils.choose_model(model_override)
 	else:
-		selected_model = local_llm_wrapper.llm_utils.choose_model(None)
+		selected_model = local_llm_wrapper.llm_utils.choose_model(
+			None,
+			cache_path=local_llm_wrapper.llm_utils.DEFAULT_HARDWARE_CACHE_PATH,
+		)
 	client = local_llm_wrapper.llm_client.LLMClient(
 		transports=[
 			local_llm_wrapper.transports.OllamaTransport(model=selected_model),
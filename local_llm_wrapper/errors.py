@@ -30,3 +30,15 @@ class GuardrailRefusalError(LLMError):
 	"""
 	Raised when a model refuses a prompt due to safety/guardrails.
 	"""
+
+
+class HedgeCancelledError(LLMError):
+	"""
+	Raised inside a hedged attempt after another attempt already answered.
+	"""
+
+
+class DeadlineExceededError(LLMError):
+	"""
+	Raised when a request's time budget runs out before it could finish.
+	"""
@@ -7,20 +7,44 @@ from __future__ import annotations
 
 from .errors import (
 	ContextWindowError,
+	DeadlineExceededError,
 	GuardrailRefusalError,
 	LLMError,
 	TransportUnavailableError,
 )
-from .llm_client import LLMClient
+from .llm_cache import ResponseCache
+from .llm_hedge import HedgePolicy
+from .llm_client import AsyncLLMClient, LLMClient
 from .llm_parsers import RenameResult, SortResult
+from .llm_router import TransportRouter
+from .llm_stream import TokenStream
 from .llm_utils import (
 	apple_models_available,
+	invalidate_apple_availability,
 	get_vram_size_in_gb as _get_vram_size_in_gb,
 	total_ram_bytes as _total_ram_bytes,
 	sanitize_filename,
 )
-from .transports.apple import AppleTransport
-from .transports.ollama import OllamaTransport
+
+# backends resolve through the lazy transports package on first use
+_TRANSPORT_EXPORTS = (
+	"AppleTransport",
+	"OllamaTransport",
+	"OllamaPoolTransport",
+	"UsageTracker",
+	"CallUsage",
+)
+
+
+def __getattr__(name: str) -> object:
+	if name not in _TRANSPORT_EXPORTS:
+		raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+	from . import transports
+
+	value = getattr(transports, name)
+	globals()[name] = value
+	return value
+
 
 def get_vram_size_in_gb() -> int | None:
 	return _get_vram_size_in_gb()
@@ -30,7 +54,7 @@ def total_ram_bytes() -> int:
 	return _total_ram_bytes()
 
 
-def choose_model(model_override: str | None) -> str:
+def choose_model(model_override: str | None, cache_path: str | None = None) -> str:
 	"""
 	Compatibility wrapper so tests can monkeypatch get_vram_size_in_gb/total_ram_bytes.
 	"""
@@ -49,7 +73,7 @@ def choose_model(model_override: str | None) -> str:
 		globals_dict = _choose_model.__globals__
 		globals_dict["get_vram_size_in_gb"] = _patched_vram
 		globals_dict["total_ram_bytes"] = _patched_ram
-		return _choose_model(model_override)
+		return _choose_model(model_override, cache_path)
 	finally:
 		globals_dict = _choose_model.__globals__
 		globals_dict["get_vram_size_in_gb"] = original_vram
@@ -61,12 +85,18 @@ __all__ = [
 	"TransportUnavailableError",
 	"ContextWindowError",
 	"GuardrailRefusalError",
+	"DeadlineExceededError",
 	"LLMClient",
+	"AsyncLLMClient",
+	"ResponseCache",
+	"HedgePolicy",
 	"RenameResult",
 	"SortResult",
+	"TokenStream",
+	"TransportRouter",
 	"apple_models_available",
+	"invalidate_apple_availability",
 	"choose_model",
 	"sanitize_filename",
-	"AppleTransport",
-	"OllamaTransport",
+	*_TRANSPORT_EXPORTS,
 ]
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Asyncio LLM engine with the same fallback and format-fix rules as LLMEngine.
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import asyncio
+import functools
+from dataclasses import dataclass
+
+# local repo modules
+from .llm_engine import (
+	_EngineCore,
+	_TransportCall,
+	_local_sort_outcomes,
+	_merge_sort_outcomes,
+	_timeout_kwargs,
+	_validate_generate_input,
+)
+from .llm_parsers import ParseError, KeepResult, RenameResult, SortResult
+from .llm_prompts import (
+	RenameRequest,
+	SortItem,
+	SortRequest,
+	build_keep_prompt,
+	build_rename_keep_prompt,
+	build_rename_prompt,
+	build_sort_prompt,
+)
+from .llm_utils import format_chat_prompt
+
+#============================================
+
+
+@dataclass(slots=True)
+class AsyncLLMEngine(_EngineCore):
+	"""
+	Async counterpart of LLMEngine.
+
+	Fallback, format-fix, deadline, cache, memo, router, and early-stop rules
+	come from the same step generators LLMEngine runs; only the transport
+	call differs. Transports with agenerate/agenerate_chat run natively on
+	the event loop; sync-only transports, and early-stop streams, run in a
+	worker thread via asyncio.to_thread. single_flight coalesces without
+	blocking the loop. Hedging is thread based and only LLMEngine offers it.
+	"""
+
+	# number of sort items awaited at once
+	max_in_flight: int = 8
+
+	#============================================
+	async def generate(
+		self,
+		prompt: str | None = None,
+		*,
+		messages: list[dict[str, str]] | None = None,
+		purpose: str | None = None,
+		max_tokens: int = 1200,
+		deadline: float | None = None,
+	) -> str:
+		text_prompt, chat_messages = _validate_generate_input(prompt, messages)
+		steps = self._fallback_steps(
+			text_prompt,
+			messages=chat_messages,
+			purpose=purpose or "general response",
+			max_tokens=max_tokens,
+			retry_prompt=None,
+			deadline=deadline,
+		)
+		text, _pending = await self._drive(steps)
+		return text
+
+	#============================================
+	async def rename(
+		self,
+		current_name: str,
+		metadata: dict,
+		*,
+		deadline: float | None = None,
+	) -> RenameResult:
+		req = RenameRequest(metadata=metadata, current_name=current_name, context=self.context)
+		prompt = build_rename_prompt(req)
+		make_steps = functools.partial(self._rename_steps, req, prompt, deadline)
+		result = await self._run_structured(("rename", prompt), make_steps, deadline)
+		return result
+
+	#============================================
+	async def rename_with_stem_action(
+		self,
+		current_name: str,
+		metadata: dict,
+		*,
+		deadline: float | None = None,
+	) -> tuple[RenameResult, KeepResult]:
+		"""
+		Ask for the new name and the stem action in one model call.
+
+		If the combined reply cannot be parsed, fall back to rename() followed
+		by stem_action().
+		"""
+		original_stem, extension, req = self._plan_rename_with_stem_action(current_name, metadata)
+		if req is None:
+			# the rules answer the stem without a model call, so only rename is asked
+			return await self._rename_then_stem_action(
+				current_name, metadata, original_stem, extension, deadline
+			)
+		prompt = build_rename_keep_prompt(req)
+		make_steps = functools.partial(self._rename_keep_steps, req, prompt, deadline)
+		try:
+			return await self._run_structured(("rename_stem_action", prompt), make_steps, deadline)
+		except ParseError as exc:
+			if not self.quiet:
+				print(f"[WHY] combined rename/stem reply unusable ({exc}); asking separately")
+		return await self._rename_then_stem_action(
+			current_name, metadata, original_stem, extension, deadline, count=False
+		)
+
+	#============================================
+	async def _rename_then_stem_action(
+		self,
+		current_name: str,
+		metadata: dict,
+		original_stem: str,
+		extension: str | None,
+		deadline: float | None = None,
+		count: bool = True,
+	) -> tuple[RenameResult, KeepResult]:
+		rename_result = await self.rename(current_name, metadata, deadline=deadline)
+		keep_result = await self._stem_action(
+			original_stem, rename_result.new_name, extension, deadline, count
+		)
+		return rename_result, keep_result
+
+	#============================================
+	async def stem_action(
+		self,
+		original_stem: str,
+		suggested_name: str,
+		extension: str | None = None,
+		*,
+		deadline: float | None = None,
+	) -> KeepResult:
+		result = await self._stem_action(original_stem, suggested_name, extension, deadline)
+		return result
+
+	#============================================
+	async def _stem_action(
+		self,
+		original_stem: str,
+		suggested_name: str,
+		extension: str | None,
+		deadline: float | None = None,
+		count: bool = True,
+	) -> KeepResult:
+		ruled, req = self._plan_stem_action(original_stem, suggested_name, extension, count)
+		if ruled is not None:
+			return ruled
+		prompt = build_keep_prompt(req)
+		make_steps = functools.partial(self._stem_action_steps, req, prompt, deadline)
+		result = await self._run_structured(("stem_action", prompt), make_steps, deadline)
+		return result
+
+	#============================================
+	async def sort(
+		self,
+		files: list[SortItem],
+		*,
+		max_in_flight: int | None = None,
+		deadline: float | None = None,
+	) -> SortResult:
+		if not files:
+			return SortResult(assignments={}, raw_text="")
+		local = _local_sort_outcomes(files) if self.sort_by_extension else {}
+		limit = self.max_in_flight if max_in_flight is None else max_in_flight
+		semaphore = asyncio.Semaphore(max(1, int(limit)))
+
+		async def _bounded(item: SortItem) -> SortResult:
+			async with semaphore:
+				return await self._sort_one(item, deadline)
+
+		# gather keeps input order, so the merge stays deterministic
+		remote = await asyncio.gather(
+			*(_bounded(item) for idx, item in enumerate(files) if idx not in local),
+			return_exceptions=True,
+		)
+		remote_outcomes = iter(remote)
+		outcomes = [
+			local[idx] if idx in local else next(remote_outcomes) for idx in range(len(files))
+		]
+		return _merge_sort_outcomes(files, outcomes)
+
+	#============================================
+	async def _sort_one(self, item: SortItem, deadline: float | None = None) -> SortResult:
+		req = SortRequest(files=[item], context=self.context)
+		prompt = build_sort_prompt(req)
+		make_steps = functools.partial(self._sort_item_steps, item, prompt, deadline)
+		result = await self._run_structured(("sort", prompt), make_steps, deadline)
+		return result
+
+	#============================================
+	async def _run_structured(
+		self,
+		key: tuple[str, str],
+		make_steps,
+		deadline: float | None = None,
+	):
+		"""
+		Return a memoized result, or compute it once per key across tasks.
+		"""
+		memoized = self._memo_get(key)
+		if memoized is not None:
+			return memoized
+		work = functools.partial(self._compute_and_memoize, key, make_steps)
+		if self.single_flight is None:
+			return await work()
+		# waiting on another task's identical call stops at the deadline too
+		result = await self.single_flight.ado(key, work, deadline)
+		return result
+
+	#============================================
+	async def _compute_and_memoize(self, key: tuple[str, str], make_steps):
+		result = await self._drive(make_steps())
+		self._memo_put(key, result)
+		return result
+
+	#============================================
+	async def _drive(self, steps):
+		"""
+		Run a step generator, awaiting each transport call it yields.
+		"""
+		reply = None
+		failure: Exception | None = None
+		while True:
+			try:
+				if failure is None:
+					call = steps.send(reply)
+				else:
+					call = steps.throw(failure)
+			except StopIteration as stop:
+				result = stop.value
+				return result
+			reply = None
+			failure = None
+			try:
+				reply = await self._invoke_transport(call)
+			except Exception as exc:
+				failure = exc
+
+	#============================================
+	async def _invoke_transport(self, call: _TransportCall) -> str:
+		early_tags = self._early_stop_tags(call)
+		if early_tags:
+			# transports only stream synchronously, so the scan runs off the loop
+			return await asyncio.to_thread(self._stream_until_tags, call, early_tags)
+		transport = call.transport
+		extra = _timeout_kwargs(transport, call.timeout)
+		prompt = call.prompt
+		if call.messages is not None:
+			agenerate_chat = getattr(transport, "agenerate_chat", None)
+			if callable(agenerate_chat):
+				return await agenerate_chat(
+					call.messages, purpose=call.purpose, max_tokens=call.max_tokens, **extra
+				)
+			generate_chat = getattr(transport, "generate_chat", None)
+			if callable(generate_chat):
+				return await asyncio.to_thread(
+					generate_chat,
+					call.messages,
+					purpose=call.purpose,
+					max_tokens=call.max_tokens,
+					**extra,
+				)
+			prompt = format_chat_prompt(call.messages)
+		if prompt is None:
+			raise ValueError("Prompt or messages are required.")
+		agenerate = getattr(transport, "agenerate", None)
+		if callable(agenerate):
+			return await agenerate(prompt, purpose=call.purpose, max_tokens=call.max_tokens, **extra)
+		return await asyncio.to_thread(
+			transport.generate, prompt, purpose=call.purpose, max_tokens=call.max_tokens, **extra
+		)
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Response caches: on-disk raw text and in-memory structured results.
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import copy
+import json
+import time
+import hashlib
+import threading
+import collections
+
+#============================================
+
+
+DEFAULT_MAX_ENTRIES = 50000
+
+
+def make_cache_key(
+	transport_name: str,
+	model: str | None,
+	prompt: str | None,
+	messages: list[dict[str, str]] | None,
+	max_tokens: int,
+	temperature: float | None,
+	stop_tags: tuple[str, ...] | None = None,
+	identity: object = None,
+) -> str:
+	"""
+	Hash the request fields that determine a model reply.
+
+	stop_tags is set when the reply was cut short at those closing tags, so a
+	truncated reply never answers a request that wanted the full text.
+	identity is the transport's cache_identity(), a JSON value covering
+	settings such as system prompts that change the reply.
+	"""
+	payload = {
+		"transport": transport_name,
+		"model": model,
+		"prompt": prompt,
+		"messages": messages,
+		"max_tokens": max_tokens,
+		"temperature": temperature,
+		"stop_tags": list(stop_tags) if stop_tags else None,
+		"identity": identity,
+	}
+	encoded = json.dumps(payload, sort_keys=True, ensure_ascii=True).encode("utf-8")
+	digest = hashlib.sha256(encoded).hexdigest()
+	return digest
+
+
+class ResponseCache:
+	"""
+	SQLite-backed LRU cache of raw response text keyed by request hash.
+
+	Entries older than ttl seconds (when set) count as misses and are removed.
+	When the cache grows past max_entries the least recently used rows are
+	evicted. Safe to share across threads.
+	"""
+
+	def __init__(
+		self,
+		path: str,
+		max_entries: int = DEFAULT_MAX_ENTRIES,
+		ttl: float | None = None,
+	) -> None:
+		self.path = path
+		self.max_entries = max(1, int(max_entries))
+		self.ttl = None if ttl is None else float(ttl)
+		self._lock = threading.Lock()
+		# sqlite3 loads on first use so importing the engine stays cheap
+		import sqlite3
+
+		self._conn = sqlite3.connect(path, check_same_thread=False)
+		self._conn.execute(
+			"CREATE TABLE IF NOT EXISTS responses ("
+			"key TEXT PRIMARY KEY, "
+			"response TEXT NOT NULL, "
+			"created REAL NOT NULL, "
+			"accessed REAL NOT NULL)"
+		)
+		self._conn.execute(
+			"CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)"
+		)
+		self._conn.commit()
+		self._hits = 0
+		self._misses = 0
+		self._expired = 0
+		self._evictions = 0
+
+	#============================================
+	def get(self, key: str) -> str | None:
+		"""
+		Return cached text for key, or None on a miss.
+		"""
+		now = time.time()
+		with self._lock:
+			row = self._conn.execute(
+				"SELECT response, created FROM responses WHERE key = ?",
+				(key,),
+			).fetchone()
+			if row is None:
+				self._misses += 1
+				return None
+			response, created = row
+			if self.ttl is not None and now - created > self.ttl:
+				self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+				self._conn.commit()
+				self._expired += 1
+				self._misses += 1
+				return None
+			self._conn.execute(
+				"UPDATE responses SET accessed = ? WHERE key = ?",
+				(now, key),
+			)
+			self._conn.commit()
+			self._hits += 1
+		return response
+
+	#============================================
+	def put(self, key: str, response: str) -> None:
+		"""
+		Store response text and evict least recently used rows over the limit.
+		"""
+		now = time.time()
+		with self._lock:
+			self._conn.execute(
+				"INSERT OR REPLACE INTO responses (key, response, created, accessed) "
+				"VALUES (?, ?, ?, ?)",
+				(key, response, now, now),
+			)
+			count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+			overflow = count - self.max_entries
+			if overflow > 0:
+				self._conn.execute(
+					"DELETE FROM responses WHERE key IN "
+					"(SELECT key FROM responses ORDER BY accessed ASC LIMIT ?)",
+					(overflow,),
+				)
+				self._evictions += overflow
+			self._conn.commit()
+
+	#============================================
+	def clear(self) -> None:
+		"""
+		Remove every cached response.
+		"""
+		with self._lock:
+			self._conn.execute("DELETE FROM responses")
+			self._conn.commit()
+
+	#============================================
+	def stats(self) -> dict[str, int]:
+		"""
+		Return hit/miss/eviction counters and the current entry count.
+		"""
+		with self._lock:
+			entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+			result = {
+				"hits": self._hits,
+				"misses": self._misses,
+				"expired": self._expired,
+				"evictions": self._evictions,
+				"entries": entries,
+			}
+		return result
+
+	#============================================
+	def close(self) -> None:
+		with self._lock:
+			self._conn.close()
+
+
+#============================================
+
+
+DEFAULT_MEMO_CAPACITY = 4096
+
+
+class ResultMemo:
+	"""
+	Thread-safe in-process LRU of final structured results.
+
+	Results are copied on the way in and out, so callers can mutate what
+	they receive without corrupting the memo.
+	"""
+
+	def __init__(self, capacity: int = DEFAULT_MEMO_CAPACITY) -> None:
+		self.capacity = max(1, int(capacity))
+		self._entries: collections.OrderedDict[tuple[str, str], object] = collections.OrderedDict()
+		self._lock = threading.Lock()
+		self._hits = 0
+		self._misses = 0
+		self._evictions = 0
+
+	#============================================
+	def get(self, key: tuple[str, str]) -> object | None:
+		"""
+		Return a copy of the memoized result, or None on a miss.
+		"""
+		with self._lock:
+			if key not in self._entries:
+				self._misses += 1
+				return None
+			self._entries.move_to_end(key)
+			self._hits += 1
+			value = self._entries[key]
+		result = copy.deepcopy(value)
+		return result
+
+	#============================================
+	def put(self, key: tuple[str, str], value: object) -> None:
+		stored = copy.deepcopy(value)
+		with self._lock:
+			self._entries[key] = stored
+			self._entries.move_to_end(key)
+			while len(self._entries) > self.capacity:
+				self._entries.popitem(last=False)
+				self._evictions += 1
+
+	#============================================
+	def clear(self) -> None:
+		with self._lock:
+			self._entries.clear()
+
+	#============================================
+	def stats(self) -> dict[str, int]:
+		"""
+		Return hit/miss/eviction counters and the current entry count.
+		"""
+		with self._lock:
+			result = {
+				"hits": self._hits,
+				"misses": self._misses,
+				"evictions": self._evictions,
+				"entries": len(self._entries),
+			}
+		return result
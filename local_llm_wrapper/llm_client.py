@@ -5,10 +5,19 @@ Public client wrapper for the local LLM engine.
 
 from __future__ import annotations
 
+# Standard Library
+import time
+from collections.abc import Iterable, Iterator
+
 # local repo modules
 from .llm_engine import LLMEngine
-from .llm_parsers import RenameResult, SortResult
+from .llm_cache import ResponseCache, ResultMemo
+from .llm_hedge import HedgePolicy
+from .llm_parsers import KeepResult, RenameResult, SortResult
 from .llm_prompts import SortItem
+from .llm_router import TransportRouter
+from .llm_singleflight import SingleFlight
+from .llm_stream import TokenStream
 from .transports.base import LLMTransport
 
 #============================================
@@ -25,11 +34,31 @@ class LLMClient:
 		*,
 		context: str | None = None,
 		quiet: bool = False,
+		early_stop: bool = False,
+		max_in_flight: int = 1,
+		sort_batch_size: int = 1,
+		sort_by_extension: bool = False,
+		stem_rules: bool = False,
+		cache: ResponseCache | None = None,
+		result_memo: ResultMemo | None = None,
+		single_flight: SingleFlight | None = None,
+		router: TransportRouter | None = None,
+		hedge: HedgePolicy | None = None,
 	) -> None:
 		self._engine = LLMEngine(
 			transports=transports,
 			context=context,
 			quiet=quiet,
+			early_stop=early_stop,
+			max_in_flight=max_in_flight,
+			sort_batch_size=sort_batch_size,
+			sort_by_extension=sort_by_extension,
+			stem_rules=stem_rules,
+			cache=cache,
+			result_memo=result_memo,
+			single_flight=single_flight,
+			router=router,
+			hedge=hedge,
 		)
 
 	#============================================
@@ -40,44 +69,257 @@ class LLMClient:
 		messages: list[dict[str, str]] | None = None,
 		purpose: str | None = None,
 		max_tokens: int = 1200,
+		timeout: float | None = None,
 	) -> str:
 		return self._engine.generate(
 			prompt,
 			messages=messages,
 			purpose=purpose,
 			max_tokens=max_tokens,
+			deadline=_deadline(timeout),
+		)
+
+	#============================================
+	def generate_stream(
+		self,
+		prompt: str | None = None,
+		*,
+		messages: list[dict[str, str]] | None = None,
+		purpose: str | None = None,
+		max_tokens: int = 1200,
+		timeout: float | None = None,
+	) -> TokenStream:
+		return self._engine.generate_stream(
+			prompt,
+			messages=messages,
+			purpose=purpose,
+			max_tokens=max_tokens,
+			deadline=_deadline(timeout),
 		)
 
 	#============================================
-	def rename(self, current_name: str, metadata: dict) -> RenameResult:
-		return self._engine.rename(current_name, metadata)
+	def rename(
+		self,
+		current_name: str,
+		metadata: dict,
+		*,
+		timeout: float | None = None,
+	) -> RenameResult:
+		return self._engine.rename(current_name, metadata, deadline=_deadline(timeout))
+
+	#============================================
+	def rename_with_stem_action(
+		self,
+		current_name: str,
+		metadata: dict,
+		*,
+		timeout: float | None = None,
+	) -> tuple[RenameResult, KeepResult]:
+		return self._engine.rename_with_stem_action(
+			current_name, metadata, deadline=_deadline(timeout)
+		)
+
+	#============================================
+	def rename_many(
+		self,
+		items: Iterable[tuple[str, dict]],
+		*,
+		max_workers: int = 4,
+		ordered: bool = False,
+		timeout: float | None = None,
+	) -> Iterator[RenameResult]:
+		# one budget for the whole batch, not per file
+		return self._engine.rename_many(
+			items,
+			max_workers=max_workers,
+			ordered=ordered,
+			deadline=_deadline(timeout),
+		)
 
 	#============================================
-	def sort(self, files: list[SortItem | dict]) -> SortResult:
-		items: list[SortItem] = []
-		for item in files:
-			if isinstance(item, SortItem):
-				items.append(item)
-				continue
-			if isinstance(item, dict):
-				required_keys = ("path", "name", "ext", "description")
-				for key in required_keys:
-					if key not in item:
-						raise ValueError(
-							"Sort items require path, name, ext, and description."
-						)
-				path = item["path"]
-				name = item["name"]
-				ext = item["ext"]
-				description = item["description"]
-				items.append(
-					SortItem(
-						path=path,
-						name=name,
-						ext=ext,
-						description=description,
+	def stem_action(
+		self,
+		original_stem: str,
+		suggested_name: str,
+		extension: str | None = None,
+		*,
+		timeout: float | None = None,
+	) -> KeepResult:
+		return self._engine.stem_action(
+			original_stem, suggested_name, extension, deadline=_deadline(timeout)
+		)
+
+	#============================================
+	def stem_action_stats(self) -> dict[str, int]:
+		return self._engine.stem_action_stats()
+
+	#============================================
+	def sort(
+		self,
+		files: list[SortItem | dict],
+		*,
+		max_in_flight: int | None = None,
+		batch_size: int | None = None,
+		timeout: float | None = None,
+	) -> SortResult:
+		items = _coerce_sort_items(files)
+		return self._engine.sort(
+			items,
+			max_in_flight=max_in_flight,
+			batch_size=batch_size,
+			deadline=_deadline(timeout),
+		)
+
+
+#============================================
+
+
+class AsyncLLMClient:
+	"""
+	Asyncio entry point for local LLM usage.
+	"""
+
+	def __init__(
+		self,
+		transports: list[LLMTransport],
+		*,
+		context: str | None = None,
+		quiet: bool = False,
+		early_stop: bool = False,
+		max_in_flight: int = 8,
+		sort_by_extension: bool = False,
+		stem_rules: bool = False,
+		cache: ResponseCache | None = None,
+		result_memo: ResultMemo | None = None,
+		single_flight: SingleFlight | None = None,
+		router: TransportRouter | None = None,
+	) -> None:
+		# asyncio loads only when an async client is built
+		from .llm_async_engine import AsyncLLMEngine
+
+		self._engine = AsyncLLMEngine(
+			transports=transports,
+			context=context,
+			quiet=quiet,
+			early_stop=early_stop,
+			max_in_flight=max_in_flight,
+			sort_by_extension=sort_by_extension,
+			stem_rules=stem_rules,
+			cache=cache,
+			result_memo=result_memo,
+			single_flight=single_flight,
+			router=router,
+		)
+
+	#============================================
+	async def generate(
+		self,
+		prompt: str | None = None,
+		*,
+		messages: list[dict[str, str]] | None = None,
+		purpose: str | None = None,
+		max_tokens: int = 1200,
+		timeout: float | None = None,
+	) -> str:
+		return await self._engine.generate(
+			prompt,
+			messages=messages,
+			purpose=purpose,
+			max_tokens=max_tokens,
+			deadline=_deadline(timeout),
+		)
+
+	#============================================
+	async def rename(
+		self,
+		current_name: str,
+		metadata: dict,
+		*,
+		timeout: float | None = None,
+	) -> RenameResult:
+		return await self._engine.rename(current_name, metadata, deadline=_deadline(timeout))
+
+	#============================================
+	async def rename_with_stem_action(
+		self,
+		current_name: str,
+		metadata: dict,
+		*,
+		timeout: float | None = None,
+	) -> tuple[RenameResult, KeepResult]:
+		return await self._engine.rename_with_stem_action(
+			current_name, metadata, deadline=_deadline(timeout)
+		)
+
+	#============================================
+	async def stem_action(
+		self,
+		original_stem: str,
+		suggested_name: str,
+		extension: str | None = None,
+		*,
+		timeout: float | None = None,
+	) -> KeepResult:
+		return await self._engine.stem_action(
+			original_stem, suggested_name, extension, deadline=_deadline(timeout)
+		)
+
+	#============================================
+	def stem_action_stats(self) -> dict[str, int]:
+		return self._engine.stem_action_stats()
+
+	#============================================
+	async def sort(
+		self,
+		files: list[SortItem | dict],
+		*,
+		max_in_flight: int | None = None,
+		timeout: float | None = None,
+	) -> SortResult:
+		items = _coerce_sort_items(files)
+		return await self._engine.sort(
+			items, max_in_flight=max_in_flight, deadline=_deadline(timeout)
+		)
+
+
+#============================================
+
+
+def _deadline(timeout: float | None) -> float | None:
+	# callers pass a relative timeout; the engine works with a monotonic deadline
+	if timeout is None:
+		return None
+	return time.monotonic() + timeout
+
+
+#============================================
+
+
+def _coerce_sort_items(files: list[SortItem | dict]) -> list[SortItem]:
+	items: list[SortItem] = []
+	for item in files:
+		if isinstance(item, SortItem):
+			items.append(item)
+			continue
+		if isinstance(item, dict):
+			required_keys = ("path", "name", "ext", "description")
+			for key in required_keys:
+				if key not in item:
+					raise ValueError(
+						"Sort items require path, name, ext, and description."
 					)
+			path = item["path"]
+			name = item["name"]
+			ext = item["ext"]
+			description = item["description"]
+			items.append(
+				SortItem(
+					path=path,
+					name=name,
+					ext=ext,
+					description=description,
 				)
-				continue
-			raise TypeError("Sort items must be SortItem or dict.")
-		return self._engine.sort(items)
+			)
+			continue
+		raise TypeError("Sort items must be SortItem or dict.")
+	return items
@@ -6,27 +6,59 @@ Backend-agnostic LLM engine with fallback and strict parsing.
 from __future__ import annotations
 
 # Standard Library
-from dataclasses import dataclass
+import time
+import pathlib
+import functools
+import threading
+import concurrent.futures
+from dataclasses import dataclass, field
+from collections.abc import Iterable, Iterator
 
 # local repo modules
-from .errors import TransportUnavailableError
-from .llm_parsers import ParseError, KeepResult, RenameResult, SortResult, parse_keep_response, parse_rename_response, parse_sort_response
+from .errors import DeadlineExceededError, HedgeCancelledError, TransportUnavailableError
+from .llm_cache import ResponseCache, ResultMemo, make_cache_key
+from .llm_hedge import HedgePolicy
+from .llm_router import TransportRouter
+from .llm_stream import TokenStream
+from .llm_singleflight import SingleFlight
+from .llm_parsers import (
+	KEEP_TAGS,
+	RENAME_KEEP_TAGS,
+	RENAME_TAGS,
+	SORT_TAGS,
+	ParseError,
+	KeepResult,
+	RenameResult,
+	SortResult,
+	TagScanner,
+	parse_keep_response,
+	parse_rename_keep_response,
+	parse_rename_response,
+	parse_sort_batch_response,
+	parse_sort_response,
+)
 from .llm_prompts import (
 	KeepRequest,
+	RenameKeepRequest,
 	RenameRequest,
 	SortItem,
 	SortRequest,
 	RENAME_EXAMPLE_OUTPUT,
 	KEEP_EXAMPLE_OUTPUT,
 	SORT_EXAMPLE_OUTPUT,
+	SORT_BATCH_EXAMPLE_OUTPUT,
 	build_format_fix_prompt,
 	build_keep_prompt,
+	build_rename_keep_prompt,
 	build_rename_prompt,
 	build_rename_prompt_minimal,
+	build_sort_batch_prompt,
 	build_sort_prompt,
 )
 from .llm_utils import (
 	compute_stem_features,
+	confident_category,
+	decide_stem_action_by_rules,
 	_ensure_text_prompt,
 	_ensure_chat_messages,
 	format_chat_prompt,
@@ -42,123 +74,414 @@ from .transports.base import LLMTransport
 #============================================
 
 
+def _validate_generate_input(
+	prompt: str | None,
+	messages: list[dict[str, str]] | None,
+) -> tuple[str | None, list[dict[str, str]] | None]:
+	if prompt is None and messages is None:
+		raise ValueError("Prompt or messages are required.")
+	if prompt is not None and messages is not None:
+		raise ValueError("Provide prompt or messages, not both.")
+	text_prompt: str | None = None
+	chat_messages: list[dict[str, str]] | None = None
+	if messages is not None:
+		chat_messages = _ensure_chat_messages(messages)
+	else:
+		text_prompt = _ensure_text_prompt(prompt)
+	return text_prompt, chat_messages
+
+
+def _remaining(deadline: float | None) -> float | None:
+	"""
+	Return seconds left before a time.monotonic() deadline, or None without one.
+
+	Raises:
+		DeadlineExceededError: when the deadline has passed.
+	"""
+	if deadline is None:
+		return None
+	left = deadline - time.monotonic()
+	if left <= 0:
+		raise DeadlineExceededError("Request deadline exceeded.")
+	return left
+
+
+def _cache_identity(transport: LLMTransport) -> object:
+	# settings beyond name and model that change replies, e.g. a system prompt
+	cache_identity = getattr(transport, "cache_identity", None)
+	if not callable(cache_identity):
+		return None
+	identity = cache_identity()
+	return identity
+
+
+def _timeout_kwargs(transport: LLMTransport, timeout: float | None) -> dict[str, float]:
+	# only transports that declare accepts_timeout get the extra keyword
+	if timeout is None or not getattr(transport, "accepts_timeout", False):
+		return {}
+	return {"timeout": timeout}
+
+
+def _merge_sort_outcomes(
+	files: list[SortItem],
+	outcomes: list[SortResult | BaseException],
+) -> SortResult:
+	"""
+	Merge per-item sort outcomes in input order.
+
+	Failed items are reported in SortResult.errors instead of aborting the
+	batch; if every item failed, the first error is raised.
+	"""
+	assignments: dict[str, str] = {}
+	reasons: dict[str, str] = {}
+	errors: dict[str, str] = {}
+	first_error: BaseException | None = None
+	last_raw = ""
+	for item, outcome in zip(files, outcomes):
+		if isinstance(outcome, BaseException):
+			if first_error is None:
+				first_error = outcome
+			errors[item.path] = f"{outcome.__class__.__name__}: {outcome}"
+			continue
+		assignments.update(outcome.assignments)
+		for path, reason in outcome.reasons.items():
+			reasons[path] = normalize_reason(reason)
+		last_raw = outcome.raw_text
+	if first_error is not None and not assignments:
+		raise first_error
+	merged = SortResult(assignments=assignments, reasons=reasons, raw_text=last_raw, errors=errors)
+	return merged
+
+
+def _local_sort_outcomes(files: list[SortItem]) -> dict[int, SortResult]:
+	"""
+	Assign categories from unambiguous extensions, keyed by input index.
+	"""
+	local: dict[int, SortResult] = {}
+	for idx, item in enumerate(files):
+		category = confident_category(item.ext)
+		if category is None:
+			continue
+		local[idx] = SortResult(
+			assignments={item.path: category},
+			reasons={item.path: f"extension {item.ext.lower().lstrip('.')} is always {category}"},
+			raw_text="",
+		)
+	return local
+
+
+#============================================
+
+
+@dataclass(slots=True)
+class _TransportCall:
+	"""
+	One transport request yielded by the engine's step generators.
+	"""
+
+	transport: LLMTransport
+	prompt: str | None
+	messages: list[dict[str, str]] | None
+	purpose: str
+	max_tokens: int
+	stop_tags: tuple[str, ...] | None
+	timeout: float | None
+
+
+#============================================
+
+
 @dataclass(slots=True)
-class LLMEngine:
+class _EngineCore:
+	"""
+	Fallback, format-fix, cache, and routing rules shared by both engines.
+
+	The *_steps methods are generators that yield a _TransportCall whenever
+	they need a model reply and receive the text (or the raised exception)
+	back. LLMEngine drives them with blocking calls and AsyncLLMEngine with
+	awaited ones, so both engines follow exactly the same rules.
+	"""
+
 	transports: list[LLMTransport]
 	context: str | None = None
 	quiet: bool = False
+	# stream structured calls and stop as soon as the required tags close
+	early_stop: bool = False
+	# assign unambiguous extensions locally and only ask the model about the rest
+	sort_by_extension: bool = False
+	# optional on-disk cache of raw responses
+	cache: ResponseCache | None = None
+	# optional in-process memo of final rename/keep/sort results
+	result_memo: ResultMemo | None = None
+	# optional coalescing of identical structured calls made at the same time
+	single_flight: SingleFlight | None = None
+	# answer clear-cut stems (uuids, generic labels, hashes) without the model
+	stem_rules: bool = False
+	# optional health tracking that reorders transports and skips failing ones
+	router: TransportRouter | None = None
+	_stem_paths: dict[str, int] = field(
+		default_factory=lambda: {"rules": 0, "model": 0}, repr=False
+	)
+	_stem_paths_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
 
 	#============================================
-	def generate(
+	def _ordered_transports(self) -> list[LLMTransport]:
+		if self.router is None:
+			return list(self.transports)
+		return self.router.order(self.transports)
+
+	#============================================
+	def _check_hedge_cancelled(self) -> None:
+		# only LLMEngine hedges; it overrides this check
+		return None
+
+	#============================================
+	def _count_stem_path(self, path: str) -> None:
+		with self._stem_paths_lock:
+			self._stem_paths[path] += 1
+
+	#============================================
+	def stem_action_stats(self) -> dict[str, int]:
+		"""
+		Return how many stem actions came from the rules and how many asked the model.
+		"""
+		with self._stem_paths_lock:
+			result = dict(self._stem_paths)
+		return result
+
+	#============================================
+	def _plan_stem_action(
 		self,
-		prompt: str | None = None,
-		*,
-		messages: list[dict[str, str]] | None = None,
-		purpose: str | None = None,
-		max_tokens: int = 1200,
-	) -> str:
-		if prompt is None and messages is None:
-			raise ValueError("Prompt or messages are required.")
-		if prompt is not None and messages is not None:
-			raise ValueError("Provide prompt or messages, not both.")
-		text_prompt: str | None = None
-		chat_messages: list[dict[str, str]] | None = None
-		if messages is not None:
-			chat_messages = _ensure_chat_messages(messages)
-		else:
-			text_prompt = _ensure_text_prompt(prompt)
-		return self._generate_with_fallback(
-			text_prompt,
-			messages=chat_messages,
-			purpose=purpose or "general response",
-			max_tokens=max_tokens,
-			retry_prompt=None,
+		original_stem: str,
+		suggested_name: str,
+		extension: str | None,
+		count: bool = True,
+	) -> tuple[KeepResult | None, KeepRequest | None]:
+		"""
+		Return (rules result, None) or (None, request for the model).
+
+		This is where a file is counted as a rules or a model decision; count
+		is False when the file was already counted by a combined call.
+		"""
+		features = compute_stem_features(original_stem, suggested_name)
+		decided = decide_stem_action_by_rules(features) if self.stem_rules else None
+		if decided is not None:
+			if count:
+				self._count_stem_path("rules")
+			action, reason = decided
+			result = KeepResult(stem_action=action, reason=reason, raw_text="", source="rules")
+			return result, None
+		if count:
+			self._count_stem_path("model")
+		req = KeepRequest(
+			original_stem=original_stem,
+			suggested_name=suggested_name,
+			extension=extension,
+			features=features,
 		)
+		return None, req
 
 	#============================================
-	def rename(self, current_name: str, metadata: dict) -> RenameResult:
-		req = RenameRequest(metadata=metadata, current_name=current_name, context=self.context)
-		prompt = build_rename_prompt(req)
-		raw = self._generate_with_fallback(
-			prompt,
-			messages=None,
-			purpose="filename based on content",
-			max_tokens=200,
-			retry_prompt=build_rename_prompt_minimal(req),
+	def _plan_rename_with_stem_action(
+		self,
+		current_name: str,
+		metadata: dict,
+	) -> tuple[str, str | None, RenameKeepRequest | None]:
+		"""
+		Return (original stem, extension, combined request or None).
+
+		None means the rules settle the stem, so only rename needs the model
+		and stem_action() counts the file. Otherwise the file is counted as a
+		model decision here, once, even if the reply later falls back to two
+		calls.
+		"""
+		original_stem = pathlib.PurePath(current_name).stem
+		extension = metadata.get("extension")
+		# the suggested name does not exist yet, so stem_in_suggested stays False
+		features = compute_stem_features(original_stem, "")
+		if self.stem_rules and decide_stem_action_by_rules(features) is not None:
+			return original_stem, extension, None
+		self._count_stem_path("model")
+		req = RenameKeepRequest(
+			metadata=metadata,
+			current_name=current_name,
+			original_stem=original_stem,
+			features=features,
+			context=self.context,
 		)
-		result = self._parse_with_retry(
+		return original_stem, extension, req
+
+	#============================================
+	def _memo_get(self, key: tuple[str, str]):
+		if self.result_memo is None:
+			return None
+		return self.result_memo.get(key)
+
+	#============================================
+	def _memo_put(self, key: tuple[str, str], result: object) -> None:
+		if self.result_memo is None:
+			return
+		self.result_memo.put(key, result)
+
+	#============================================
+	def _sort_memo_key(self, item: SortItem) -> tuple[str, str]:
+		req = SortRequest(files=[item], context=self.context)
+		memo_key = ("sort", build_sort_prompt(req))
+		return memo_key
+
+	#============================================
+	def _rename_steps(
+		self,
+		req: RenameRequest,
+		prompt: str,
+		deadline: float | None = None,
+	):
+		result = yield from self._structured_steps(
 			lambda text: parse_rename_response(text),
 			prompt,
 			RENAME_EXAMPLE_OUTPUT,
-			raw,
 			purpose="filename based on content",
 			max_tokens=200,
+			retry_prompt=build_rename_prompt_minimal(req),
+			stop_tags=RENAME_TAGS,
+			deadline=deadline,
 		)
 		result.new_name = sanitize_filename(result.new_name)
 		result.reason = normalize_reason(result.reason)
+		result.current_name = req.current_name
 		return result
 
 	#============================================
-	def stem_action(self, original_stem: str, suggested_name: str, extension: str | None = None) -> KeepResult:
-		features = compute_stem_features(original_stem, suggested_name)
-		req = KeepRequest(
-			original_stem=original_stem,
-			suggested_name=suggested_name,
-			extension=extension,
-			features=features,
-		)
-		prompt = build_keep_prompt(req)
-		raw = self._generate_with_fallback(
+	def _rename_keep_steps(
+		self,
+		req: RenameKeepRequest,
+		prompt: str,
+		deadline: float | None = None,
+	):
+		raw, pending = yield from self._fallback_steps(
 			prompt,
 			messages=None,
-			purpose="how to handle the original filename stem",
-			max_tokens=120,
+			purpose="filename and stem action",
+			max_tokens=260,
 			retry_prompt=None,
+			stop_tags=RENAME_KEEP_TAGS,
+			deadline=deadline,
+			cache_after_parse=True,
 		)
-		result = self._parse_with_retry(
+		try:
+			rename_result, keep_result = parse_rename_keep_response(raw, req.original_stem)
+		except ParseError as exc:
+			log_parse_failure(
+				purpose="filename and stem action",
+				error=exc,
+				raw_text=exc.raw_text or raw,
+				prompt=prompt,
+				stage="combined",
+			)
+			raise
+		self._cache_parsed(pending, raw)
+		rename_result.new_name = sanitize_filename(rename_result.new_name)
+		rename_result.reason = normalize_reason(rename_result.reason)
+		rename_result.current_name = req.current_name
+		keep_result.reason = normalize_reason(keep_result.reason)
+		return rename_result, keep_result
+
+	#============================================
+	def _stem_action_steps(
+		self,
+		req: KeepRequest,
+		prompt: str,
+		deadline: float | None = None,
+	):
+		original_stem = req.original_stem
+		result = yield from self._structured_steps(
 			lambda text: parse_keep_response(text, original_stem),
 			prompt,
 			KEEP_EXAMPLE_OUTPUT,
-			raw,
 			purpose="how to handle the original filename stem",
 			max_tokens=120,
+			retry_prompt=None,
+			stop_tags=KEEP_TAGS,
+			deadline=deadline,
 		)
 		result.reason = normalize_reason(result.reason)
 		return result
 
 	#============================================
-	def sort(self, files: list[SortItem]) -> SortResult:
-		if not files:
-			return SortResult(assignments={}, raw_text="")
-		assignments: dict[str, str] = {}
-		reasons: dict[str, str] = {}
-		last_raw = ""
-		for item in files:
-			req = SortRequest(files=[item], context=self.context)
-			prompt = build_sort_prompt(req)
-			raw = self._generate_with_fallback(
-				prompt,
-				messages=None,
-				purpose="category assignment",
-				max_tokens=120,
-				retry_prompt=None,
-			)
-			result = self._parse_with_retry(
-				lambda text: parse_sort_response(text, [item.path]),
-				prompt,
-				SORT_EXAMPLE_OUTPUT,
-				raw,
-				purpose="category assignment",
-				max_tokens=120,
-			)
-			assignments.update(result.assignments)
-			for path, reason in result.reasons.items():
-				reasons[path] = normalize_reason(reason)
-			last_raw = result.raw_text
-		return SortResult(assignments=assignments, reasons=reasons, raw_text=last_raw)
+	def _sort_batch_steps(self, batch: list[SortItem], deadline: float | None = None):
+		req = SortRequest(files=batch, context=self.context)
+		prompt = build_sort_batch_prompt(req)
+		paths = [item.path for item in batch]
+		# budget roughly one single-file reply per item
+		max_tokens = 120 * len(batch)
+		result = yield from self._structured_steps(
+			lambda text: parse_sort_batch_response(text, paths),
+			prompt,
+			SORT_BATCH_EXAMPLE_OUTPUT,
+			purpose="batched category assignment",
+			max_tokens=max_tokens,
+			retry_prompt=None,
+			deadline=deadline,
+		)
+		return result
+
+	#============================================
+	def _sort_item_steps(
+		self,
+		item: SortItem,
+		prompt: str,
+		deadline: float | None = None,
+	):
+		result = yield from self._structured_steps(
+			lambda text: parse_sort_response(text, [item.path]),
+			prompt,
+			SORT_EXAMPLE_OUTPUT,
+			purpose="category assignment",
+			max_tokens=120,
+			retry_prompt=None,
+			stop_tags=SORT_TAGS,
+			deadline=deadline,
+		)
+		return result
+
+	#============================================
+	def _structured_steps(
+		self,
+		parser,
+		prompt: str,
+		example_output: str,
+		*,
+		purpose: str,
+		max_tokens: int,
+		retry_prompt: str | None,
+		stop_tags: tuple[str, ...] | None = None,
+		deadline: float | None = None,
+	):
+		raw, pending = yield from self._fallback_steps(
+			prompt,
+			messages=None,
+			purpose=purpose,
+			max_tokens=max_tokens,
+			retry_prompt=retry_prompt,
+			stop_tags=stop_tags,
+			deadline=deadline,
+			cache_after_parse=True,
+		)
+		result = yield from self._parse_steps(
+			parser,
+			prompt,
+			example_output,
+			raw,
+			pending,
+			purpose=purpose,
+			max_tokens=max_tokens,
+			stop_tags=stop_tags,
+			deadline=deadline,
+		)
+		return result
 
 	#============================================
-	def _generate_with_fallback(
+	def _fallback_steps(
 		self,
 		prompt: str | None,
 		*,
@@ -166,19 +489,34 @@ class LLMEngine:
 		purpose: str,
 		max_tokens: int,
 		retry_prompt: str | None,
-	) -> str:
+		stop_tags: tuple[str, ...] | None = None,
+		deadline: float | None = None,
+		cache_after_parse: bool = False,
+	):
+		"""
+		Ask each transport in order and return (text, pending cache key).
+		"""
 		last_exc: Exception | None = None
-		for idx, transport in enumerate(self.transports):
+		for idx, transport in enumerate(self._ordered_transports()):
+			# a spent budget ends the fallback chain instead of trying the next transport
+			try:
+				_remaining(deadline)
+			except DeadlineExceededError as deadline_exc:
+				raise deadline_exc from last_exc
 			try:
 				if not self.quiet:
 					_print_llm(f"asking {transport.name} for {purpose}")
-				return self._generate_on_transport(
+				reply = yield from self._transport_steps(
 					transport,
 					prompt,
 					messages,
 					purpose,
 					max_tokens,
+					stop_tags=stop_tags,
+					deadline=deadline,
+					cache_after_parse=cache_after_parse,
 				)
+				return reply
 			except Exception as exc:
 				last_exc = exc
 				if isinstance(exc, TransportUnavailableError):
@@ -190,13 +528,17 @@ class LLMEngine:
 								_print_llm(
 									f"retrying {transport.name} with minimal prompt for {purpose}"
 								)
-							return self._generate_on_transport(
+							reply = yield from self._transport_steps(
 								transport,
 								retry_prompt,
 								None,
 								purpose,
 								max_tokens,
+								stop_tags=stop_tags,
+								deadline=deadline,
+								cache_after_parse=cache_after_parse,
 							)
+							return reply
 						except Exception as retry_exc:
 							last_exc = retry_exc
 							if _is_guardrail_error(retry_exc) or _is_context_window_error(retry_exc):
@@ -209,18 +551,21 @@ class LLMEngine:
 		raise TransportUnavailableError("No LLM transports available.")
 
 	#============================================
-	def _parse_with_retry(
+	def _parse_steps(
 		self,
 		parser,
 		original_prompt: str,
 		example_output: str,
 		raw_text: str,
+		pending: str | None,
 		*,
 		purpose: str,
 		max_tokens: int,
+		stop_tags: tuple[str, ...] | None = None,
+		deadline: float | None = None,
 	):
 		try:
-			return parser(raw_text)
+			result = parser(raw_text)
 		except ParseError as exc:
 			excerpt = " ".join(raw_text.split())[:160]
 			if not self.quiet:
@@ -232,61 +577,709 @@ class LLMEngine:
 				prompt=original_prompt,
 				stage="initial",
 			)
-			fix_prompt = build_format_fix_prompt(original_prompt, example_output)
-			last_parse: ParseError | None = None
-			last_transport: Exception | None = None
-			last_fixed: str | None = None
-			for transport in self.transports:
-				try:
-					if not self.quiet:
-						_print_llm(f"asking {transport.name} for {purpose} (format fix)")
-					fixed = self._generate_on_transport(
-						transport,
-						fix_prompt,
-						None,
-						f"{purpose} (format fix)",
-						max_tokens,
+			# no format-fix retries once the budget is spent
+			try:
+				_remaining(deadline)
+			except DeadlineExceededError as deadline_exc:
+				raise deadline_exc from exc
+		else:
+			self._cache_parsed(pending, raw_text)
+			return result
+		fix_prompt = build_format_fix_prompt(original_prompt, example_output)
+		last_parse: ParseError | None = None
+		last_transport: Exception | None = None
+		last_fixed: str | None = None
+		for transport in self._ordered_transports():
+			try:
+				if not self.quiet:
+					_print_llm(f"asking {transport.name} for {purpose} (format fix)")
+				fixed, fixed_pending = yield from self._transport_steps(
+					transport,
+					fix_prompt,
+					None,
+					f"{purpose} (format fix)",
+					max_tokens,
+					stop_tags=stop_tags,
+					deadline=deadline,
+					cache_after_parse=True,
+				)
+				last_fixed = fixed
+			except DeadlineExceededError:
+				raise
+			except Exception as transport_exc:
+				last_transport = transport_exc
+				continue
+			try:
+				result = parser(fixed)
+			except ParseError as parse_exc:
+				last_parse = parse_exc
+				log_parse_failure(
+					purpose=purpose,
+					error=parse_exc,
+					raw_text=parse_exc.raw_text or fixed,
+					prompt=fix_prompt,
+					stage=f"format fix ({transport.name})",
+				)
+				continue
+			self._cache_parsed(fixed_pending, fixed)
+			return result
+		if last_parse:
+			text = last_fixed or raw_text
+			raise ParseError(str(last_parse), raw_text=text)
+		if last_transport:
+			raise last_transport
+		raise ParseError("Format-fix retry failed.")
+
+	#============================================
+	def _transport_steps(
+		self,
+		transport: LLMTransport,
+		prompt: str | None,
+		messages: list[dict[str, str]] | None,
+		purpose: str,
+		max_tokens: int,
+		stop_tags: tuple[str, ...] | None = None,
+		deadline: float | None = None,
+		cache_after_parse: bool = False,
+	):
+		"""
+		Ask one transport, answering from the response cache when possible.
+
+		Returns (text, pending cache key). With cache_after_parse a fresh reply
+		is not stored yet; the key comes back so _cache_parsed() can store it
+		once the caller's parser accepted the text, and a malformed reply is
+		never replayed from disk.
+		"""
+		call = _TransportCall(
+			transport=transport,
+			prompt=prompt,
+			messages=messages,
+			purpose=purpose,
+			max_tokens=max_tokens,
+			stop_tags=stop_tags,
+			timeout=_remaining(deadline),
+		)
+		# transports with chat history depend on hidden state, so never cache them
+		if self.cache is None or getattr(transport, "use_history", False):
+			text = yield from self._routed_steps(call)
+			return text, None
+		key = make_cache_key(
+			transport.name,
+			getattr(transport, "model", None),
+			prompt,
+			messages,
+			max_tokens,
+			getattr(transport, "temperature", None),
+			self._early_stop_tags(call),
+			_cache_identity(transport),
+		)
+		cached = self.cache.get(key)
+		if cached is not None:
+			return cached, None
+		text = yield from self._routed_steps(call)
+		if cache_after_parse:
+			return text, key
+		self.cache.put(key, text)
+		return text, None
+
+	#============================================
+	def _cache_parsed(self, key: str | None, text: str) -> None:
+		# key is None for cache hits and uncached transports
+		if key is None:
+			return
+		self.cache.put(key, text)
+
+	#============================================
+	def _routed_steps(self, call: _TransportCall):
+		self._check_hedge_cancelled()
+		if self.router is None:
+			text = yield call
+			return text
+		started = time.monotonic()
+		try:
+			text = yield call
+		except HedgeCancelledError:
+			raise
+		except Exception as exc:
+			# a call that used up its deadline timed out on the caller's budget
+			spent = call.timeout is not None and time.monotonic() - started >= call.timeout
+			if spent or isinstance(exc, DeadlineExceededError):
+				self.router.record_abandoned(call.transport)
+			else:
+				self.router.record_failure(call.transport, exc)
+			raise
+		self.router.record_success(call.transport, time.monotonic() - started)
+		return text
+
+	#============================================
+	def _early_stop_tags(self, call: _TransportCall) -> tuple[str, ...] | None:
+		# replies are cut at stop_tags only for streamed single-prompt calls
+		if not (call.stop_tags and self.early_stop):
+			return None
+		if call.messages is not None or call.prompt is None:
+			return None
+		if not callable(getattr(call.transport, "generate_stream", None)):
+			return None
+		return call.stop_tags
+
+	#============================================
+	def _collect_until_tags(self, chunks: Iterator[str], stop_tags: tuple[str, ...]) -> str:
+		scanner = TagScanner(stop_tags)
+		try:
+			for chunk in chunks:
+				if scanner.feed(chunk):
+					break
+				self._check_hedge_cancelled()
+		finally:
+			# closing the stream drops the connection so the server stops decoding
+			close = getattr(chunks, "close", None)
+			if callable(close):
+				close()
+		text = scanner.text
+		return text
+
+	#============================================
+	def _stream_until_tags(self, call: _TransportCall, stop_tags: tuple[str, ...]) -> str:
+		extra = _timeout_kwargs(call.transport, call.timeout)
+		chunks = call.transport.generate_stream(
+			call.prompt, purpose=call.purpose, max_tokens=call.max_tokens, **extra
+		)
+		text = self._collect_until_tags(chunks, stop_tags)
+		return text
+
+
+#============================================
+
+
+@dataclass(slots=True)
+class LLMEngine(_EngineCore):
+	# number of sort items sent to the transports at once
+	max_in_flight: int = 1
+	# number of sort items packed into one prompt
+	sort_batch_size: int = 1
+	# optional duplicate of slow structured calls to the next transport
+	hedge: HedgePolicy | None = None
+	# per-thread transport order and cancel flag for the hedged attempt running there
+	_hedge_local: threading.local = field(default_factory=threading.local, repr=False)
+
+	#============================================
+	def generate(
+		self,
+		prompt: str | None = None,
+		*,
+		messages: list[dict[str, str]] | None = None,
+		purpose: str | None = None,
+		max_tokens: int = 1200,
+		deadline: float | None = None,
+	) -> str:
+		text_prompt, chat_messages = _validate_generate_input(prompt, messages)
+		steps = self._fallback_steps(
+			text_prompt,
+			messages=chat_messages,
+			purpose=purpose or "general response",
+			max_tokens=max_tokens,
+			retry_prompt=None,
+			deadline=deadline,
+		)
+		text, _pending = self._drive(steps)
+		return text
+
+	#============================================
+	def generate_stream(
+		self,
+		prompt: str | None = None,
+		*,
+		messages: list[dict[str, str]] | None = None,
+		purpose: str | None = None,
+		max_tokens: int = 1200,
+		deadline: float | None = None,
+	) -> TokenStream:
+		text_prompt, chat_messages = _validate_generate_input(prompt, messages)
+		chunks = self._stream_with_fallback(
+			text_prompt,
+			messages=chat_messages,
+			purpose=purpose or "general response",
+			max_tokens=max_tokens,
+			deadline=deadline,
+		)
+		return TokenStream(chunks)
+
+	#============================================
+	def rename(
+		self,
+		current_name: str,
+		metadata: dict,
+		*,
+		deadline: float | None = None,
+	) -> RenameResult:
+		req = RenameRequest(metadata=metadata, current_name=current_name, context=self.context)
+		prompt = build_rename_prompt(req)
+		compute = functools.partial(self._run_steps, self._rename_steps, req, prompt, deadline)
+		result = self._run_structured(("rename", prompt), compute, deadline)
+		return result
+
+	#============================================
+	def rename_with_stem_action(
+		self,
+		current_name: str,
+		metadata: dict,
+		*,
+		deadline: float | None = None,
+	) -> tuple[RenameResult, KeepResult]:
+		"""
+		Ask for the new name and the stem action in one model call.
+
+		If the combined reply cannot be parsed, fall back to rename() followed
+		by stem_action().
+		"""
+		original_stem, extension, req = self._plan_rename_with_stem_action(current_name, metadata)
+		if req is None:
+			# the rules answer the stem without a model call, so only rename is asked
+			return self._rename_then_stem_action(
+				current_name, metadata, original_stem, extension, deadline
+			)
+		prompt = build_rename_keep_prompt(req)
+		compute = functools.partial(self._run_steps, self._rename_keep_steps, req, prompt, deadline)
+		try:
+			return self._run_structured(("rename_stem_action", prompt), compute, deadline)
+		except ParseError as exc:
+			if not self.quiet:
+				print(f"[WHY] combined rename/stem reply unusable ({exc}); asking separately")
+		return self._rename_then_stem_action(
+			current_name, metadata, original_stem, extension, deadline, count=False
+		)
+
+	#============================================
+	def _rename_then_stem_action(
+		self,
+		current_name: str,
+		metadata: dict,
+		original_stem: str,
+		extension: str | None,
+		deadline: float | None = None,
+		count: bool = True,
+	) -> tuple[RenameResult, KeepResult]:
+		rename_result = self.rename(current_name, metadata, deadline=deadline)
+		keep_result = self._stem_action(
+			original_stem, rename_result.new_name, extension, deadline, count
+		)
+		return rename_result, keep_result
+
+	#============================================
+	def rename_many(
+		self,
+		items: Iterable[tuple[str, dict]],
+		*,
+		max_workers: int = 4,
+		ordered: bool = False,
+		deadline: float | None = None,
+	) -> Iterator[RenameResult]:
+		"""
+		Rename many files with bounded parallelism.
+
+		Results are yielded as they complete unless ordered is True. The input
+		iterable is consumed lazily, at most two items per worker ahead. A
+		deadline covers the whole run, not each file. A file that fails is
+		yielded with RenameResult.error set and the run continues.
+		"""
+		workers = max(1, int(max_workers))
+		window = workers * 2
+		source = iter(items)
+		executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+		pending: list[concurrent.futures.Future] = []
+		exhausted = False
+		try:
+			while True:
+				while not exhausted and len(pending) < window:
+					try:
+						current_name, metadata = next(source)
+					except StopIteration:
+						exhausted = True
+						break
+					pending.append(
+						executor.submit(self._rename_outcome, current_name, metadata, deadline)
+					)
+				if not pending:
+					break
+				if ordered:
+					future = pending.pop(0)
+				else:
+					done, _not_done = concurrent.futures.wait(
+						pending,
+						return_when=concurrent.futures.FIRST_COMPLETED,
 					)
-					last_fixed = fixed
-				except Exception as transport_exc:
-					if _is_guardrail_error(transport_exc):
-						last_transport = transport_exc
+					future = next(item for item in pending if item in done)
+					pending.remove(future)
+				yield future.result()
+		finally:
+			# stop queued work when the caller stops iterating
+			executor.shutdown(wait=True, cancel_futures=True)
+
+	#============================================
+	def _rename_outcome(
+		self,
+		current_name: str,
+		metadata: dict,
+		deadline: float | None = None,
+	) -> RenameResult:
+		try:
+			return self.rename(current_name, metadata, deadline=deadline)
+		except Exception as exc:
+			# one bad file must not end a bulk run; the caller can retry it later
+			failed = RenameResult(
+				new_name="",
+				reason="",
+				raw_text=getattr(exc, "raw_text", ""),
+				current_name=current_name,
+				error=f"{exc.__class__.__name__}: {exc}",
+			)
+			return failed
+
+	#============================================
+	def stem_action(
+		self,
+		original_stem: str,
+		suggested_name: str,
+		extension: str | None = None,
+		*,
+		deadline: float | None = None,
+	) -> KeepResult:
+		result = self._stem_action(original_stem, suggested_name, extension, deadline)
+		return result
+
+	#============================================
+	def _stem_action(
+		self,
+		original_stem: str,
+		suggested_name: str,
+		extension: str | None,
+		deadline: float | None = None,
+		count: bool = True,
+	) -> KeepResult:
+		ruled, req = self._plan_stem_action(original_stem, suggested_name, extension, count)
+		if ruled is not None:
+			return ruled
+		prompt = build_keep_prompt(req)
+		compute = functools.partial(self._run_steps, self._stem_action_steps, req, prompt, deadline)
+		result = self._run_structured(("stem_action", prompt), compute, deadline)
+		return result
+
+	#============================================
+	def sort(
+		self,
+		files: list[SortItem],
+		*,
+		max_in_flight: int | None = None,
+		batch_size: int | None = None,
+		deadline: float | None = None,
+	) -> SortResult:
+		if not files:
+			return SortResult(assignments={}, raw_text="")
+		local = _local_sort_outcomes(files) if self.sort_by_extension else {}
+		remote = [item for idx, item in enumerate(files) if idx not in local]
+		limit = self.max_in_flight if max_in_flight is None else max_in_flight
+		size = self.sort_batch_size if batch_size is None else batch_size
+		size = max(1, int(size))
+		batches = [remote[idx : idx + size] for idx in range(0, len(remote), size)]
+		workers = max(1, min(int(limit), len(batches)))
+		run_batch = functools.partial(self._sort_batch_outcomes, deadline=deadline)
+		if workers == 1:
+			groups = [run_batch(batch) for batch in batches]
+		else:
+			# map() keeps input order, so the merge below stays deterministic
+			with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+				groups = list(executor.map(run_batch, batches))
+		remote_outcomes = iter(outcome for group in groups for outcome in group)
+		outcomes = [
+			local[idx] if idx in local else next(remote_outcomes) for idx in range(len(files))
+		]
+		return _merge_sort_outcomes(files, outcomes)
+
+	#============================================
+	def _sort_batch_outcomes(
+		self,
+		batch: list[SortItem],
+		deadline: float | None = None,
+	) -> list[SortResult | Exception]:
+		memoized: dict[str, SortResult] = {}
+		if self.result_memo is not None:
+			for item in batch:
+				hit = self._memo_get(self._sort_memo_key(item))
+				if hit is not None:
+					memoized[item.path] = hit
+		to_ask = [item for item in batch if item.path not in memoized]
+		if len(to_ask) <= 1:
+			batch_result = SortResult(assignments={}, raw_text="")
+		else:
+			try:
+				batch_result = self._drive(self._sort_batch_steps(to_ask, deadline))
+			except (DeadlineExceededError, HedgeCancelledError):
+				# re-asking item by item cannot beat a spent deadline or a won hedge
+				raise
+			except (ParseError, RuntimeError, OSError):
+				# parse and transport failures fall back to one call per item
+				batch_result = SortResult(assignments={}, raw_text="")
+			missing = [item for item in to_ask if item.path not in batch_result.assignments]
+			if missing and not self.quiet:
+				_print_llm(f"re-asking {len(missing)} of {len(to_ask)} batched files individually")
+		outcomes: list[SortResult | Exception] = []
+		for item in batch:
+			if item.path in memoized:
+				outcomes.append(memoized[item.path])
+				continue
+			if item.path not in batch_result.assignments:
+				outcomes.append(self._sort_item_outcome(item, deadline))
+				continue
+			reasons: dict[str, str] = {}
+			if item.path in batch_result.reasons:
+				reasons[item.path] = batch_result.reasons[item.path]
+			single = SortResult(
+				assignments={item.path: batch_result.assignments[item.path]},
+				reasons=reasons,
+				raw_text=batch_result.raw_text,
+			)
+			self._memo_put(self._sort_memo_key(item), single)
+			outcomes.append(single)
+		return outcomes
+
+	#============================================
+	def _sort_item_outcome(
+		self,
+		item: SortItem,
+		deadline: float | None = None,
+	) -> SortResult | Exception:
+		try:
+			return self._sort_item(item, deadline)
+		except Exception as exc:
+			return exc
+
+	#============================================
+	def _sort_item(self, item: SortItem, deadline: float | None = None) -> SortResult:
+		req = SortRequest(files=[item], context=self.context)
+		prompt = build_sort_prompt(req)
+		compute = functools.partial(self._run_steps, self._sort_item_steps, item, prompt, deadline)
+		result = self._run_structured(("sort", prompt), compute, deadline)
+		return result
+
+	#============================================
+	def _run_structured(
+		self,
+		key: tuple[str, str],
+		compute,
+		deadline: float | None = None,
+	):
+		"""
+		Return a memoized result, or compute it once per key across threads.
+		"""
+		memoized = self._memo_get(key)
+		if memoized is not None:
+			return memoized
+		if self.hedge is not None:
+			compute = functools.partial(self._run_hedged, compute)
+		work = functools.partial(self._compute_and_memoize, key, compute)
+		if self.single_flight is None:
+			return work()
+		# waiting on another thread's identical call stops at the deadline too
+		result = self.single_flight.do(key, work, deadline)
+		return result
+
+	#============================================
+	def _run_hedged(self, compute):
+		"""
+		Run compute(), and if it is slow, race a copy that starts on the next transport.
+
+		The first attempt to return a parsed result wins. The other attempt is
+		told to stop: it makes no further transport calls and closes an
+		early-stop stream at the next chunk, but a blocking call already in
+		progress finishes in the background and its result is discarded.
+		"""
+		transports = self._ordered_transports()
+		if len(transports) < 2:
+			return compute()
+		delay = self.hedge.delay()
+		cancels: dict[concurrent.futures.Future, threading.Event] = {}
+		executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+		started = time.monotonic()
+		try:
+			primary_cancel = threading.Event()
+			primary = executor.submit(self._hedge_attempt, compute, transports, primary_cancel)
+			cancels[primary] = primary_cancel
+			done, _pending = concurrent.futures.wait([primary], timeout=delay)
+			if not done:
+				self.hedge.record_hedge_sent()
+				if not self.quiet:
+					_print_llm(f"hedging to {transports[1].name} after {delay:.2f}s")
+				backup_cancel = threading.Event()
+				backup = executor.submit(self._hedge_attempt, compute, transports[1:], backup_cancel)
+				cancels[backup] = backup_cancel
+			pending = set(cancels)
+			while pending:
+				done, pending = concurrent.futures.wait(
+					pending, return_when=concurrent.futures.FIRST_COMPLETED
+				)
+				for future in done:
+					if future.exception() is not None:
 						continue
-					last_transport = transport_exc
+					for loser in pending:
+						cancels[loser].set()
+					self.hedge.record(time.monotonic() - started, hedge_won=future is not primary)
+					return future.result()
+			# both attempts failed; the primary saw the full fallback chain
+			raise primary.exception()
+		finally:
+			executor.shutdown(wait=False, cancel_futures=True)
+
+	#============================================
+	def _hedge_attempt(self, compute, transports: list[LLMTransport], cancel: threading.Event):
+		self._hedge_local.transports = transports
+		self._hedge_local.cancel = cancel
+		try:
+			return compute()
+		finally:
+			self._hedge_local.transports = None
+			self._hedge_local.cancel = None
+
+	#============================================
+	def _check_hedge_cancelled(self) -> None:
+		cancel = getattr(self._hedge_local, "cancel", None)
+		if cancel is not None and cancel.is_set():
+			raise HedgeCancelledError("Another hedged attempt already answered.")
+
+	#============================================
+	def _ordered_transports(self) -> list[LLMTransport]:
+		hedged = getattr(self._hedge_local, "transports", None)
+		if hedged is not None:
+			return list(hedged)
+		return _EngineCore._ordered_transports(self)
+
+	#============================================
+	def _compute_and_memoize(self, key: tuple[str, str], compute):
+		result = compute()
+		self._memo_put(key, result)
+		return result
+
+	#============================================
+	def _run_steps(self, make_steps, *args):
+		# a fresh generator per call, so a hedged copy does not share state
+		result = self._drive(make_steps(*args))
+		return result
+
+	#============================================
+	def _drive(self, steps):
+		"""
+		Run a step generator, making each transport call it yields in this thread.
+		"""
+		reply = None
+		failure: Exception | None = None
+		while True:
+			try:
+				if failure is None:
+					call = steps.send(reply)
+				else:
+					call = steps.throw(failure)
+			except StopIteration as stop:
+				result = stop.value
+				return result
+			reply = None
+			failure = None
+			try:
+				reply = self._invoke_transport(call)
+			except Exception as exc:
+				failure = exc
+
+	#============================================
+	def _invoke_transport(self, call: _TransportCall) -> str:
+		early_tags = self._early_stop_tags(call)
+		if early_tags:
+			return self._stream_until_tags(call, early_tags)
+		transport = call.transport
+		extra = _timeout_kwargs(transport, call.timeout)
+		prompt = call.prompt
+		if call.messages is not None:
+			generate_chat = getattr(transport, "generate_chat", None)
+			if callable(generate_chat):
+				return generate_chat(
+					call.messages, purpose=call.purpose, max_tokens=call.max_tokens, **extra
+				)
+			prompt = format_chat_prompt(call.messages)
+		if prompt is None:
+			raise ValueError("Prompt or messages are required.")
+		return transport.generate(prompt, purpose=call.purpose, max_tokens=call.max_tokens, **extra)
+
+	#============================================
+	def _stream_with_fallback(
+		self,
+		prompt: str | None,
+		*,
+		messages: list[dict[str, str]] | None,
+		purpose: str,
+		max_tokens: int,
+		deadline: float | None = None,
+	) -> Iterator[str]:
+		last_exc: Exception | None = None
+		for transport in self._ordered_transports():
+			try:
+				_remaining(deadline)
+			except DeadlineExceededError as deadline_exc:
+				raise deadline_exc from last_exc
+			if not self.quiet:
+				_print_llm(f"streaming {transport.name} for {purpose}")
+			chunks = self._stream_on_transport(
+				transport,
+				prompt,
+				messages,
+				purpose,
+				max_tokens,
+				deadline=deadline,
+			)
+			# fall back only until the first chunk arrives
+			try:
+				first_chunk = next(chunks)
+			except StopIteration:
+				return
+			except Exception as exc:
+				last_exc = exc
+				if isinstance(exc, TransportUnavailableError):
 					continue
-				try:
-					return parser(fixed)
-				except ParseError as parse_exc:
-					last_parse = parse_exc
-					log_parse_failure(
-						purpose=purpose,
-						error=parse_exc,
-						raw_text=parse_exc.raw_text or fixed,
-						prompt=fix_prompt,
-						stage=f"format fix ({transport.name})",
-					)
+				if _is_guardrail_error(exc) or _is_context_window_error(exc):
 					continue
-			if last_parse:
-				text = last_fixed or raw_text
-				raise ParseError(str(last_parse), raw_text=text)
-			if last_transport:
-				raise last_transport
-			raise ParseError("Format-fix retry failed.")
+				raise
+			yield first_chunk
+			yield from chunks
+			return
+		if last_exc:
+			raise last_exc
+		raise TransportUnavailableError("No LLM transports available.")
 
 	#============================================
-	def _generate_on_transport(
+	def _stream_on_transport(
 		self,
 		transport: LLMTransport,
 		prompt: str | None,
 		messages: list[dict[str, str]] | None,
 		purpose: str,
 		max_tokens: int,
-	) -> str:
+		deadline: float | None = None,
+	) -> Iterator[str]:
+		extra = _timeout_kwargs(transport, _remaining(deadline))
+		# transports without streaming support yield their full reply as one chunk
 		if messages is not None:
-			generate_chat = getattr(transport, "generate_chat", None)
-			if callable(generate_chat):
-				return generate_chat(messages, purpose=purpose, max_tokens=max_tokens)
+			stream_chat = getattr(transport, "generate_chat_stream", None)
+			if callable(stream_chat):
+				yield from stream_chat(messages, purpose=purpose, max_tokens=max_tokens, **extra)
+				return
+			if callable(getattr(transport, "generate_chat", None)):
+				steps = self._transport_steps(
+					transport, None, messages, purpose, max_tokens, deadline=deadline
+				)
+				text, _pending = self._drive(steps)
+				yield text
+				return
 			prompt = format_chat_prompt(messages)
 		if prompt is None:
 			raise ValueError("Prompt or messages are required.")
-		return transport.generate(prompt, purpose=purpose, max_tokens=max_tokens)
+		stream = getattr(transport, "generate_stream", None)
+		if callable(stream):
+			yield from stream(prompt, purpose=purpose, max_tokens=max_tokens, **extra)
+			return
+		yield transport.generate(prompt, purpose=purpose, max_tokens=max_tokens, **extra)
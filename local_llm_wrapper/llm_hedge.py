@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Hedging policy: when to send a duplicate structured request to a backup transport.
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import math
+import threading
+import collections
+
+#============================================
+
+
+DEFAULT_HEDGE_PERCENTILE = 95.0
+DEFAULT_HEDGE_WINDOW = 200
+DEFAULT_MIN_SAMPLES = 20
+DEFAULT_INITIAL_DELAY = 2.0
+
+
+class HedgePolicy:
+	"""
+	Derive the hedge delay from recent structured-call latencies.
+
+	Until min_samples calls have finished the delay is initial_delay; after
+	that it is the given percentile of the last window latencies, never below
+	min_delay. Also counts how often a hedge was sent and which attempt won.
+	"""
+
+	def __init__(
+		self,
+		percentile: float = DEFAULT_HEDGE_PERCENTILE,
+		window: int = DEFAULT_HEDGE_WINDOW,
+		min_samples: int = DEFAULT_MIN_SAMPLES,
+		initial_delay: float = DEFAULT_INITIAL_DELAY,
+		min_delay: float = 0.0,
+	) -> None:
+		if not 0 < percentile <= 100:
+			raise ValueError("percentile must be in (0, 100].")
+		self.percentile = float(percentile)
+		self.min_samples = max(1, int(min_samples))
+		self.initial_delay = max(0.0, float(initial_delay))
+		self.min_delay = max(0.0, float(min_delay))
+		self._lock = threading.Lock()
+		self._samples: collections.deque[float] = collections.deque(maxlen=max(1, int(window)))
+		self._counts = {"hedged": 0, "primary_wins": 0, "hedge_wins": 0}
+
+	#============================================
+	def delay(self) -> float:
+		"""
+		Return how long to wait for the primary before sending the hedge.
+		"""
+		with self._lock:
+			samples = sorted(self._samples)
+		if len(samples) < self.min_samples:
+			return self.initial_delay
+		rank = max(1, math.ceil(self.percentile / 100.0 * len(samples)))
+		value = max(self.min_delay, samples[rank - 1])
+		return value
+
+	#============================================
+	def record(self, latency: float, *, hedge_won: bool) -> None:
+		with self._lock:
+			self._samples.append(float(latency))
+			self._counts["hedge_wins" if hedge_won else "primary_wins"] += 1
+
+	#============================================
+	def record_hedge_sent(self) -> None:
+		with self._lock:
+			self._counts["hedged"] += 1
+
+	#============================================
+	def stats(self) -> dict[str, float]:
+		"""
+		Return hedge counters, sample count, and the current delay.
+		"""
+		with self._lock:
+			result: dict[str, float] = dict(self._counts)
+			result["samples"] = len(self._samples)
+		result["delay"] = round(self.delay(), 6)
+		return result
@@ -30,6 +30,10 @@ class RenameResult:
 	new_name: str
 	reason: str
 	raw_text: str
+	# set by the engine so unordered bulk results can be matched to inputs
+	current_name: str = ""
+	# set by rename_many when this file failed; new_name is then empty
+	error: str = ""
 
 
 @dataclass(slots=True)
@@ -37,6 +41,8 @@ class KeepResult:
 	stem_action: str
 	reason: str
 	raw_text: str
+	# "rules" when decided from stem features without a model call
+	source: str = "model"
 
 
 @dataclass(slots=True)
@@ -44,8 +50,18 @@ class SortResult:
 	assignments: dict[str, str]
 	raw_text: str
 	reasons: dict[str, str] = field(default_factory=dict)
+	# path -> error message for items that failed in a batch sort
+	errors: dict[str, str] = field(default_factory=dict)
 
 
+RENAME_TAGS = ("new_name", "reason")
+KEEP_TAGS = ("stem_action", "reason")
+SORT_TAGS = ("category", "reason")
+RENAME_KEEP_TAGS = ("new_name", "reason", "stem_action", "stem_reason")
+_ITEM_BLOCK_RE = re.compile(
+	r"<item\b[^>]*?\bid\s*=\s*[\"']?(\d+)[\"']?[^>]*>(.*?)</item>",
+	flags=re.IGNORECASE | re.DOTALL,
+)
 _CODE_FENCE_RE = re.compile(r"```[a-zA-Z0-9_+-]*\n(.*?)```", re.DOTALL)
 _TAG_NAME_RE = re.compile(r"^[a-zA-Z0-9_:-]+$")
 
@@ -79,6 +95,86 @@ def _find_tag_values(text: str, tag: str) -> list[str]:
 	return [match.strip() for match in pattern.findall(text)]
 
 
+class TagScanner:
+	"""
+	Incrementally scan streamed text until every required tag has closed.
+
+	Each call to feed() only searches the new text (plus a short overlap for
+	tokens split across chunks), so scanning stays linear in the reply size.
+	"""
+
+	def __init__(self, tags: tuple[str, ...] | list[str]) -> None:
+		self._parts: list[str] = []
+		self._lower = ""
+		# per tag: position of the open tag (or -1) and where to resume searching
+		self._open_at: dict[str, int] = {}
+		self._search_from: dict[str, int] = {}
+		for tag in tags:
+			tag_name = tag.strip().lower()
+			if not _TAG_NAME_RE.match(tag_name):
+				raise ValueError("Tag name must use letters, numbers, underscores, dashes, or colons.")
+			self._open_at[tag_name] = -1
+			self._search_from[tag_name] = 0
+		self._pending = set(self._open_at)
+
+	#============================================
+	@property
+	def text(self) -> str:
+		joined = "".join(self._parts)
+		return joined
+
+	#============================================
+	@property
+	def complete(self) -> bool:
+		return not self._pending
+
+	#============================================
+	def feed(self, chunk: str) -> bool:
+		"""
+		Add a chunk and return True once all required tags are closed.
+		"""
+		if not chunk:
+			return self.complete
+		self._parts.append(chunk)
+		self._lower += chunk.lower()
+		for tag in list(self._pending):
+			if self._tag_closed(tag):
+				self._pending.discard(tag)
+		return self.complete
+
+	#============================================
+	def _tag_closed(self, tag: str) -> bool:
+		if self._open_at[tag] < 0:
+			open_token = f"<{tag}"
+			start = self._search_from[tag]
+			while True:
+				idx = self._lower.find(open_token, start)
+				if idx == -1:
+					# keep enough overlap to match a token split across chunks
+					self._search_from[tag] = max(0, len(self._lower) - len(open_token) - 1)
+					return False
+				# require a word boundary so <reason does not match <reasoning
+				after = self._lower[idx + len(open_token) : idx + len(open_token) + 1]
+				if not after:
+					self._search_from[tag] = idx
+					return False
+				if after == ">" or after.isspace():
+					break
+				start = idx + 1
+			gt_idx = self._lower.find(">", idx)
+			if gt_idx == -1:
+				self._search_from[tag] = idx
+				return False
+			self._open_at[tag] = gt_idx + 1
+			self._search_from[tag] = gt_idx + 1
+		close_token = f"</{tag}>"
+		close_idx = self._lower.find(close_token, self._search_from[tag])
+		if close_idx == -1:
+			self._search_from[tag] = max(self._open_at[tag], len(self._lower) - len(close_token) + 1)
+			return False
+		return True
+
+
 def parse_tag_response(text: str, tag: str) -> str:
 	response_body = _coerce_response_body(text)
 	if not response_body:
@@ -114,6 +210,35 @@ def parse_rename_response(text: str) -> RenameResult:
 	reason = reasons[0] if reasons else ""
 	return RenameResult(new_name=new_name, reason=reason, raw_text=text)
 
+
+def parse_rename_keep_response(
+	text: str, original_stem: str
+) -> tuple[RenameResult, KeepResult]:
+	"""
+	Parse a combined reply into the rename result and the stem action.
+	"""
+	rename_result = parse_rename_response(text)
+	response_body = _coerce_response_body(text)
+	stem_actions = _find_tag_values(response_body, "stem_action")
+	if not stem_actions:
+		raise ParseError("Missing <stem_action> in rename/keep response.", text)
+	if len(stem_actions) > 1:
+		raise ParseError("Duplicate <stem_action> tags in rename/keep response.", text)
+	stem_reasons = _find_tag_values(response_body, "stem_reason")
+	if not stem_reasons:
+		raise ParseError("Missing <stem_reason> in rename/keep response.", text)
+	if len(stem_reasons) > 1:
+		raise ParseError("Duplicate <stem_reason> tags in rename/keep response.", text)
+	stem_action = stem_actions[0].strip().lower()
+	if stem_action not in {"drop", "keep", "normalize"}:
+		raise ParseError("Invalid <stem_action> value in rename/keep response.", text)
+	stem_reason = stem_reasons[0].strip().replace('\\"', '"').replace("\\'", "'")
+	if not stem_reason:
+		raise ParseError("Missing <stem_reason> in rename/keep response.", text)
+	keep_result = KeepResult(stem_action=stem_action, reason=stem_reason, raw_text=text)
+	return rename_result, keep_result
+
+
 def parse_keep_response(
 	text: str, original_stem: str
 ) -> KeepResult:
@@ -172,3 +297,44 @@ def parse_sort_response(text: str, expected_paths: list[str]) -> SortResult:
 		reasons={expected_paths[0]: reason} if reason else {},
 		raw_text=text,
 	)
+
+
+def parse_sort_batch_response(text: str, expected_paths: list[str]) -> SortResult:
+	"""
+	Parse <item id="N"> blocks from a batched sort reply.
+
+	Items that are missing, duplicated, or malformed are left out of the
+	result so the caller can re-ask them individually.
+	"""
+	response_body = _coerce_response_body(text)
+	if not response_body:
+		raise ParseError("Missing required tags in sort response.", text)
+	assignments: dict[str, str] = {}
+	reasons: dict[str, str] = {}
+	seen_ids: set[int] = set()
+	duplicate_ids: set[int] = set()
+	for item_id_text, block in _ITEM_BLOCK_RE.findall(response_body):
+		item_id = int(item_id_text)
+		if item_id in seen_ids:
+			duplicate_ids.add(item_id)
+			continue
+		seen_ids.add(item_id)
+		if item_id < 1 or item_id > len(expected_paths):
+			continue
+		categories = _find_tag_values(block, "category")
+		if len(categories) != 1 or not categories[0].strip():
+			continue
+		block_reasons = _find_tag_values(block, "reason")
+		path = expected_paths[item_id - 1]
+		assignments[path] = categories[0].strip()
+		if len(block_reasons) == 1 and block_reasons[0].strip():
+			reasons[path] = block_reasons[0].strip()
+	# an id answered twice is ambiguous, so drop it
+	for item_id in duplicate_ids:
+		if 1 <= item_id <= len(expected_paths):
+			path = expected_paths[item_id - 1]
+			assignments.pop(path, None)
+			reasons.pop(path, None)
+	if not assignments:
+		raise ParseError("Missing <item> blocks in sort response.", text)
+	return SortResult(assignments=assignments, reasons=reasons, raw_text=text)
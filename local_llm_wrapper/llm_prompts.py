@@ -35,6 +35,15 @@ class KeepRequest:
 	features: dict[str, object]
 
 
+@dataclass(slots=True)
+class RenameKeepRequest:
+	metadata: dict
+	current_name: str
+	original_stem: str
+	features: dict[str, object]
+	context: str | None = None
+
+
 @dataclass(slots=True)
 class SortItem:
 	path: str
@@ -57,13 +66,60 @@ KEEP_EXAMPLE_OUTPUT = (
 	"<stem_action>keep</stem_action>\n"
 	"<reason>stem has a meaningful model number</reason>"
 )
+RENAME_KEEP_EXAMPLE_OUTPUT = (
+	"<new_name>GV60_MAX_Fan_Manual_2015.pdf</new_name>\n"
+	"<reason>manual with model and year</reason>\n"
+	"<stem_action>keep</stem_action>\n"
+	"<stem_reason>stem has a meaningful model number</stem_reason>"
+)
 SORT_EXAMPLE_OUTPUT = (
 	"<category>Document</category>\n"
 	"<reason>manual with model and year</reason>"
 )
+SORT_BATCH_EXAMPLE_OUTPUT = (
+	'<item id="1">\n'
+	"<category>Document</category>\n"
+	"<reason>manual with model and year</reason>\n"
+	"</item>\n"
+	'<item id="2">\n'
+	"<category>Image</category>\n"
+	"<reason>photo from a phone camera</reason>\n"
+	"</item>"
+)
 
 
 def build_rename_prompt(req: RenameRequest) -> str:
+	lines = _rename_detail_lines(req)
+	lines.append("Return only the tags shown below.")
+	lines.append("Example output:")
+	lines.append(RENAME_EXAMPLE_OUTPUT)
+	return "\n".join(lines)
+
+
+def build_rename_keep_prompt(req: RenameKeepRequest) -> str:
+	"""
+	Ask for the new name and the original stem action in one reply.
+	"""
+	rename_req = RenameRequest(
+		metadata=req.metadata,
+		current_name=req.current_name,
+		context=req.context,
+	)
+	lines = _rename_detail_lines(rename_req)
+	lines.append("Also choose stem_action for the original stem: drop | normalize | keep.")
+	lines.append("stem_reason should mention what useful info is in the stem.")
+	lines.append("Prefer keep when the stem is already concise; normalize only to shorten long or noisy stems.")
+	lines.append(f"original_stem: {req.original_stem}")
+	lines.append("stem features:")
+	for key, value in req.features.items():
+		lines.append(f"- {key}: {value}")
+	lines.append("Return only the tags shown below.")
+	lines.append("Example output:")
+	lines.append(RENAME_KEEP_EXAMPLE_OUTPUT)
+	return "\n".join(lines)
+
+
+def _rename_detail_lines(req: RenameRequest) -> list[str]:
 	lines: list[str] = []
 	if req.context:
 		lines.append(f"Context: {req.context}")
@@ -100,10 +156,7 @@ def build_rename_prompt(req: RenameRequest) -> str:
 	if caption_note:
 		lines.append(f"caption_note: {caption_note}")
 	lines.append(f"extension: {req.metadata.get('extension')}")
-	lines.append("Return only the tags shown below.")
-	lines.append("Example output:")
-	lines.append(RENAME_EXAMPLE_OUTPUT)
-	return "\n".join(lines)
+	return lines
 
 
 def build_rename_prompt_minimal(req: RenameRequest) -> str:
@@ -180,6 +233,27 @@ def build_sort_prompt(req: SortRequest) -> str:
 	return "\n".join(lines)
 
 
+def build_sort_batch_prompt(req: SortRequest) -> str:
+	lines: list[str] = []
+	if req.context:
+		lines.append(f"Context: {req.context}")
+	lines.append("Assign one allowed category to each file below.")
+	lines.append("Give a short reason tied to the file details.")
+	lines.append("Allowed categories:")
+	for cat in ALLOWED_CATEGORIES:
+		lines.append(f"- {cat}")
+	lines.append("Files:")
+	# ids are 1-based positions in req.files
+	for idx, item in enumerate(req.files, start=1):
+		lines.append(
+			f"id={idx} | path={item.path} | name={item.name} | ext={item.ext} | desc={item.description}"
+		)
+	lines.append("Return one <item> block per file id, using only the tags shown below.")
+	lines.append("Example output:")
+	lines.append(SORT_BATCH_EXAMPLE_OUTPUT)
+	return "\n".join(lines)
+
+
 def build_format_fix_prompt(original_prompt: str, example_output: str) -> str:
 	lines = [
 		"Reply with tags only.",
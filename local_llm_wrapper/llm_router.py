@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Health-aware transport ordering with a per-transport circuit breaker.
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import time
+import threading
+
+# local repo modules
+from .errors import TransportUnavailableError
+from .llm_utils import _is_context_window_error, _is_guardrail_error
+from .transports.base import LLMTransport
+
+#============================================
+
+
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_COOLDOWN_SECONDS = 30.0
+# weight of the newest sample in the latency and error-rate moving averages
+_EWMA_ALPHA = 0.2
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class _Health:
+	def __init__(self, name: str) -> None:
+		self.name = name
+		self.state = CLOSED
+		self.consecutive_failures = 0
+		self.error_rate = 0.0
+		self.latency: float | None = None
+		self.unavailable_since: float | None = None
+		self.opened_at = 0.0
+		# when a half-open probe was handed out, or None when no probe is running
+		self.probe_started: float | None = None
+
+
+class TransportRouter:
+	"""
+	Order transports by recent health and skip ones whose circuit is open.
+
+	A transport's circuit opens after failure_threshold consecutive failures.
+	Once cooldown seconds pass it goes half-open: one caller gets it first as
+	a probe, and the probe's outcome closes or re-opens the circuit. Closed
+	transports are ordered by error rate, then average latency, then their
+	position in the transport list; transports with no latency samples yet
+	come after measured ones with the same error rate.
+	"""
+
+	def __init__(
+		self,
+		failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+		cooldown: float = DEFAULT_COOLDOWN_SECONDS,
+	) -> None:
+		self.failure_threshold = max(1, int(failure_threshold))
+		self.cooldown = float(cooldown)
+		self._lock = threading.Lock()
+		# keyed by id() because transports are often unhashable dataclasses
+		self._health: dict[int, _Health] = {}
+
+	#============================================
+	def _get(self, transport: LLMTransport) -> _Health:
+		health = self._health.get(id(transport))
+		if health is None:
+			health = _Health(transport.name)
+			self._health[id(transport)] = health
+		return health
+
+	#============================================
+	def order(self, transports: list[LLMTransport]) -> list[LLMTransport]:
+		"""
+		Return the transports worth trying now, healthiest first.
+
+		Raises:
+			TransportUnavailableError: when every circuit is open.
+		"""
+		now = time.monotonic()
+		probes: list[LLMTransport] = []
+		ranked: list[tuple[tuple[float, int, float, int], LLMTransport]] = []
+		with self._lock:
+			for idx, transport in enumerate(transports):
+				health = self._get(transport)
+				if health.state == OPEN and now - health.opened_at >= self.cooldown:
+					health.state = HALF_OPEN
+				if health.state == HALF_OPEN:
+					# a probe that never reported back does not block the next one
+					stale = health.probe_started is not None and now - health.probe_started >= self.cooldown
+					if health.probe_started is None or stale:
+						health.probe_started = now
+						probes.append(transport)
+					continue
+				if health.state == OPEN:
+					continue
+				# an untried transport is not assumed fast: it follows measured ones
+				# with the same error rate, in list order
+				unmeasured = 1 if health.latency is None else 0
+				latency = health.latency if health.latency is not None else 0.0
+				ranked.append(((round(health.error_rate, 1), unmeasured, latency, idx), transport))
+		ranked.sort(key=lambda pair: pair[0])
+		ordered = probes + [transport for _key, transport in ranked]
+		if not ordered:
+			raise TransportUnavailableError("All LLM transports are cooling down after failures.")
+		return ordered
+
+	#============================================
+	def record_success(self, transport: LLMTransport, latency: float) -> None:
+		with self._lock:
+			health = self._get(transport)
+			health.state = CLOSED
+			health.consecutive_failures = 0
+			health.unavailable_since = None
+			health.probe_started = None
+			health.error_rate *= 1.0 - _EWMA_ALPHA
+			if health.latency is None:
+				health.latency = latency
+			else:
+				health.latency += _EWMA_ALPHA * (latency - health.latency)
+
+	#============================================
+	def record_abandoned(self, transport: LLMTransport) -> None:
+		"""
+		Forget a call the caller's deadline cut short; it says nothing about health.
+		"""
+		with self._lock:
+			self._get(transport).probe_started = None
+
+	#============================================
+	def record_failure(self, transport: LLMTransport, exc: BaseException) -> None:
+		"""
+		Count a failed call; refusals and context errors are not health problems.
+		"""
+		if isinstance(exc, Exception) and (_is_guardrail_error(exc) or _is_context_window_error(exc)):
+			with self._lock:
+				self._get(transport).probe_started = None
+			return
+		now = time.monotonic()
+		with self._lock:
+			health = self._get(transport)
+			health.consecutive_failures += 1
+			health.error_rate += _EWMA_ALPHA * (1.0 - health.error_rate)
+			health.probe_started = None
+			if health.unavailable_since is None:
+				health.unavailable_since = time.time()
+			if health.state == HALF_OPEN or health.consecutive_failures >= self.failure_threshold:
+				health.state = OPEN
+				health.opened_at = now
+
+	#============================================
+	def stats(self) -> dict[str, dict[str, object]]:
+		"""
+		Return circuit state, error rate, latency, and outage start per transport name.
+		"""
+		with self._lock:
+			result = {
+				health.name: {
+					"state": health.state,
+					"consecutive_failures": health.consecutive_failures,
+					"error_rate": round(health.error_rate, 3),
+					"latency": None if health.latency is None else round(health.latency, 3),
+					"unavailable_since": health.unavailable_since,
+				}
+				for health in self._health.values()
+			}
+		return result
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Single-flight coalescing of identical concurrent requests.
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import copy
+import time
+import threading
+import concurrent.futures
+from collections.abc import Awaitable, Callable
+
+# local repo modules
+from .errors import DeadlineExceededError
+
+#============================================
+
+
+class _Flight:
+	"""
+	One running call: its shared future and the leader's deadline.
+	"""
+
+	__slots__ = ("future", "deadline", "expired")
+
+	def __init__(self, deadline: float | None) -> None:
+		self.future: concurrent.futures.Future = concurrent.futures.Future()
+		self.deadline = deadline
+		# set when the leader failed because its own deadline ran out
+		self.expired = False
+
+
+def _time_left(deadline: float | None) -> float | None:
+	if deadline is None:
+		return None
+	left = deadline - time.monotonic()
+	if left <= 0:
+		raise DeadlineExceededError("Request deadline exceeded waiting on a shared call.")
+	return left
+
+
+def _outlives(deadline: float | None, leader_deadline: float | None) -> bool:
+	# a waiter with more time than the leader can still get an answer itself
+	if deadline is None:
+		return leader_deadline is not None
+	if leader_deadline is None:
+		return False
+	outlives = deadline > leader_deadline and deadline > time.monotonic()
+	return outlives
+
+
+class SingleFlight:
+	"""
+	Run one call per key at a time and share its outcome with concurrent callers.
+
+	The first caller for a key (the leader) runs the work; callers that arrive
+	while it is running wait on the same future and receive a copy of its
+	result, or the same exception. Once the leader finishes the key is free.
+
+	Deadlines are time.monotonic() values. A waiter stops waiting when its
+	own deadline passes; the leader keeps running for the others. When the
+	leader fails because its deadline ran out, waiters with a later deadline
+	(or none) run the work again instead of inheriting that failure.
+	"""
+
+	def __init__(self) -> None:
+		self._lock = threading.Lock()
+		self._in_flight: dict[object, _Flight] = {}
+		self._leaders = 0
+		self._coalesced = 0
+		self._rerun = 0
+
+	#============================================
+	def _join(self, key: object, deadline: float | None) -> tuple[_Flight, bool]:
+		with self._lock:
+			flight = self._in_flight.get(key)
+			if flight is None:
+				flight = _Flight(deadline)
+				self._in_flight[key] = flight
+				self._leaders += 1
+				leader = True
+			else:
+				self._coalesced += 1
+				leader = False
+		return flight, leader
+
+	#============================================
+	def _settle(self, key: object, flight: _Flight, result: object) -> None:
+		with self._lock:
+			self._in_flight.pop(key, None)
+		# keep a pristine copy in case the leader's caller mutates its result
+		flight.future.set_result(copy.deepcopy(result))
+
+	#============================================
+	def _fail(self, key: object, flight: _Flight, exc: BaseException) -> None:
+		spent = flight.deadline is not None and time.monotonic() >= flight.deadline
+		flight.expired = isinstance(exc, DeadlineExceededError) or spent
+		# the key is freed first so a waiter that runs the work again leads it
+		with self._lock:
+			self._in_flight.pop(key, None)
+		flight.future.set_exception(exc)
+
+	#============================================
+	def _should_rerun(self, flight: _Flight, deadline: float | None) -> bool:
+		if not (flight.expired and _outlives(deadline, flight.deadline)):
+			return False
+		with self._lock:
+			self._rerun += 1
+		return True
+
+	#============================================
+	def do(
+		self,
+		key: object,
+		work: Callable[[], object],
+		deadline: float | None = None,
+	) -> object:
+		"""
+		Run work() for key, or wait for the identical call already running.
+
+		Raises:
+			DeadlineExceededError: when deadline passes while waiting.
+		"""
+		while True:
+			flight, leader = self._join(key, deadline)
+			if leader:
+				break
+			try:
+				shared = flight.future.result(_time_left(deadline))
+			except concurrent.futures.TimeoutError as exc:
+				raise DeadlineExceededError("Request deadline exceeded waiting on a shared call.") from exc
+			except Exception:
+				if self._should_rerun(flight, deadline):
+					continue
+				raise
+			# waiters get their own copy so mutating results stays safe
+			result = copy.deepcopy(shared)
+			return result
+		try:
+			result = work()
+		except BaseException as exc:
+			self._fail(key, flight, exc)
+			raise
+		self._settle(key, flight, result)
+		return result
+
+	#============================================
+	async def ado(
+		self,
+		key: object,
+		work: Callable[[], Awaitable[object]],
+		deadline: float | None = None,
+	) -> object:
+		"""
+		Await work() for key, or await the identical call already running.
+
+		Shares the in-flight table with do(), so sync and async callers
+		coalesce with each other. Waiting never blocks the event loop.
+		"""
+		# imported here so sync-only users do not pay for asyncio
+		import asyncio
+
+		while True:
+			flight, leader = self._join(key, deadline)
+			if leader:
+				break
+			# shield keeps a timed-out waiter from cancelling the shared future
+			waiter = asyncio.shield(asyncio.wrap_future(flight.future))
+			try:
+				shared = await asyncio.wait_for(waiter, _time_left(deadline))
+			except asyncio.TimeoutError as exc:
+				raise DeadlineExceededError("Request deadline exceeded waiting on a shared call.") from exc
+			except Exception:
+				if self._should_rerun(flight, deadline):
+					continue
+				raise
+			result = copy.deepcopy(shared)
+			return result
+		try:
+			result = await work()
+		except BaseException as exc:
+			self._fail(key, flight, exc)
+			raise
+		self._settle(key, flight, result)
+		return result
+
+	#============================================
+	def stats(self) -> dict[str, int]:
+		"""
+		Return calls run, callers that waited, reruns after a leader's deadline, and in-flight keys.
+		"""
+		with self._lock:
+			result = {
+				"leaders": self._leaders,
+				"coalesced": self._coalesced,
+				"rerun": self._rerun,
+				"in_flight": len(self._in_flight),
+			}
+		return result
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Streaming response wrapper with time-to-first-token measurement.
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import time
+from collections.abc import Iterator
+
+#============================================
+
+
+class TokenStream:
+	"""
+	Iterate text chunks as they arrive while recording timing and full text.
+
+	The clock starts when the stream is created, so ttft covers connection
+	setup, prompt evaluation, and the first decoded token.
+	"""
+
+	def __init__(self, chunks: Iterator[str]) -> None:
+		self._chunks = chunks
+		self._parts: list[str] = []
+		self.started_at = time.monotonic()
+		self.first_token_at: float | None = None
+		self.finished_at: float | None = None
+
+	#============================================
+	def __iter__(self) -> TokenStream:
+		return self
+
+	#============================================
+	def __next__(self) -> str:
+		try:
+			chunk = next(self._chunks)
+		except StopIteration:
+			self._mark_finished()
+			raise
+		if self.first_token_at is None:
+			self.first_token_at = time.monotonic()
+		self._parts.append(chunk)
+		return chunk
+
+	#============================================
+	def _mark_finished(self) -> None:
+		if self.finished_at is None:
+			self.finished_at = time.monotonic()
+
+	#============================================
+	@property
+	def ttft(self) -> float | None:
+		"""
+		Seconds from stream creation to the first chunk, or None before it arrives.
+		"""
+		if self.first_token_at is None:
+			return None
+		elapsed = self.first_token_at - self.started_at
+		return elapsed
+
+	#============================================
+	@property
+	def elapsed(self) -> float | None:
+		"""
+		Seconds from stream creation to completion, or None while still running.
+		"""
+		if self.finished_at is None:
+			return None
+		elapsed = self.finished_at - self.started_at
+		return elapsed
+
+	#============================================
+	@property
+	def text(self) -> str:
+		"""
+		Text received so far.
+		"""
+		joined = "".join(self._parts)
+		return joined
+
+	#============================================
+	def read(self) -> str:
+		"""
+		Consume the remaining chunks and return the full text.
+		"""
+		for _chunk in self:
+			pass
+		return self.text
+
+	#============================================
+	def close(self) -> None:
+		"""
+		Stop the stream early and release the underlying connection.
+		"""
+		close = getattr(self._chunks, "close", None)
+		if callable(close):
+			close()
+		self._mark_finished()
@@ -7,11 +7,14 @@ from __future__ import annotations
 
 # Standard Library
 from datetime import datetime, timezone
+import json
 import os
 import platform
 import re
 import subprocess
 import sys
+import threading
+import time
 
 # local repo modules
 from .errors import ContextWindowError, GuardrailRefusalError
@@ -22,6 +25,13 @@ from .errors import ContextWindowError, GuardrailRefusalError
 MAX_FILENAME_CHARS = 100
 PROMPT_FILENAME_CHARS = 80
 MIN_MACOS_MAJOR = 26
+# seconds an Apple Intelligence availability result is reused before probing again
+APPLE_AVAILABILITY_TTL = 300.0
+# hardware rarely changes, so a persisted probe stays valid for a week
+HARDWARE_CACHE_MAX_AGE = 7 * 24 * 60 * 60
+DEFAULT_HARDWARE_CACHE_PATH = os.path.join(
+	os.path.expanduser("~"), ".cache", "local_llm_wrapper", "hardware.json"
+)
 ALLOWED_CATEGORIES = [
 	"Document",
 	"Spreadsheet",
@@ -49,6 +59,11 @@ _UUID_RE = re.compile(
 	r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[1-5][0-9a-fA-F]{3}-[89abAB][0-9a-fA-F]{3}-[0-9a-fA-F]{12}$"
 )
 _HEX_BLOB_RE = re.compile(r"\b[0-9a-fA-F]{8,}\b")
+# shortest hex token treated as a hash (64-bit ids; md5 and sha1 are 32 and 40)
+_HASH_MIN_HEX_CHARS = 16
+# random hex is about 5/8 digits; word-plus-year stems fall outside this band
+_HASH_MIN_DIGIT_RATIO = 0.2
+_HASH_MAX_DIGIT_RATIO = 0.9
 _LONG_DIGIT_RUN_RE = re.compile(r"\d{8,}")
 _TOKEN_SPLIT_RE = re.compile(r"[-_.\s]+")
 _GENERIC_LABEL_RE = re.compile(
@@ -56,14 +71,19 @@ _GENERIC_LABEL_RE = re.compile(
 	re.IGNORECASE,
 )
 _ALLOWED_CHAT_ROLES = {"system", "user", "assistant"}
+_AMBIGUOUS_SORT_EXTENSIONS = {
+	"pdf", "txt", "md", "html", "htm", "csv", "tsv", "xls", "xlsx", "ods",
+}
 
-_GUARDRAIL_ERRORS: tuple[type[BaseException], ...] = ()
-try:
-	from applefoundationmodels.exceptions import GuardrailViolationError
 
-	_GUARDRAIL_ERRORS = (GuardrailViolationError,)
-except Exception:
-	_GUARDRAIL_ERRORS = ()
+def _guardrail_error_types() -> tuple[type[BaseException], ...]:
+	# only look the Apple error up once something imported it; a process that
+	# never loaded applefoundationmodels cannot have raised one
+	exceptions_module = sys.modules.get("applefoundationmodels.exceptions")
+	error_type = getattr(exceptions_module, "GuardrailViolationError", None)
+	if isinstance(error_type, type):
+		return (error_type,)
+	return ()
 
 
 def _print_llm(label: str) -> None:
@@ -308,6 +328,28 @@ def compute_stem_features(original_stem: str, suggested_name: str) -> dict[str,
 	}
 
 
+def decide_stem_action_by_rules(features: dict[str, object]) -> tuple[str, str] | None:
+	"""
+	Return (stem_action, reason) for clear-cut stems, or None when the model should decide.
+	"""
+	if features.get("uuid_like"):
+		return ("drop", "stem is a uuid with no readable meaning")
+	if features.get("generic_label"):
+		return ("drop", "stem is a generic camera or download label")
+	# eight digit stems are often dates, so only longer ids are dropped
+	if features.get("is_numeric_only") and int(features.get("length", 0)) > 12:
+		return ("drop", "stem is only a long numeric id")
+	# a single all-hex token reads as a hash only when it is hash-length and
+	# well mixed; shorter ones are often words plus a year (facade2024)
+	single_token = features.get("token_count") == 1
+	hash_length = int(features.get("alnum_length", 0)) >= _HASH_MIN_HEX_CHARS
+	digit_ratio = float(features.get("digit_ratio", 0.0))
+	mixed = _HASH_MIN_DIGIT_RATIO <= digit_ratio <= _HASH_MAX_DIGIT_RATIO
+	if features.get("hex_blob") and single_token and hash_length and mixed:
+		return ("drop", "stem is a hex hash with no words")
+	return None
+
+
 def extract_xml_tag_content(raw_text: str, tag: str) -> str:
 	"""
 	Extract the last occurrence of a given XML-like tag.
@@ -341,24 +383,67 @@ def _parse_macos_version() -> tuple[int, int, int]:
 	return 0, 0, 0
 
 
-def apple_models_available() -> bool:
+_apple_probe_lock = threading.Lock()
+# (checked_at, reason) from the last probe; reason is None when available
+_apple_probe: tuple[float, str | None] | None = None
+
+
+def _probe_apple_intelligence() -> str | None:
+	"""
+	Run the Apple Intelligence checks and return why it is unavailable, or None.
+	"""
 	try:
 		from applefoundationmodels import Session, apple_intelligence_available
 	except Exception:
-		return False
+		return "apple-foundation-models is required for the Apple backend."
 	arch = platform.machine().lower()
 	if arch != "arm64":
-		return False
-	major, _minor, _patch = _parse_macos_version()
+		return "Apple Intelligence requires Apple Silicon (arm64)."
+	major, minor, patch = _parse_macos_version()
 	if major < MIN_MACOS_MAJOR:
-		return False
+		return f"macOS {MIN_MACOS_MAJOR}.0+ is required (detected {major}.{minor}.{patch})."
+	try:
+		available = apple_intelligence_available()
+	except Exception as exc:
+		return f"Apple Intelligence availability check failed: {exc}"
+	if available:
+		return None
 	try:
-		if not apple_intelligence_available():
-			return False
+		reason = Session.get_availability_reason()
 	except Exception:
-		return False
-	_ = Session
-	return True
+		reason = "Apple Intelligence not available or not enabled."
+	return str(reason)
+
+
+def apple_unavailable_reason(ttl: float | None = None) -> str | None:
+	"""
+	Return why Apple Intelligence cannot be used, or None when it can.
+
+	The result is cached for ttl seconds (APPLE_AVAILABILITY_TTL by default);
+	call invalidate_apple_availability() to probe again sooner.
+	"""
+	global _apple_probe
+	max_age = APPLE_AVAILABILITY_TTL if ttl is None else ttl
+	with _apple_probe_lock:
+		cached = _apple_probe
+		if cached is not None and time.monotonic() - cached[0] < max_age:
+			return cached[1]
+		reason = _probe_apple_intelligence()
+		_apple_probe = (time.monotonic(), reason)
+	return reason
+
+
+def invalidate_apple_availability() -> None:
+	"""
+	Forget the cached availability result, e.g. after enabling Apple Intelligence.
+	"""
+	global _apple_probe
+	with _apple_probe_lock:
+		_apple_probe = None
+
+
+def apple_models_available(ttl: float | None = None) -> bool:
+	return apple_unavailable_reason(ttl) is None
 
 
 def _is_context_window_error(exc: Exception) -> bool:
@@ -375,10 +460,24 @@ def _is_context_window_error(exc: Exception) -> bool:
 	return False
 
 
-def total_ram_bytes() -> int:
-	"""
-	Estimate total system memory.
-	"""
+_hardware_lock = threading.Lock()
+# {"vram_gb": int | None, "ram_bytes": int} once probed in this process
+_hardware: dict[str, int | None] | None = None
+
+
+def _meminfo_total_bytes() -> int:
+	try:
+		with open("/proc/meminfo", "r", encoding="ascii") as handle:
+			for line in handle:
+				if line.startswith("MemTotal:"):
+					# reported in kB
+					return int(line.split()[1]) * 1024
+	except (OSError, ValueError, IndexError):
+		return 0
+	return 0
+
+
+def _sysconf_total_bytes() -> int:
 	pages = 0
 	page_size = 0
 	if hasattr(os, "sysconf"):
@@ -392,25 +491,24 @@ def total_ram_bytes() -> int:
 	return 0
 
 
-def get_vram_size_in_gb() -> int | None:
-	"""
-	Detect VRAM or unified memory size in GB.
-	"""
+def _detect_vram_gb() -> int | None:
+	# system_profiler only exists on macOS; elsewhere VRAM stays unknown
+	if sys.platform != "darwin":
+		return None
 	try:
-		arch = subprocess.check_output(["uname", "-m"], text=True).strip()
-		is_apple_silicon = arch.startswith("arm64")
+		is_apple_silicon = platform.machine().lower().startswith("arm64")
 		if is_apple_silicon:
 			hardware_info = subprocess.check_output(
 				["system_profiler", "SPHardwareDataType"], text=True
 			)
-			match = re.search(r"Memory:\\s(\\d+)\\s?GB", hardware_info)
+			match = re.search(r"Memory:\s(\d+)\s?GB", hardware_info)
 			if match:
 				return int(match.group(1))
 		else:
 			display_info = subprocess.check_output(
 				["system_profiler", "SPDisplaysDataType"], text=True
 			)
-			vram_match = re.search(r"VRAM.*?: (\\d+)\\s?MB", display_info)
+			vram_match = re.search(r"VRAM.*?: (\d+)\s?MB", display_info)
 			if vram_match:
 				vram_mb = int(vram_match.group(1))
 				return vram_mb // 1024
@@ -419,12 +517,108 @@ def get_vram_size_in_gb() -> int | None:
 	return None
 
 
-def choose_model(model_override: str | None) -> str:
+def _detect_hardware() -> dict[str, int | None]:
+	ram_bytes = 0
+	if sys.platform.startswith("linux"):
+		ram_bytes = _meminfo_total_bytes()
+	if not ram_bytes:
+		ram_bytes = _sysconf_total_bytes()
+	hardware: dict[str, int | None] = {"vram_gb": _detect_vram_gb(), "ram_bytes": ram_bytes}
+	return hardware
+
+
+def _read_hardware_cache(cache_path: str, max_age: float) -> dict[str, int | None] | None:
+	try:
+		with open(cache_path, "r", encoding="utf-8") as handle:
+			data = json.load(handle)
+		checked_at = float(data["checked_at"])
+		vram_gb = data["vram_gb"]
+		hardware: dict[str, int | None] = {
+			"vram_gb": None if vram_gb is None else int(vram_gb),
+			"ram_bytes": int(data["ram_bytes"]),
+		}
+	except (OSError, ValueError, KeyError, TypeError):
+		return None
+	if not 0 <= time.time() - checked_at < max_age:
+		return None
+	return hardware
+
+
+def _write_hardware_cache(cache_path: str, hardware: dict[str, int | None]) -> None:
+	data = {"checked_at": time.time(), **hardware}
+	tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+	try:
+		os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+		with open(tmp_path, "w", encoding="utf-8") as handle:
+			json.dump(data, handle)
+		os.replace(tmp_path, cache_path)
+	except OSError:
+		# the cache is only an optimization
+		return
+
+
+def detect_hardware(
+	cache_path: str | None = None,
+	max_age: float = HARDWARE_CACHE_MAX_AGE,
+) -> dict[str, int | None]:
+	"""
+	Return {"vram_gb", "ram_bytes"}, probing the hardware at most once per process.
+
+	With cache_path the result is also read from and written to a small JSON
+	file stamped with the probe time, so later processes skip the probe until
+	it is max_age seconds old.
+	"""
+	global _hardware
+	with _hardware_lock:
+		if _hardware is not None:
+			return dict(_hardware)
+		hardware = None
+		if cache_path:
+			hardware = _read_hardware_cache(cache_path, max_age)
+		if hardware is None:
+			hardware = _detect_hardware()
+			if cache_path:
+				_write_hardware_cache(cache_path, hardware)
+		_hardware = hardware
+	return dict(hardware)
+
+
+def invalidate_hardware_cache() -> None:
+	"""
+	Forget the in-process hardware probe; persisted files are left alone.
+	"""
+	global _hardware
+	with _hardware_lock:
+		_hardware = None
+
+
+def total_ram_bytes() -> int:
+	"""
+	Estimate total system memory.
+	"""
+	ram_bytes = detect_hardware()["ram_bytes"]
+	return ram_bytes or 0
+
+
+def get_vram_size_in_gb() -> int | None:
+	"""
+	Detect VRAM or unified memory size in GB.
+	"""
+	vram_gb = detect_hardware()["vram_gb"]
+	return vram_gb
+
+
+def choose_model(model_override: str | None, cache_path: str | None = None) -> str:
 	"""
 	Pick an Ollama model based on RAM or override.
+
+	cache_path persists the hardware probe between runs (see detect_hardware).
 	"""
 	if model_override:
 		return model_override
+	if cache_path:
+		# loads the persisted probe into the per-process cache
+		detect_hardware(cache_path)
 	vram_gb = get_vram_size_in_gb()
 	if vram_gb is not None:
 		if vram_gb > 30:
@@ -466,10 +660,25 @@ def pick_category(extension: str) -> str:
 	return "Other"
 
 
+def confident_category(extension: str) -> str | None:
+	"""
+	Return the category for extensions that need no model, else None.
+	"""
+	ext = extension.lower().lstrip(".")
+	# text-like and tabular files can belong to several categories
+	if ext in _AMBIGUOUS_SORT_EXTENSIONS:
+		return None
+	category = pick_category(ext)
+	if category == "Other":
+		return None
+	return category
+
+
 def _is_guardrail_error(exc: Exception) -> bool:
 	if isinstance(exc, GuardrailRefusalError):
 		return True
-	if _GUARDRAIL_ERRORS and isinstance(exc, _GUARDRAIL_ERRORS):
+	guardrail_errors = _guardrail_error_types()
+	if guardrail_errors and isinstance(exc, guardrail_errors):
 		return True
 	name = exc.__class__.__name__.lower()
 	if "guardrail" in name:
@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+Dependency-free fake Ollama HTTP server for offline tests and load runs.
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import re
+import json
+import math
+import time
+import random
+import argparse
+import threading
+import http.server
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+# local repo modules
+from .llm_prompts import (
+	KEEP_EXAMPLE_OUTPUT,
+	RENAME_EXAMPLE_OUTPUT,
+	RENAME_KEEP_EXAMPLE_OUTPUT,
+	SORT_EXAMPLE_OUTPUT,
+)
+
+#============================================
+
+
+FAIL_TIMEOUT = "timeout"
+FAIL_ERROR_500 = "error_500"
+FAIL_EMPTY = "empty"
+FAILURE_MODES = (FAIL_TIMEOUT, FAIL_ERROR_500, FAIL_EMPTY)
+DEFAULT_MODEL = "mock:latest"
+DEFAULT_TEXT_REPLY = "Hello from the mock Ollama server."
+_NS_PER_SECOND = 1_000_000_000
+# words plus their trailing whitespace, so joined tokens rebuild the reply
+_TOKEN_RE = re.compile(r"\S+\s*|\s+")
+_BATCH_ID_RE = re.compile(r"^id=(\d+) \|", re.MULTILINE)
+
+LatencyFn = Callable[[random.Random], float]
+
+
+def fixed_latency(seconds: float) -> LatencyFn:
+	return lambda _rng: seconds
+
+
+def uniform_latency(low: float, high: float) -> LatencyFn:
+	return lambda rng: rng.uniform(low, high)
+
+
+def lognormal_latency(median: float, sigma: float = 0.5) -> LatencyFn:
+	"""
+	Long-tailed latency: most requests near median, a few much slower.
+	"""
+	if median <= 0:
+		return fixed_latency(0.0)
+	mu = math.log(median)
+	return lambda rng: rng.lognormvariate(mu, sigma)
+
+
+def _model_key(name: str) -> str:
+	# Ollama treats an untagged name as name:latest
+	key = name.strip()
+	if ":" not in key:
+		key = f"{key}:latest"
+	return key
+
+
+def canned_reply(prompt: str) -> str:
+	"""
+	Return a well-formed XML reply for the engine prompt, or plain text.
+	"""
+	if '<item id="' in prompt:
+		blocks = [
+			f'<item id="{item_id}">\n<category>Document</category>\n<reason>mock batch reply</reason>\n</item>'
+			for item_id in _BATCH_ID_RE.findall(prompt)
+		]
+		return "\n".join(blocks)
+	if "<stem_reason>" in prompt:
+		return RENAME_KEEP_EXAMPLE_OUTPUT
+	if "<stem_action>" in prompt:
+		return KEEP_EXAMPLE_OUTPUT
+	if "<new_name>" in prompt:
+		return RENAME_EXAMPLE_OUTPUT
+	if "<category>" in prompt:
+		return SORT_EXAMPLE_OUTPUT
+	return DEFAULT_TEXT_REPLY
+
+
+@dataclass(slots=True)
+class MockOllamaConfig:
+	"""
+	Behaviour of a MockOllamaServer.
+
+	latency is drawn per request before the first byte; tokens_per_second paces
+	generation (None replies at once). failure_rate is the chance a request
+	fails with one of failure_modes, picked at random. reply maps the last
+	user prompt to the reply text and defaults to canned_reply().
+	"""
+
+	models: list[str] = field(default_factory=lambda: [DEFAULT_MODEL])
+	latency: LatencyFn = field(default_factory=lambda: fixed_latency(0.0))
+	tokens_per_second: float | None = None
+	load_seconds: float = 0.0
+	failure_rate: float = 0.0
+	failure_modes: tuple[str, ...] = FAILURE_MODES
+	# how long a "timeout" failure holds the connection before dropping it
+	hang_seconds: float = 30.0
+	reply: Callable[[str], str] = canned_reply
+	seed: int | None = None
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+	protocol_version = "HTTP/1.1"
+	server: _MockHTTPServer
+
+	def do_GET(self) -> None:
+		mock = self.server.mock
+		mock._count(self.path)
+		if self.path == "/api/tags":
+			models = [{"name": name, "model": name, "size": 0} for name in mock.config.models]
+			self._send_json(200, {"models": models})
+			return
+		if self.path == "/api/ps":
+			models = [{"name": name, "model": name} for name in sorted(mock.loaded)]
+			self._send_json(200, {"models": models})
+			return
+		self._send_json(404, {"error": f"unknown path {self.path}"})
+
+	def do_POST(self) -> None:
+		mock = self.server.mock
+		mock._count(self.path)
+		length = int(self.headers.get("Content-Length", "0"))
+		try:
+			payload = json.loads(self.rfile.read(length).decode("utf-8") or "{}")
+		except ValueError:
+			self._send_json(400, {"error": "invalid JSON"})
+			return
+		if self.path == "/api/chat":
+			messages = payload.get("messages") or []
+			prompt = ""
+			for message in reversed(messages):
+				if message.get("role") == "user":
+					prompt = str(message.get("content", ""))
+					break
+			# an empty message list is Ollama's way to only load the model
+			self._generate(payload, prompt, chat=True, load_only=not messages)
+			return
+		if self.path == "/api/generate":
+			prompt = str(payload.get("prompt", ""))
+			self._generate(payload, prompt, chat=False, load_only=not prompt)
+			return
+		self._send_json(404, {"error": f"unknown path {self.path}"})
+
+	#============================================
+	def _generate(self, payload: dict, prompt: str, *, chat: bool, load_only: bool) -> None:
+		mock = self.server.mock
+		model = _model_key(str(payload.get("model") or DEFAULT_MODEL))
+		if model not in {_model_key(name) for name in mock.config.models}:
+			self._send_json(404, {"error": f"model '{model}' not found"})
+			return
+		started = time.monotonic()
+		load_seconds = mock._load(model)
+		failure = mock._draw_failure()
+		if failure == FAIL_TIMEOUT:
+			mock._stop.wait(mock.config.hang_seconds)
+			# drop the connection without a response
+			self.close_connection = True
+			return
+		if failure == FAIL_ERROR_500:
+			self._send_json(500, {"error": "mock internal server error"})
+			return
+		if mock._stop.wait(max(0.0, mock._draw_latency())):
+			self.close_connection = True
+			return
+		text = "" if load_only or failure == FAIL_EMPTY else mock.config.reply(prompt)
+		tokens = _TOKEN_RE.findall(text)
+		counters = {
+			"prompt_eval_count": max(1, len(prompt) // 4) if prompt else 0,
+			"eval_count": len(tokens),
+			"load_duration": int(load_seconds * _NS_PER_SECOND),
+		}
+		if payload.get("stream", True):
+			self._stream(model, tokens, counters, started, chat=chat)
+			return
+		eval_started = time.monotonic()
+		self._pace(len(tokens))
+		body = self._message(model, text, chat=chat, done=True)
+		body.update(counters)
+		body.update(self._durations(started, eval_started))
+		self._send_json(200, body)
+
+	#============================================
+	def _stream(
+		self,
+		model: str,
+		tokens: list[str],
+		counters: dict[str, int],
+		started: float,
+		*,
+		chat: bool,
+	) -> None:
+		self.send_response(200)
+		self.send_header("Content-Type", "application/x-ndjson")
+		self.send_header("Transfer-Encoding", "chunked")
+		self.end_headers()
+		eval_started = time.monotonic()
+		try:
+			for token in tokens:
+				self._pace(1)
+				self._write_chunk(self._message(model, token, chat=chat, done=False))
+			final = self._message(model, "", chat=chat, done=True)
+			final.update(counters)
+			final.update(self._durations(started, eval_started))
+			self._write_chunk(final)
+			self.wfile.write(b"0\r\n\r\n")
+		except (BrokenPipeError, ConnectionResetError):
+			# the client stopped reading early
+			self.close_connection = True
+			self.server.mock._count("disconnects")
+
+	#============================================
+	def _pace(self, token_count: int) -> None:
+		rate = self.server.mock.config.tokens_per_second
+		if rate and token_count:
+			self.server.mock._stop.wait(token_count / rate)
+
+	#============================================
+	def _message(self, model: str, text: str, *, chat: bool, done: bool) -> dict:
+		message: dict[str, object] = {"model": model, "created_at": _now_iso(), "done": done}
+		if chat:
+			message["message"] = {"role": "assistant", "content": text}
+		else:
+			message["response"] = text
+		if done:
+			message["done_reason"] = "stop"
+		return message
+
+	#============================================
+	def _durations(self, started: float, eval_started: float) -> dict[str, int]:
+		now = time.monotonic()
+		durations = {
+			"total_duration": int((now - started) * _NS_PER_SECOND),
+			"prompt_eval_duration": int((eval_started - started) * _NS_PER_SECOND),
+			"eval_duration": int((now - eval_started) * _NS_PER_SECOND),
+		}
+		return durations
+
+	#============================================
+	def _write_chunk(self, item: dict) -> None:
+		data = (json.dumps(item) + "\n").encode("utf-8")
+		self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+		self.wfile.flush()
+
+	#============================================
+	def _send_json(self, status: int, item: dict) -> None:
+		body = json.dumps(item).encode("utf-8")
+		self.send_response(status)
+		self.send_header("Content-Type", "application/json")
+		self.send_header("Content-Length", str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def log_message(self, format: str, *args) -> None:
+		return None
+
+
+def _now_iso() -> str:
+	return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+class _MockHTTPServer(http.server.ThreadingHTTPServer):
+	daemon_threads = True
+	mock: MockOllamaServer
+
+
+class MockOllamaServer:
+	"""
+	Serve /api/chat, /api/generate, /api/tags, and /api/ps on a local port.
+
+	Use it as a context manager, or call start() and stop(); base_url is set
+	once started. fail_next() queues failures for the next requests ahead of
+	the random failure_rate.
+	"""
+
+	def __init__(
+		self,
+		config: MockOllamaConfig | None = None,
+		host: str = "127.0.0.1",
+		port: int = 0,
+	) -> None:
+		self.config = config if config is not None else MockOllamaConfig()
+		self.host = host
+		self.port = port
+		self.base_url = ""
+		self.loaded: set[str] = set()
+		self._rng = random.Random(self.config.seed)
+		self._lock = threading.Lock()
+		self._stop = threading.Event()
+		self._queued_failures: list[str] = []
+		self._counts: dict[str, int] = {}
+		self._httpd: _MockHTTPServer | None = None
+		self._thread: threading.Thread | None = None
+
+	#============================================
+	def start(self) -> str:
+		if self._httpd is not None:
+			return self.base_url
+		self._stop.clear()
+		httpd = _MockHTTPServer((self.host, self.port), _Handler)
+		httpd.mock = self
+		host, port = httpd.server_address[:2]
+		self.base_url = f"http://{host}:{port}"
+		self._httpd = httpd
+		self._thread = threading.Thread(
+			target=httpd.serve_forever,
+			kwargs={"poll_interval": 0.05},
+			name="mock-ollama",
+			daemon=True,
+		)
+		self._thread.start()
+		return self.base_url
+
+	#============================================
+	def stop(self) -> None:
+		if self._httpd is None:
+			return
+		# wakes handlers that are sleeping through latency or a hang
+		self._stop.set()
+		self._httpd.shutdown()
+		self._httpd.server_close()
+		if self._thread is not None:
+			self._thread.join()
+		self._httpd = None
+		self._thread = None
+
+	def __enter__(self) -> MockOllamaServer:
+		self.start()
+		return self
+
+	def __exit__(self, *exc_info) -> None:
+		self.stop()
+
+	#============================================
+	def fail_next(self, mode: str, count: int = 1) -> None:
+		if mode not in FAILURE_MODES:
+			raise ValueError(f"Unknown failure mode: {mode!r}")
+		with self._lock:
+			self._queued_failures.extend([mode] * count)
+
+	#============================================
+	def _draw_failure(self) -> str | None:
+		with self._lock:
+			if self._queued_failures:
+				mode = self._queued_failures.pop(0)
+			elif self.config.failure_modes and self._rng.random() < self.config.failure_rate:
+				mode = self._rng.choice(self.config.failure_modes)
+			else:
+				return None
+			self._counts[f"failure_{mode}"] = self._counts.get(f"failure_{mode}", 0) + 1
+		return mode
+
+	#============================================
+	def _draw_latency(self) -> float:
+		with self._lock:
+			latency = self.config.latency(self._rng)
+		return latency
+
+	#============================================
+	def _load(self, model: str) -> float:
+		# only the first request for a model pays the simulated load time
+		with self._lock:
+			if model in self.loaded:
+				return 0.0
+			self.loaded.add(model)
+		load_seconds = self.config.load_seconds
+		if load_seconds > 0:
+			self._stop.wait(load_seconds)
+		return load_seconds
+
+	#============================================
+	def _count(self, key: str) -> None:
+		with self._lock:
+			self._counts[key] = self._counts.get(key, 0) + 1
+
+	#============================================
+	def stats(self) -> dict[str, int]:
+		"""
+		Return request counts per path plus injected failures and disconnects.
+		"""
+		with self._lock:
+			result = dict(self._counts)
+		return result
+
+
+#============================================
+
+
+def parse_args() -> argparse.Namespace:
+	"""
+	Parse command-line arguments.
+	"""
+	parser = argparse.ArgumentParser(description="Run a fake Ollama server for offline testing.")
+	parser.add_argument("-p", "--port", dest="port", type=int, default=11435, help="Port to listen on.")
+	parser.add_argument(
+		"-m", "--model", dest="models", action="append", default=None,
+		help="Model name to advertise (repeatable).",
+	)
+	parser.add_argument(
+		"-l", "--latency", dest="latency", type=float, default=0.0,
+		help="Median seconds before the first byte (log-normal).",
+	)
+	parser.add_argument(
+		"-t", "--tokens-per-second", dest="tokens_per_second", type=float, default=None,
+		help="Generation speed; omit to reply at once.",
+	)
+	parser.add_argument(
+		"-f", "--failure-rate", dest="failure_rate", type=float, default=0.0,
+		help="Chance a request fails with a timeout, 500, or empty reply.",
+	)
+	args = parser.parse_args()
+	return args
+
+
+def main() -> None:
+	"""
+	Serve until interrupted.
+	"""
+	args = parse_args()
+	config = MockOllamaConfig(
+		models=args.models or [DEFAULT_MODEL],
+		latency=lognormal_latency(args.latency),
+		tokens_per_second=args.tokens_per_second,
+		failure_rate=args.failure_rate,
+	)
+	server = MockOllamaServer(config, port=args.port)
+	print(f"Mock Ollama listening on {server.start()}")
+	try:
+		while True:
+			time.sleep(3600)
+	except KeyboardInterrupt:
+		server.stop()
+
+
+if __name__ == "__main__":
+	main()
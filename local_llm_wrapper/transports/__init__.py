@@ -1,8 +1,42 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
-from .apple import AppleTransport
-from .base import LLMTransport
-from .ollama import OllamaTransport
+# Standard Library
+import importlib
 
-__all__ = ["AppleTransport", "LLMTransport", "OllamaTransport"]
+# submodules load on first attribute access, so importing transports.base
+# does not pull in http.client or the Apple backend
+_EXPORTS = {
+	"AppleSessionPool": ".apple_sessions",
+	"AppleTransport": ".apple",
+	"CallUsage": ".usage",
+	"HTTPConnectionPool": ".http_pool",
+	"LLMTransport": ".base",
+	"OllamaPoolTransport": ".ollama_pool",
+	"OllamaTransport": ".ollama",
+	"UsageTracker": ".usage",
+}
+
+__all__ = [
+	"AppleSessionPool",
+	"AppleTransport",
+	"CallUsage",
+	"HTTPConnectionPool",
+	"LLMTransport",
+	"OllamaPoolTransport",
+	"OllamaTransport",
+	"UsageTracker",
+]
+
+
+def __getattr__(name: str) -> object:
+	module_name = _EXPORTS.get(name)
+	if module_name is None:
+		raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+	value = getattr(importlib.import_module(module_name, __name__), name)
+	globals()[name] = value
+	return value
+
+
+def __dir__() -> list[str]:
+	return sorted(set(globals()) | set(__all__))
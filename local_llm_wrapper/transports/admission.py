@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Client-side admission control for transports.
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import time
+import random
+import asyncio
+import threading
+import contextlib
+import collections
+from collections.abc import AsyncIterator, Iterator
+
+# local repo modules
+from ..errors import DeadlineExceededError
+
+#============================================
+
+
+def _time_left(deadline: float | None) -> float | None:
+	if deadline is None:
+		return None
+	# a request admitted on the deadline still gets a moment to fail fast
+	left = max(0.001, deadline - time.monotonic())
+	return left
+
+
+def _resolve_waiter(future: asyncio.Future) -> None:
+	# runs on the waiter's loop; a waiter that already gave up is skipped
+	if not future.done():
+		future.set_result(None)
+
+
+class AdmissionController:
+	"""
+	Throttle requests with an optional token bucket, in-flight cap, and jitter.
+
+	With the defaults every request is admitted immediately. rate_per_second
+	and burst configure a token bucket; max_in_flight caps concurrent requests
+	across threads and event loops; jitter adds a random delay of up to that
+	many seconds before each request. admit() and admit_async() take the
+	seconds left before the request deadline; waits never run past it.
+	"""
+
+	def __init__(
+		self,
+		rate_per_second: float | None = None,
+		burst: int = 1,
+		max_in_flight: int | None = None,
+		jitter: float = 0.0,
+	) -> None:
+		if rate_per_second is not None and rate_per_second <= 0:
+			raise ValueError("rate_per_second must be positive.")
+		self.rate_per_second = rate_per_second
+		self.burst = max(1, int(burst))
+		self.max_in_flight = None if max_in_flight is None else max(1, int(max_in_flight))
+		self.jitter = max(0.0, float(jitter))
+		self._lock = threading.Lock()
+		self._tokens = float(self.burst)
+		self._updated = time.monotonic()
+		# in-flight slots are shared by threads and event loops: threads wait on
+		# the condition, async callers park a future that a release resolves
+		self._slot_lock = threading.Lock()
+		self._slot_freed = threading.Condition(self._slot_lock)
+		self._in_flight = 0
+		self._async_waiters: collections.deque[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = (
+			collections.deque()
+		)
+		self._admitted = 0
+		self._throttled = 0
+		self._wait_seconds = 0.0
+
+	#============================================
+	def _reserve_delay(self, timeout: float | None = None) -> float:
+		"""
+		Take one token and return how long the caller must wait for it.
+
+		Raises:
+			DeadlineExceededError: when the wait would outlast timeout; the
+			token is handed back.
+		"""
+		delay = 0.0
+		with self._lock:
+			if self.rate_per_second is not None:
+				now = time.monotonic()
+				elapsed = now - self._updated
+				self._updated = now
+				self._tokens = min(float(self.burst), self._tokens + elapsed * self.rate_per_second)
+				# tokens may go negative; the debt is paid back by waiting
+				self._tokens -= 1.0
+				if self._tokens < 0:
+					delay = -self._tokens / self.rate_per_second
+			if self.jitter:
+				delay += random.uniform(0.0, self.jitter)
+			if timeout is not None and delay >= timeout:
+				if self.rate_per_second is not None:
+					self._tokens += 1.0
+				raise DeadlineExceededError("Request deadline exceeded waiting for admission.")
+			self._admitted += 1
+			if delay > 0:
+				self._throttled += 1
+				self._wait_seconds += delay
+		return delay
+
+	#============================================
+	@contextlib.contextmanager
+	def admit(self, timeout: float | None = None) -> Iterator[float | None]:
+		"""
+		Block until the request may run and hold an in-flight slot meanwhile.
+
+		Yields the seconds of timeout still left for the request itself, or
+		None without a timeout.
+
+		Raises:
+			DeadlineExceededError: when timeout runs out before admission.
+		"""
+		deadline = None if timeout is None else time.monotonic() + timeout
+		delay = self._reserve_delay(timeout)
+		if delay > 0:
+			time.sleep(delay)
+		if self.max_in_flight is not None and not self._take_slot():
+			started = time.monotonic()
+			acquired = self._wait_for_slot(deadline)
+			self._record_slot_wait(time.monotonic() - started)
+			if not acquired:
+				raise DeadlineExceededError("Request deadline exceeded waiting for a slot.")
+		try:
+			yield _time_left(deadline)
+		finally:
+			if self.max_in_flight is not None:
+				self._release_slot()
+
+	#============================================
+	@contextlib.asynccontextmanager
+	async def admit_async(self, timeout: float | None = None) -> AsyncIterator[float | None]:
+		"""
+		Async form of admit() that never blocks the event loop.
+		"""
+		deadline = None if timeout is None else time.monotonic() + timeout
+		delay = self._reserve_delay(timeout)
+		if delay > 0:
+			await asyncio.sleep(delay)
+		if self.max_in_flight is not None and not self._take_slot():
+			started = time.monotonic()
+			acquired = await self._await_slot(deadline)
+			self._record_slot_wait(time.monotonic() - started)
+			if not acquired:
+				raise DeadlineExceededError("Request deadline exceeded waiting for a slot.")
+		try:
+			yield _time_left(deadline)
+		finally:
+			if self.max_in_flight is not None:
+				self._release_slot()
+
+	#============================================
+	def _take_slot(self) -> bool:
+		with self._slot_lock:
+			if self._in_flight >= self.max_in_flight:
+				return False
+			self._in_flight += 1
+		return True
+
+	#============================================
+	def _wait_for_slot(self, deadline: float | None) -> bool:
+		with self._slot_lock:
+			while self._in_flight >= self.max_in_flight:
+				wait = None if deadline is None else deadline - time.monotonic()
+				if wait is not None and wait <= 0:
+					return False
+				self._slot_freed.wait(wait)
+			self._in_flight += 1
+		return True
+
+	#============================================
+	async def _await_slot(self, deadline: float | None) -> bool:
+		"""
+		Park until a release hands this task a wakeup, without polling.
+		"""
+		loop = asyncio.get_running_loop()
+		while True:
+			with self._slot_lock:
+				if self._in_flight < self.max_in_flight:
+					self._in_flight += 1
+					return True
+				entry = (loop, loop.create_future())
+				self._async_waiters.append(entry)
+			wait = None if deadline is None else deadline - time.monotonic()
+			try:
+				if wait is not None and wait <= 0:
+					raise asyncio.TimeoutError
+				await asyncio.wait_for(entry[1], wait)
+			except asyncio.TimeoutError:
+				self._forget_waiter(entry)
+				return self._take_slot()
+			except BaseException:
+				self._forget_waiter(entry)
+				raise
+
+	#============================================
+	def _forget_waiter(self, entry: tuple[asyncio.AbstractEventLoop, asyncio.Future]) -> None:
+		with self._slot_lock:
+			if entry in self._async_waiters:
+				self._async_waiters.remove(entry)
+				return
+			# a release already picked this waiter; pass its wakeup on
+			if self._in_flight < self.max_in_flight:
+				self._wake_one()
+
+	#============================================
+	def _release_slot(self) -> None:
+		with self._slot_lock:
+			self._in_flight -= 1
+			self._wake_one()
+
+	#============================================
+	def _wake_one(self) -> None:
+		# caller holds _slot_lock; a woken waiter that loses the race waits again
+		self._slot_freed.notify()
+		while self._async_waiters:
+			loop, future = self._async_waiters.popleft()
+			# a waiter whose loop has closed can never take the slot
+			if not loop.is_closed():
+				loop.call_soon_threadsafe(_resolve_waiter, future)
+				return
+
+	#============================================
+	def _record_slot_wait(self, waited: float) -> None:
+		with self._lock:
+			self._throttled += 1
+			self._wait_seconds += waited
+
+	#============================================
+	def stats(self) -> dict[str, float]:
+		"""
+		Return admitted/throttled counts and total seconds spent waiting.
+		"""
+		with self._lock:
+			result = {
+				"admitted": self._admitted,
+				"throttled": self._throttled,
+				"wait_seconds": round(self._wait_seconds, 6),
+			}
+		return result
@@ -6,12 +6,12 @@ Apple Foundation Models transport.
 from __future__ import annotations
 
 # Standard Library
-import platform
 import time
 
 # local repo modules
 from ..errors import GuardrailRefusalError, TransportUnavailableError
-from ..llm_utils import MIN_MACOS_MAJOR, _parse_macos_version
+from ..llm_utils import apple_unavailable_reason
+from .apple_sessions import AppleSessionPool
 
 
 class AppleTransport:
@@ -22,38 +22,36 @@ class AppleTransport:
 		instructions: str | None = None,
 		max_retries: int = 2,
 		temperature: float = 0.2,
+		session_pool: AppleSessionPool | None = None,
+		availability_ttl: float | None = None,
 	) -> None:
 		self.instructions = instructions
 		self.max_retries = max(1, int(max_retries))
 		self.temperature = float(temperature)
+		# sessions are reused per instruction string instead of opened per call
+		self.session_pool = session_pool if session_pool is not None else AppleSessionPool()
+		# None uses llm_utils.APPLE_AVAILABILITY_TTL; the probe result is shared process-wide
+		self.availability_ttl = availability_ttl
+
+	def cache_identity(self) -> object:
+		# None stands for the fixed default instructions used by generate()
+		identity = {"instructions": self.instructions}
+		return identity
 
 	def _require_apple_intelligence(self) -> None:
-		try:
-			from applefoundationmodels import Session, apple_intelligence_available
-		except Exception as exc:
-			raise TransportUnavailableError(
-				"apple-foundation-models is required for the Apple backend."
-			) from exc
-		arch = platform.machine().lower()
-		if arch != "arm64":
-			raise TransportUnavailableError(
-				"Apple Intelligence requires Apple Silicon (arm64)."
-			)
-		major, minor, patch = _parse_macos_version()
-		if major < MIN_MACOS_MAJOR:
-			raise TransportUnavailableError(
-				f"macOS {MIN_MACOS_MAJOR}.0+ is required (detected {major}.{minor}.{patch})."
-			)
-		if not apple_intelligence_available():
-			try:
-				reason = Session.get_availability_reason()
-			except Exception:
-				reason = "Apple Intelligence not available or not enabled."
-			raise TransportUnavailableError(str(reason))
+		reason = apple_unavailable_reason(self.availability_ttl)
+		if reason is not None:
+			raise TransportUnavailableError(reason)
 
-	def generate(self, prompt: str, *, purpose: str, max_tokens: int) -> str:
+	def generate(
+		self,
+		prompt: str,
+		*,
+		purpose: str,
+		max_tokens: int,
+		conversation: str | None = None,
+	) -> str:
 		self._require_apple_intelligence()
-		from applefoundationmodels import Session
 		from applefoundationmodels.exceptions import GuardrailViolationError
 
 		default_instructions = (
@@ -64,7 +62,8 @@ class AppleTransport:
 		last_error: Exception | None = None
 		for attempt in range(1, self.max_retries + 1):
 			try:
-				with Session(instructions=session_instructions) as session:
+				# a conversation key keeps its session and history across calls
+				with self.session_pool.acquire(session_instructions, conversation) as session:
 					response = session.generate(
 						prompt,
 						max_tokens=max_tokens,
@@ -82,3 +81,6 @@ class AppleTransport:
 		if last_error:
 			raise RuntimeError("Apple LLM call failed.") from last_error
 		raise RuntimeError("Apple LLM call failed.")
+
+	def session_stats(self) -> dict[str, int]:
+		return self.session_pool.stats()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Reusable Apple Foundation Models sessions keyed on their instructions.
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import time
+import threading
+import functools
+import contextlib
+from collections.abc import Callable, Iterator
+
+#============================================
+
+
+DEFAULT_MAX_IDLE = 4
+DEFAULT_IDLE_TIMEOUT = 300.0
+
+
+def _new_session(instructions: str) -> object:
+	from applefoundationmodels import Session
+
+	# Session is a context manager; it is entered here and exited on close
+	session = Session(instructions=instructions)
+	session.__enter__()
+	return session
+
+
+def _close_session(session: object) -> None:
+	exit_session = getattr(session, "__exit__", None)
+	if callable(exit_session):
+		close = functools.partial(exit_session, None, None, None)
+	else:
+		close = getattr(session, "close", None)
+	if not callable(close):
+		return
+	try:
+		close()
+	except Exception:
+		return
+
+
+class AppleSessionPool:
+	"""
+	Keep idle Apple sessions per instruction string for reuse.
+
+	Without a conversation key, acquire() hands out a session with an empty
+	conversation: the history is cleared before a session goes back to the
+	pool. With a conversation key, the session keeps its history and is only
+	handed back to the same conversation. A session whose call raised is
+	closed. When the SDK cannot clear history, keyless sessions are closed
+	after one call and counted as not_reusable in stats(). At most max_idle
+	sessions are kept across all keys, and sessions idle for longer than
+	idle_timeout seconds are closed.
+	"""
+
+	def __init__(
+		self,
+		max_idle: int = DEFAULT_MAX_IDLE,
+		idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+		factory: Callable[[str], object] | None = None,
+	) -> None:
+		self.max_idle = max(0, int(max_idle))
+		self.idle_timeout = float(idle_timeout)
+		self._factory = factory if factory is not None else _new_session
+		self._lock = threading.Lock()
+		# (instructions, conversation) -> idle (session, released_at) pairs, oldest first
+		self._idle: dict[tuple[str, str | None], list[tuple[object, float]]] = {}
+		self._created = 0
+		self._reused = 0
+		self._evicted = 0
+		self._discarded = 0
+		self._not_reusable = 0
+
+	#============================================
+	def _evict_expired(self, now: float) -> list[object]:
+		expired: list[object] = []
+		for key in list(self._idle):
+			fresh = []
+			for session, released in self._idle[key]:
+				if now - released >= self.idle_timeout:
+					expired.append(session)
+				else:
+					fresh.append((session, released))
+			if fresh:
+				self._idle[key] = fresh
+			else:
+				del self._idle[key]
+		self._evicted += len(expired)
+		return expired
+
+	#============================================
+	def _evict_oldest(self) -> list[object]:
+		evicted: list[object] = []
+		while sum(len(entries) for entries in self._idle.values()) > self.max_idle:
+			oldest = min(self._idle, key=lambda key: self._idle[key][0][1])
+			session, _released = self._idle[oldest].pop(0)
+			if not self._idle[oldest]:
+				del self._idle[oldest]
+			evicted.append(session)
+		self._evicted += len(evicted)
+		return evicted
+
+	#============================================
+	def _take(self, key: tuple[str, str | None]) -> object | None:
+		now = time.monotonic()
+		with self._lock:
+			expired = self._evict_expired(now)
+			entries = self._idle.get(key)
+			session = None
+			if entries:
+				# most recently released first; it is the least likely to be stale
+				session, _released = entries.pop()
+				if not entries:
+					del self._idle[key]
+				self._reused += 1
+		for stale in expired:
+			_close_session(stale)
+		return session
+
+	#============================================
+	def _give_back(self, key: tuple[str, str | None], session: object) -> None:
+		_instructions, conversation = key
+		clear_history = getattr(session, "clear_history", None)
+		if conversation is None and not callable(clear_history):
+			# the next keyless caller would inherit this history, so close it
+			with self._lock:
+				self._not_reusable += 1
+			_close_session(session)
+			return
+		if conversation is None:
+			try:
+				clear_history()
+			except Exception:
+				self._discard(session)
+				return
+		with self._lock:
+			self._idle.setdefault(key, []).append((session, time.monotonic()))
+			evicted = self._evict_oldest()
+		for old in evicted:
+			_close_session(old)
+
+	#============================================
+	def _discard(self, session: object) -> None:
+		with self._lock:
+			self._discarded += 1
+		_close_session(session)
+
+	#============================================
+	@contextlib.contextmanager
+	def acquire(self, instructions: str, conversation: str | None = None) -> Iterator[object]:
+		"""
+		Yield a session for instructions.
+
+		Without conversation the session has no prior history; with it the
+		session continues that conversation's earlier calls.
+		"""
+		key = (instructions, conversation)
+		session = self._take(key)
+		if session is None:
+			session = self._factory(instructions)
+			with self._lock:
+				self._created += 1
+		try:
+			yield session
+		except BaseException:
+			# a failed call may leave the session in an unknown state
+			self._discard(session)
+			raise
+		self._give_back(key, session)
+
+	#============================================
+	def close(self) -> None:
+		with self._lock:
+			sessions = [session for entries in self._idle.values() for session, _released in entries]
+			self._idle.clear()
+		for session in sessions:
+			_close_session(session)
+
+	#============================================
+	def stats(self) -> dict[str, int]:
+		"""
+		Return created, reused, evicted, discarded, not_reusable, and idle counts.
+
+		not_reusable counts keyless sessions closed because the SDK could not
+		clear their history; when it grows with created, nothing is reused.
+		"""
+		with self._lock:
+			result = {
+				"created": self._created,
+				"reused": self._reused,
+				"evicted": self._evicted,
+				"discarded": self._discarded,
+				"not_reusable": self._not_reusable,
+				"idle": sum(len(entries) for entries in self._idle.values()),
+			}
+		return result
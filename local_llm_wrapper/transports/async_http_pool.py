@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Asyncio keep-alive HTTP/1.1 connection pool for transports.
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import asyncio
+import urllib.parse
+
+# local repo modules
+from .http_pool import DEFAULT_TIMEOUT
+
+#============================================
+
+
+DEFAULT_ASYNC_POOL_SIZE = 32
+# errors that mean a reused keep-alive socket was closed by the server
+_STALE_CONNECTION_ERRORS = (
+	asyncio.IncompleteReadError,
+	BrokenPipeError,
+	ConnectionResetError,
+)
+
+
+class _AsyncConnection:
+	def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+		self.reader = reader
+		self.writer = writer
+
+	def close(self) -> None:
+		self.writer.close()
+
+
+class AsyncHTTPConnectionPool:
+	"""
+	Reuse persistent HTTP/1.1 connections to a single base URL from asyncio code.
+
+	Connections belong to the event loop that opened them; idle connections
+	from a previous loop (for example an earlier asyncio.run) are dropped.
+	"""
+
+	def __init__(
+		self,
+		base_url: str,
+		max_size: int = DEFAULT_ASYNC_POOL_SIZE,
+		timeout: float = DEFAULT_TIMEOUT,
+	) -> None:
+		parsed = urllib.parse.urlsplit(base_url)
+		if parsed.scheme not in ("http", "https"):
+			raise ValueError(f"Unsupported URL scheme: {parsed.scheme!r}")
+		if not parsed.hostname:
+			raise ValueError(f"Missing host in URL: {base_url!r}")
+		self.base_url = base_url.rstrip("/")
+		self.scheme = parsed.scheme
+		self.host = parsed.hostname
+		self.port = parsed.port or (443 if parsed.scheme == "https" else 80)
+		self.path_prefix = parsed.path.rstrip("/")
+		self.max_size = max(1, int(max_size))
+		self.timeout = float(timeout)
+		self._idle: list[_AsyncConnection] = []
+		self._loop: asyncio.AbstractEventLoop | None = None
+		self._hits = 0
+		self._misses = 0
+		self._discarded = 0
+
+	#============================================
+	async def _acquire(self) -> tuple[_AsyncConnection, bool]:
+		loop = asyncio.get_running_loop()
+		if self._loop is not loop:
+			# streams cannot move between event loops
+			self._idle = []
+			self._loop = loop
+		if self._idle:
+			self._hits += 1
+			conn = self._idle.pop()
+			return conn, True
+		self._misses += 1
+		conn = await self._open()
+		return conn, False
+
+	#============================================
+	async def _open(self) -> _AsyncConnection:
+		use_ssl = self.scheme == "https"
+		reader, writer = await asyncio.open_connection(self.host, self.port, ssl=use_ssl)
+		conn = _AsyncConnection(reader, writer)
+		return conn
+
+	#============================================
+	def _release(self, conn: _AsyncConnection) -> None:
+		if len(self._idle) < self.max_size:
+			self._idle.append(conn)
+			return
+		self._discard(conn)
+
+	#============================================
+	def _discard(self, conn: _AsyncConnection) -> None:
+		self._discarded += 1
+		conn.close()
+
+	#============================================
+	async def request(
+		self,
+		method: str,
+		path: str,
+		body: bytes | None = None,
+		headers: dict[str, str] | None = None,
+		timeout: float | None = None,
+	) -> tuple[int, bytes]:
+		"""
+		Send a request and read the full response body.
+
+		A reused connection that the server already closed is retried once
+		on a fresh connection.
+
+		Returns:
+			tuple: (status, body bytes).
+		"""
+		call_timeout = self.timeout if timeout is None else float(timeout)
+		async with asyncio.timeout(call_timeout):
+			conn, reused = await self._acquire()
+			try:
+				status, response_body, keep_alive = await self._exchange(
+					conn, method, path, body, headers
+				)
+			except _STALE_CONNECTION_ERRORS:
+				self._discard(conn)
+				if not reused:
+					raise
+				conn = await self._open()
+				try:
+					status, response_body, keep_alive = await self._exchange(
+						conn, method, path, body, headers
+					)
+				except BaseException:
+					self._discard(conn)
+					raise
+			except BaseException:
+				self._discard(conn)
+				raise
+		if keep_alive:
+			self._release(conn)
+		else:
+			self._discard(conn)
+		return status, response_body
+
+	#============================================
+	async def _exchange(
+		self,
+		conn: _AsyncConnection,
+		method: str,
+		path: str,
+		body: bytes | None,
+		headers: dict[str, str] | None,
+	) -> tuple[int, bytes, bool]:
+		payload = body or b""
+		lines = [f"{method} {self.path_prefix}{path} HTTP/1.1", f"Host: {self.host}:{self.port}"]
+		send_headers = dict(headers or {})
+		send_headers.setdefault("Connection", "keep-alive")
+		send_headers["Content-Length"] = str(len(payload))
+		for key, value in send_headers.items():
+			lines.append(f"{key}: {value}")
+		head = "\r\n".join(lines) + "\r\n\r\n"
+		conn.writer.write(head.encode("latin-1") + payload)
+		await conn.writer.drain()
+		status, response_headers = await self._read_head(conn.reader)
+		response_body = await self._read_body(conn.reader, response_headers)
+		keep_alive = response_headers.get("connection", "").lower() != "close"
+		return status, response_body, keep_alive
+
+	#============================================
+	async def _read_head(self, reader: asyncio.StreamReader) -> tuple[int, dict[str, str]]:
+		status_line = await reader.readuntil(b"\r\n")
+		parts = status_line.decode("latin-1").split(" ", 2)
+		if len(parts) < 2 or not parts[1].isdigit():
+			raise ConnectionResetError(f"Malformed HTTP status line: {status_line!r}")
+		status = int(parts[1])
+		response_headers: dict[str, str] = {}
+		while True:
+			line = await reader.readuntil(b"\r\n")
+			if line == b"\r\n":
+				break
+			key, _sep, value = line.decode("latin-1").partition(":")
+			response_headers[key.strip().lower()] = value.strip()
+		return status, response_headers
+
+	#============================================
+	async def _read_body(self, reader: asyncio.StreamReader, response_headers: dict[str, str]) -> bytes:
+		if response_headers.get("transfer-encoding", "").lower() == "chunked":
+			parts: list[bytes] = []
+			while True:
+				size_line = await reader.readuntil(b"\r\n")
+				size = int(size_line.split(b";", 1)[0].strip(), 16)
+				if size == 0:
+					# skip optional trailers up to the blank line
+					while await reader.readuntil(b"\r\n") != b"\r\n":
+						pass
+					break
+				parts.append(await reader.readexactly(size))
+				await reader.readexactly(2)
+			response_body = b"".join(parts)
+			return response_body
+		if "content-length" in response_headers:
+			length = int(response_headers["content-length"])
+			response_body = await reader.readexactly(length)
+			return response_body
+		response_headers["connection"] = "close"
+		response_body = await reader.read()
+		return response_body
+
+	#============================================
+	def stats(self) -> dict[str, int]:
+		"""
+		Return pool hit/miss counters and the current idle count.
+		"""
+		result = {
+			"hits": self._hits,
+			"misses": self._misses,
+			"discarded": self._discarded,
+			"idle": len(self._idle),
+			"max_size": self.max_size,
+		}
+		return result
+
+	#============================================
+	def close(self) -> None:
+		"""
+		Close all idle connections.
+		"""
+		idle = self._idle
+		self._idle = []
+		# sockets from a finished event loop were already torn down with it
+		if self._loop is None or self._loop.is_closed():
+			return
+		for conn in idle:
+			conn.close()
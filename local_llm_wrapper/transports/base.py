@@ -17,3 +17,11 @@ class LLMTransport(Protocol):
 		"""
 
 	# Optional: transports may implement generate_chat(messages, purpose, max_tokens)
+	# Optional: transports may implement generate_stream(prompt, purpose, max_tokens)
+	# and generate_chat_stream(messages, purpose, max_tokens), yielding text chunks
+	# Optional: transports may implement async agenerate(prompt, purpose, max_tokens)
+	# and agenerate_chat(messages, purpose, max_tokens) for AsyncLLMEngine
+	# Optional: transports that set accepts_timeout = True take a timeout=seconds keyword
+	# on every generate method; both engines pass the time left before a request deadline
+	# Optional: transports may implement cache_identity() returning a JSON value for
+	# settings that change replies (system prompt, instructions); it is part of cache keys
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Thread-safe keep-alive HTTP connection pool for transports.
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import http.client
+import threading
+import urllib.parse
+from collections.abc import Iterator
+
+#============================================
+
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_TIMEOUT = 30.0
+# errors that mean a reused keep-alive socket was closed by the server
+_STALE_CONNECTION_ERRORS = (
+	http.client.RemoteDisconnected,
+	http.client.CannotSendRequest,
+	BrokenPipeError,
+	ConnectionResetError,
+)
+
+_POOLS: dict[str, "HTTPConnectionPool"] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+class HTTPConnectionPool:
+	"""
+	Reuse persistent HTTP/1.1 connections to a single base URL.
+
+	Idle connections are kept on a stack (most recent first) up to max_size;
+	extra connections are closed when released. Safe to share across threads.
+	"""
+
+	def __init__(
+		self,
+		base_url: str,
+		max_size: int = DEFAULT_POOL_SIZE,
+		timeout: float = DEFAULT_TIMEOUT,
+	) -> None:
+		parsed = urllib.parse.urlsplit(base_url)
+		if parsed.scheme not in ("http", "https"):
+			raise ValueError(f"Unsupported URL scheme: {parsed.scheme!r}")
+		if not parsed.hostname:
+			raise ValueError(f"Missing host in URL: {base_url!r}")
+		self.base_url = base_url.rstrip("/")
+		self.scheme = parsed.scheme
+		self.host = parsed.hostname
+		self.port = parsed.port
+		self.path_prefix = parsed.path.rstrip("/")
+		self.max_size = max(1, int(max_size))
+		self.timeout = float(timeout)
+		self._idle: list[http.client.HTTPConnection] = []
+		self._lock = threading.Lock()
+		self._hits = 0
+		self._misses = 0
+		self._discarded = 0
+
+	#============================================
+	def _new_connection(self, timeout: float) -> http.client.HTTPConnection:
+		if self.scheme == "https":
+			return http.client.HTTPSConnection(self.host, self.port, timeout=timeout)
+		return http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+
+	#============================================
+	def acquire(self, timeout: float | None = None) -> tuple[http.client.HTTPConnection, bool]:
+		"""
+		Take an idle connection or open a new one.
+
+		Returns:
+			tuple: (connection, reused) where reused is True on a pool hit.
+		"""
+		call_timeout = self.timeout if timeout is None else float(timeout)
+		with self._lock:
+			if self._idle:
+				conn = self._idle.pop()
+				self._hits += 1
+				reused = True
+			else:
+				conn = None
+				self._misses += 1
+				reused = False
+		if conn is None:
+			conn = self._new_connection(call_timeout)
+		else:
+			# per-call timeout applies to the live socket as well
+			conn.timeout = call_timeout
+			if conn.sock is not None:
+				conn.sock.settimeout(call_timeout)
+		return conn, reused
+
+	#============================================
+	def release(self, conn: http.client.HTTPConnection) -> None:
+		"""
+		Return a healthy connection to the pool, closing it if the pool is full.
+		"""
+		with self._lock:
+			if len(self._idle) < self.max_size:
+				self._idle.append(conn)
+				return
+			self._discarded += 1
+		conn.close()
+
+	#============================================
+	def discard(self, conn: http.client.HTTPConnection) -> None:
+		"""
+		Close a connection that must not be reused.
+		"""
+		with self._lock:
+			self._discarded += 1
+		conn.close()
+
+	#============================================
+	def _send(
+		self,
+		method: str,
+		path: str,
+		body: bytes | None,
+		headers: dict[str, str] | None,
+		timeout: float | None,
+	) -> tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+		"""
+		Send a request and return the connection with its pending response.
+
+		A reused connection that the server already closed is retried once
+		on a fresh connection.
+		"""
+		full_path = self.path_prefix + path
+		send_headers = dict(headers or {})
+		send_headers.setdefault("Connection", "keep-alive")
+		conn, reused = self.acquire(timeout)
+		try:
+			conn.request(method, full_path, body=body, headers=send_headers)
+			response = conn.getresponse()
+		except _STALE_CONNECTION_ERRORS:
+			self.discard(conn)
+			if not reused:
+				raise
+			conn = self._new_connection(self.timeout if timeout is None else float(timeout))
+			try:
+				conn.request(method, full_path, body=body, headers=send_headers)
+				response = conn.getresponse()
+			except BaseException:
+				self.discard(conn)
+				raise
+		except BaseException:
+			self.discard(conn)
+			raise
+		return conn, response
+
+	#============================================
+	def _finish(self, conn: http.client.HTTPConnection, response: http.client.HTTPResponse) -> None:
+		if response.will_close:
+			self.discard(conn)
+		else:
+			self.release(conn)
+
+	#============================================
+	def request(
+		self,
+		method: str,
+		path: str,
+		body: bytes | None = None,
+		headers: dict[str, str] | None = None,
+		timeout: float | None = None,
+	) -> tuple[int, bytes]:
+		"""
+		Send a request and read the full response body.
+
+		Returns:
+			tuple: (status, body bytes).
+		"""
+		conn, response = self._send(method, path, body, headers, timeout)
+		try:
+			response_body = response.read()
+		except BaseException:
+			self.discard(conn)
+			raise
+		status = response.status
+		self._finish(conn, response)
+		return status, response_body
+
+	#============================================
+	def open_stream(
+		self,
+		method: str,
+		path: str,
+		body: bytes | None = None,
+		headers: dict[str, str] | None = None,
+		timeout: float | None = None,
+	) -> tuple[int, Iterator[bytes]]:
+		"""
+		Send a request and return a lazy iterator over response lines.
+
+		Connection errors raise here, before any line is read. The connection
+		goes back to the pool only when the iterator is fully consumed; closing
+		the iterator early closes the socket so the server stops generating.
+		Error replies (status >= 400) are read in full right away and the
+		connection is settled, so callers that never iterate do not leak it.
+
+		Returns:
+			tuple: (status, iterator of raw line bytes).
+		"""
+		conn, response = self._send(method, path, body, headers, timeout)
+		if response.status >= 400:
+			try:
+				error_body = response.read()
+			except BaseException:
+				self.discard(conn)
+				raise
+			self._finish(conn, response)
+			lines = _iter_buffered_lines(error_body)
+			return response.status, lines
+		lines = self._iter_lines(conn, response)
+		return response.status, lines
+
+	#============================================
+	def _iter_lines(
+		self,
+		conn: http.client.HTTPConnection,
+		response: http.client.HTTPResponse,
+	) -> Iterator[bytes]:
+		completed = False
+		try:
+			while True:
+				line = response.readline()
+				if not line:
+					break
+				yield line
+			completed = True
+		finally:
+			if completed:
+				self._finish(conn, response)
+			else:
+				self.discard(conn)
+
+	#============================================
+	def stats(self) -> dict[str, int]:
+		"""
+		Return pool hit/miss counters and the current idle count.
+		"""
+		with self._lock:
+			result = {
+				"hits": self._hits,
+				"misses": self._misses,
+				"discarded": self._discarded,
+				"idle": len(self._idle),
+				"max_size": self.max_size,
+			}
+		return result
+
+	#============================================
+	def close(self) -> None:
+		"""
+		Close all idle connections.
+		"""
+		with self._lock:
+			idle = self._idle
+			self._idle = []
+		for conn in idle:
+			conn.close()
+
+
+#============================================
+
+
+def _iter_buffered_lines(body: bytes) -> Iterator[bytes]:
+	yield from body.splitlines(keepends=True)
+
+
+#============================================
+
+
+def get_pool(
+	base_url: str,
+	max_size: int = DEFAULT_POOL_SIZE,
+	timeout: float = DEFAULT_TIMEOUT,
+) -> HTTPConnectionPool:
+	"""
+	Return the process-wide pool for base_url, creating it on first use.
+	"""
+	key = base_url.rstrip("/")
+	with _POOLS_LOCK:
+		pool = _POOLS.get(key)
+		if pool is None:
+			pool = HTTPConnectionPool(key, max_size=max_size, timeout=timeout)
+			_POOLS[key] = pool
+	return pool
@@ -7,17 +7,33 @@ from __future__ import annotations
 
 # Standard Library
 import json
-import random
 import time
-import urllib.error
-import urllib.request
+import threading
+import http.client
+from collections.abc import Iterator
 
 # local repo modules
 from ..errors import TransportUnavailableError
+from .http_pool import HTTPConnectionPool, get_pool
+from .async_http_pool import AsyncHTTPConnectionPool
+from .admission import AdmissionController
+from .usage import UsageTracker, usage_from_ollama
+
+# socket failures, malformed or cut-off HTTP replies (EOFError covers
+# asyncio.IncompleteReadError); all mean this Ollama cannot answer right now
+_UNREACHABLE_ERRORS = (OSError, EOFError, http.client.HTTPException)
+
+
+def _check_status(status: int, what: str) -> None:
+	# any HTTP error (model not pulled, server error) lets the engine fall back
+	if status >= 400:
+		raise TransportUnavailableError(f"Ollama {what} error: status {status}")
 
 
 class OllamaTransport:
 	name = "Ollama"
+	# generate methods take an optional per-call timeout in seconds
+	accepts_timeout = True
 
 	def __init__(
 		self,
@@ -26,14 +42,37 @@ class OllamaTransport:
 		system_message: str = "",
 		use_history: bool = False,
 		max_turns: int = 6,
+		pool: HTTPConnectionPool | None = None,
+		async_pool: AsyncHTTPConnectionPool | None = None,
+		admission: AdmissionController | None = None,
+		keep_alive: str | int | None = None,
+		usage: UsageTracker | None = None,
 	) -> None:
 		self.model = model
 		self.base_url = base_url.rstrip("/")
+		# connections are shared per base_url unless a pool is passed in
+		self.pool = pool if pool is not None else get_pool(self.base_url)
+		if async_pool is None:
+			async_pool = AsyncHTTPConnectionPool(self.base_url)
+		self.async_pool = async_pool
+		# the default controller admits every request without delay
+		self.admission = admission if admission is not None else AdmissionController()
+		# how long Ollama keeps the model loaded after a request ("10m", seconds, -1 forever)
+		self.keep_alive = keep_alive
+		# token counts and durations from each reply, aggregated by purpose
+		self.usage = usage if usage is not None else UsageTracker()
+		self._heartbeat_stop: threading.Event | None = None
+		self._heartbeat_thread: threading.Thread | None = None
 		self.system_message = system_message
 		self.use_history = bool(use_history)
 		self.max_turns = int(max_turns)
 		self.messages: list[dict[str, str]] = []
 
+	def cache_identity(self) -> object:
+		# the system message is sent with every request, so replies depend on it
+		identity = {"system_message": self.system_message}
+		return identity
+
 	def _build_messages(self, prompt: str) -> list[dict[str, str]]:
 		messages: list[dict[str, str]] = []
 		if self.system_message:
@@ -80,64 +119,279 @@ class OllamaTransport:
 		self.messages.append({"role": "assistant", "content": assistant_message})
 		self._trim_history()
 
-	def generate(self, prompt: str, *, purpose: str, max_tokens: int) -> str:
-		messages = self._build_messages(prompt)
+	def _chat_payload(
+		self,
+		messages: list[dict[str, str]],
+		*,
+		stream: bool,
+		max_tokens: int,
+	) -> dict[str, object]:
 		payload: dict[str, object] = {
 			"model": self.model,
 			"messages": messages,
-			"stream": False,
+			"stream": stream,
 			"options": {"num_predict": max_tokens},
 		}
-		time.sleep(random.random())
-		request = urllib.request.Request(
-			f"{self.base_url}/api/chat",
-			data=json.dumps(payload).encode("utf-8"),
-			headers={"Content-Type": "application/json"},
-			method="POST",
-		)
+		if self.keep_alive is not None:
+			payload["keep_alive"] = self.keep_alive
+		return payload
+
+	def _post_chat(self, payload: dict[str, object], timeout: float | None = None) -> dict:
+		try:
+			# admission waits count against the timeout; the request gets the rest
+			with self.admission.admit(timeout) as remaining:
+				status, response_body = self.pool.request(
+					"POST",
+					"/api/chat",
+					body=json.dumps(payload).encode("utf-8"),
+					headers={"Content-Type": "application/json"},
+					timeout=remaining,
+				)
+		except _UNREACHABLE_ERRORS as exc:
+			raise TransportUnavailableError("Ollama is unreachable.") from exc
+		_check_status(status, "chat")
+		parsed = json.loads(response_body.decode("utf-8"))
+		return parsed
+
+	async def _apost_chat(self, payload: dict[str, object], timeout: float | None = None) -> dict:
 		try:
-			with urllib.request.urlopen(request, timeout=30) as response:
-				if response.status >= 400:
-					raise RuntimeError(f"Ollama chat error: status {response.status}")
-				response_body = response.read()
-		except urllib.error.URLError as exc:
+			async with self.admission.admit_async(timeout) as remaining:
+				status, response_body = await self.async_pool.request(
+					"POST",
+					"/api/chat",
+					body=json.dumps(payload).encode("utf-8"),
+					headers={"Content-Type": "application/json"},
+					timeout=remaining,
+				)
+		except _UNREACHABLE_ERRORS as exc:
 			raise TransportUnavailableError("Ollama is unreachable.") from exc
+		_check_status(status, "chat")
 		parsed = json.loads(response_body.decode("utf-8"))
+		return parsed
+
+	def _stream_chat(
+		self,
+		payload: dict[str, object],
+		purpose: str,
+		timeout: float | None = None,
+	) -> Iterator[str]:
+		# the in-flight slot is held until the stream is drained or closed
+		with self.admission.admit(timeout) as remaining:
+			try:
+				status, lines = self.pool.open_stream(
+					"POST",
+					"/api/chat",
+					body=json.dumps(payload).encode("utf-8"),
+					headers={"Content-Type": "application/json"},
+					timeout=remaining,
+				)
+			except _UNREACHABLE_ERRORS as exc:
+				raise TransportUnavailableError("Ollama is unreachable.") from exc
+			try:
+				_check_status(status, "chat")
+				# Ollama streams one JSON object per line (NDJSON)
+				for line in lines:
+					if not line.strip():
+						continue
+					parsed = json.loads(line.decode("utf-8"))
+					if parsed.get("error"):
+						raise RuntimeError(f"Ollama chat error: {parsed['error']}")
+					chunk = parsed.get("message", {}).get("content", "")
+					if parsed.get("done"):
+						# the final line carries the counters for the whole reply
+						self.usage.record(usage_from_ollama(purpose, parsed))
+					if chunk:
+						yield chunk
+			finally:
+				# closing early drops the socket so Ollama stops decoding
+				lines.close()
+
+	def warm_up(self) -> float:
+		"""
+		Load the model with an empty chat request and return the seconds it took.
+		"""
+		payload: dict[str, object] = {"model": self.model, "messages": [], "stream": False}
+		if self.keep_alive is not None:
+			payload["keep_alive"] = self.keep_alive
+		started = time.monotonic()
+		parsed = self._post_chat(payload)
+		self.usage.record(usage_from_ollama("warm_up", parsed))
+		elapsed = time.monotonic() - started
+		return elapsed
+
+	def start_heartbeat(self, interval: float = 240.0) -> None:
+		"""
+		Re-send warm_up() every interval seconds from a daemon thread.
+
+		Keep interval below keep_alive (Ollama defaults to five minutes) so the
+		model stays resident during long batch runs. Failures are ignored; the
+		next beat tries again.
+		"""
+		if self._heartbeat_thread is not None and self._heartbeat_thread.is_alive():
+			return
+		stop = threading.Event()
+
+		def _beat() -> None:
+			while not stop.wait(interval):
+				try:
+					self.warm_up()
+				except Exception:
+					continue
+
+		self._heartbeat_stop = stop
+		self._heartbeat_thread = threading.Thread(target=_beat, name="ollama-heartbeat", daemon=True)
+		self._heartbeat_thread.start()
+
+	def stop_heartbeat(self) -> None:
+		if self._heartbeat_stop is None or self._heartbeat_thread is None:
+			return
+		self._heartbeat_stop.set()
+		self._heartbeat_thread.join()
+		self._heartbeat_stop = None
+		self._heartbeat_thread = None
+
+	def pool_stats(self) -> dict[str, int]:
+		return self.pool.stats()
+
+	def usage_stats(self) -> dict[str, dict[str, float]]:
+		"""
+		Return token counts, durations, and tokens per second per purpose.
+		"""
+		return self.usage.stats()
+
+	def loaded_models(self, timeout: float | None = None) -> list[str]:
+		"""
+		Return the model names Ollama currently holds in memory (/api/ps).
+		"""
+		try:
+			status, response_body = self.pool.request("GET", "/api/ps", timeout=timeout)
+		except _UNREACHABLE_ERRORS as exc:
+			raise TransportUnavailableError("Ollama is unreachable.") from exc
+		_check_status(status, "ps")
+		parsed = json.loads(response_body.decode("utf-8"))
+		names = [item.get("name", "") for item in parsed.get("models", []) if item.get("name")]
+		return names
+
+	def generate(
+		self,
+		prompt: str,
+		*,
+		purpose: str,
+		max_tokens: int,
+		timeout: float | None = None,
+	) -> str:
+		messages = self._build_messages(prompt)
+		payload = self._chat_payload(messages, stream=False, max_tokens=max_tokens)
+		parsed = self._post_chat(payload, timeout)
+		self.usage.record(usage_from_ollama(purpose, parsed))
 		assistant_message = parsed.get("message", {}).get("content", "")
 		if not assistant_message:
 			raise RuntimeError("Ollama chat returned empty content")
 		self._record_history(prompt, assistant_message)
 		return assistant_message
 
+	def generate_stream(
+		self,
+		prompt: str,
+		*,
+		purpose: str,
+		max_tokens: int,
+		timeout: float | None = None,
+	) -> Iterator[str]:
+		messages = self._build_messages(prompt)
+		payload = self._chat_payload(messages, stream=True, max_tokens=max_tokens)
+		chunks: list[str] = []
+		try:
+			for chunk in self._stream_chat(payload, purpose, timeout):
+				chunks.append(chunk)
+				yield chunk
+		except GeneratorExit:
+			# an early stop still leaves a usable reply for the history
+			if chunks:
+				self._record_history(prompt, "".join(chunks))
+			raise
+		assistant_message = "".join(chunks)
+		if not assistant_message:
+			raise RuntimeError("Ollama chat returned empty content")
+		self._record_history(prompt, assistant_message)
+
 	def generate_chat(
 		self,
 		messages: list[dict[str, str]],
 		*,
 		purpose: str,
 		max_tokens: int,
+		timeout: float | None = None,
 	) -> str:
 		combined = self._build_messages_from_chat(messages)
-		payload: dict[str, object] = {
-			"model": self.model,
-			"messages": combined,
-			"stream": False,
-			"options": {"num_predict": max_tokens},
-		}
-		time.sleep(random.random())
-		request = urllib.request.Request(
-			f"{self.base_url}/api/chat",
-			data=json.dumps(payload).encode("utf-8"),
-			headers={"Content-Type": "application/json"},
-			method="POST",
-		)
+		payload = self._chat_payload(combined, stream=False, max_tokens=max_tokens)
+		parsed = self._post_chat(payload, timeout)
+		self.usage.record(usage_from_ollama(purpose, parsed))
+		assistant_message = parsed.get("message", {}).get("content", "")
+		if not assistant_message:
+			raise RuntimeError("Ollama chat returned empty content")
+		last_user = self._last_user_message(messages)
+		if last_user:
+			self._record_history(last_user, assistant_message)
+		return assistant_message
+
+	def generate_chat_stream(
+		self,
+		messages: list[dict[str, str]],
+		*,
+		purpose: str,
+		max_tokens: int,
+		timeout: float | None = None,
+	) -> Iterator[str]:
+		combined = self._build_messages_from_chat(messages)
+		payload = self._chat_payload(combined, stream=True, max_tokens=max_tokens)
+		last_user = self._last_user_message(messages)
+		chunks: list[str] = []
 		try:
-			with urllib.request.urlopen(request, timeout=30) as response:
-				if response.status >= 400:
-					raise RuntimeError(f"Ollama chat error: status {response.status}")
-				response_body = response.read()
-		except urllib.error.URLError as exc:
-			raise TransportUnavailableError("Ollama is unreachable.") from exc
-		parsed = json.loads(response_body.decode("utf-8"))
+			for chunk in self._stream_chat(payload, purpose, timeout):
+				chunks.append(chunk)
+				yield chunk
+		except GeneratorExit:
+			# an early stop still leaves a usable reply for the history
+			if chunks and last_user:
+				self._record_history(last_user, "".join(chunks))
+			raise
+		assistant_message = "".join(chunks)
+		if not assistant_message:
+			raise RuntimeError("Ollama chat returned empty content")
+		if last_user:
+			self._record_history(last_user, assistant_message)
+
+	async def agenerate(
+		self,
+		prompt: str,
+		*,
+		purpose: str,
+		max_tokens: int,
+		timeout: float | None = None,
+	) -> str:
+		messages = self._build_messages(prompt)
+		payload = self._chat_payload(messages, stream=False, max_tokens=max_tokens)
+		parsed = await self._apost_chat(payload, timeout)
+		self.usage.record(usage_from_ollama(purpose, parsed))
+		assistant_message = parsed.get("message", {}).get("content", "")
+		if not assistant_message:
+			raise RuntimeError("Ollama chat returned empty content")
+		self._record_history(prompt, assistant_message)
+		return assistant_message
+
+	async def agenerate_chat(
+		self,
+		messages: list[dict[str, str]],
+		*,
+		purpose: str,
+		max_tokens: int,
+		timeout: float | None = None,
+	) -> str:
+		combined = self._build_messages_from_chat(messages)
+		payload = self._chat_payload(combined, stream=False, max_tokens=max_tokens)
+		parsed = await self._apost_chat(payload, timeout)
+		self.usage.record(usage_from_ollama(purpose, parsed))
 		assistant_message = parsed.get("message", {}).get("content", "")
 		if not assistant_message:
 			raise RuntimeError("Ollama chat returned empty content")
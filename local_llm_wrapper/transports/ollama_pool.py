@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+Ollama transport that spreads requests over several hosts.
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import time
+import threading
+from collections.abc import Callable, Iterator
+
+# local repo modules
+from ..errors import DeadlineExceededError, TransportUnavailableError
+from .ollama import OllamaTransport
+from .usage import UsageTracker
+
+#============================================
+
+
+LEAST_OUTSTANDING = "least_outstanding"
+WEIGHTED = "weighted"
+DEFAULT_LOADED_TTL = 30.0
+# /api/ps answers from memory; a host slower than this is treated as not loaded
+DEFAULT_PROBE_TIMEOUT = 2.0
+DEFAULT_SPILL_AFTER = 2
+
+
+def _model_key(name: str) -> str:
+	# Ollama reports untagged models as name:latest
+	key = name.strip().lower()
+	if ":" not in key:
+		key = f"{key}:latest"
+	return key
+
+
+def _timeout_kwargs(timeout: float | None) -> dict[str, float]:
+	if timeout is None:
+		return {}
+	return {"timeout": timeout}
+
+
+def _deadline(timeout: float | None) -> float | None:
+	# one budget covers every host the pool tries for a request
+	if timeout is None:
+		return None
+	deadline = time.monotonic() + timeout
+	return deadline
+
+
+def _time_left(deadline: float | None, last_exc: Exception | None) -> float | None:
+	if deadline is None:
+		return None
+	left = deadline - time.monotonic()
+	if left <= 0:
+		raise DeadlineExceededError("Request deadline exceeded trying Ollama hosts.") from last_exc
+	return left
+
+
+class _Host:
+	def __init__(self, transport: OllamaTransport, weight: float) -> None:
+		self.transport = transport
+		self.weight = weight
+		self.outstanding = 0
+		self.requests = 0
+		self.failures = 0
+		# smooth weighted round-robin state
+		self.current_weight = 0.0
+		# set once the host answered for this model, so it stays preferred
+		self.served = False
+
+
+class OllamaPoolTransport:
+	"""
+	Balance one model across several Ollama hosts.
+
+	Hosts that already have the model loaded (per /api/ps, refreshed in a
+	background thread every loaded_ttl seconds, each probe bounded by
+	probe_timeout) or that have served it before are preferred, so the model
+	is not loaded on every box. Picking a host never waits on a probe. When
+	each preferred host already has spill_after requests outstanding, the
+	other hosts are used too. Among the candidates the strategy picks the
+	host: least_outstanding takes the one with the fewest requests in
+	flight, weighted uses smooth weighted round-robin. A host that is
+	unreachable is skipped for that request.
+
+	Conversation history is not supported because requests move between hosts.
+	Hosts given as URLs share the pool's usage tracker, so usage_stats()
+	covers the whole pool; transports passed in keep their own.
+	"""
+
+	name = "OllamaPool"
+	# generate methods take an optional per-call timeout in seconds
+	accepts_timeout = True
+
+	def __init__(
+		self,
+		model: str,
+		hosts: list[str | OllamaTransport],
+		*,
+		weights: list[float] | None = None,
+		strategy: str = LEAST_OUTSTANDING,
+		system_message: str = "",
+		loaded_ttl: float = DEFAULT_LOADED_TTL,
+		probe_timeout: float = DEFAULT_PROBE_TIMEOUT,
+		spill_after: int = DEFAULT_SPILL_AFTER,
+		keep_alive: str | int | None = None,
+		usage: UsageTracker | None = None,
+	) -> None:
+		if not hosts:
+			raise ValueError("At least one Ollama host is required.")
+		if strategy not in (LEAST_OUTSTANDING, WEIGHTED):
+			raise ValueError(f"Unknown balancing strategy: {strategy!r}")
+		if weights is None:
+			weights = [1.0] * len(hosts)
+		if len(weights) != len(hosts):
+			raise ValueError("weights must match hosts.")
+		if any(weight <= 0 for weight in weights):
+			raise ValueError("weights must be positive.")
+		self.model = model
+		self.strategy = strategy
+		self.loaded_ttl = float(loaded_ttl)
+		self.probe_timeout = float(probe_timeout)
+		self.spill_after = max(1, int(spill_after))
+		self.usage = usage if usage is not None else UsageTracker()
+		self._hosts: list[_Host] = []
+		for host, weight in zip(hosts, weights):
+			if isinstance(host, str):
+				host = OllamaTransport(
+					model=model,
+					base_url=host,
+					system_message=system_message,
+					keep_alive=keep_alive,
+					usage=self.usage,
+				)
+			self._hosts.append(_Host(host, float(weight)))
+		self._lock = threading.Lock()
+		self._loaded: set[int] = set()
+		self._loaded_checked = float("-inf")
+		self._refreshing = False
+
+	#============================================
+	def _refresh_loaded(self) -> None:
+		now = time.monotonic()
+		with self._lock:
+			if self._refreshing or now - self._loaded_checked < self.loaded_ttl:
+				return
+			# claim the refresh so concurrent callers do not all probe
+			self._refreshing = True
+		# requests keep using the previous answer while the probe runs
+		worker = threading.Thread(target=self.refresh_loaded, name="ollama-pool-ps", daemon=True)
+		worker.start()
+
+	#============================================
+	def refresh_loaded(self) -> None:
+		"""
+		Ask every host which models it holds in memory, blocking until done.
+		"""
+		wanted = _model_key(self.model)
+		loaded: set[int] = set()
+		for idx, host in enumerate(self._hosts):
+			loaded_models = getattr(host.transport, "loaded_models", None)
+			if not callable(loaded_models):
+				continue
+			extra = {}
+			if getattr(host.transport, "accepts_timeout", False):
+				extra = _timeout_kwargs(self.probe_timeout)
+			try:
+				names = loaded_models(**extra)
+			except Exception:
+				continue
+			if wanted in {_model_key(name) for name in names}:
+				loaded.add(idx)
+		with self._lock:
+			self._loaded = loaded
+			self._loaded_checked = time.monotonic()
+			self._refreshing = False
+
+	#============================================
+	def _acquire(self, exclude: set[int]) -> int:
+		self._refresh_loaded()
+		with self._lock:
+			available = [idx for idx in range(len(self._hosts)) if idx not in exclude]
+			if not available:
+				raise TransportUnavailableError("No Ollama hosts are reachable.")
+			preferred = [
+				idx for idx in available if idx in self._loaded or self._hosts[idx].served
+			]
+			candidates = preferred
+			if not preferred or all(
+				self._hosts[idx].outstanding >= self.spill_after for idx in preferred
+			):
+				candidates = available
+			if self.strategy == WEIGHTED:
+				chosen = self._pick_weighted(candidates)
+			else:
+				chosen = min(
+					candidates,
+					key=lambda idx: (self._hosts[idx].outstanding, self._hosts[idx].requests, idx),
+				)
+			host = self._hosts[chosen]
+			host.outstanding += 1
+			host.requests += 1
+		return chosen
+
+	#============================================
+	def _pick_weighted(self, candidates: list[int]) -> int:
+		total = 0.0
+		best = candidates[0]
+		for idx in candidates:
+			host = self._hosts[idx]
+			host.current_weight += host.weight
+			total += host.weight
+			if host.current_weight > self._hosts[best].current_weight:
+				best = idx
+		self._hosts[best].current_weight -= total
+		return best
+
+	#============================================
+	def _release(self, idx: int, ok: bool) -> None:
+		with self._lock:
+			host = self._hosts[idx]
+			host.outstanding -= 1
+			if ok:
+				host.served = True
+			else:
+				host.failures += 1
+
+	#============================================
+	def _call(self, method: str, deadline: float | None, *args, **kwargs) -> str:
+		tried: set[int] = set()
+		last_exc: TransportUnavailableError | None = None
+		while len(tried) < len(self._hosts):
+			# each host only gets what is left of the request's budget
+			extra = _timeout_kwargs(_time_left(deadline, last_exc))
+			try:
+				idx = self._acquire(tried)
+			except TransportUnavailableError:
+				break
+			tried.add(idx)
+			call: Callable[..., str] = getattr(self._hosts[idx].transport, method)
+			try:
+				text = call(*args, **kwargs, **extra)
+			except TransportUnavailableError as exc:
+				self._release(idx, ok=False)
+				last_exc = exc
+				continue
+			except BaseException:
+				self._release(idx, ok=False)
+				raise
+			self._release(idx, ok=True)
+			return text
+		# a last host that failed on the deadline reports the deadline
+		_time_left(deadline, last_exc)
+		if last_exc is not None:
+			raise last_exc
+		raise TransportUnavailableError("No Ollama hosts are reachable.")
+
+	#============================================
+	async def _acall(self, method: str, deadline: float | None, *args, **kwargs) -> str:
+		tried: set[int] = set()
+		last_exc: TransportUnavailableError | None = None
+		while len(tried) < len(self._hosts):
+			# each host only gets what is left of the request's budget
+			extra = _timeout_kwargs(_time_left(deadline, last_exc))
+			# safe on the event loop: _acquire only takes the pool lock, the
+			# /api/ps probe runs on its own thread
+			try:
+				idx = self._acquire(tried)
+			except TransportUnavailableError:
+				break
+			tried.add(idx)
+			call = getattr(self._hosts[idx].transport, method)
+			try:
+				text = await call(*args, **kwargs, **extra)
+			except TransportUnavailableError as exc:
+				self._release(idx, ok=False)
+				last_exc = exc
+				continue
+			except BaseException:
+				self._release(idx, ok=False)
+				raise
+			self._release(idx, ok=True)
+			return text
+		# a last host that failed on the deadline reports the deadline
+		_time_left(deadline, last_exc)
+		if last_exc is not None:
+			raise last_exc
+		raise TransportUnavailableError("No Ollama hosts are reachable.")
+
+	#============================================
+	def _stream(self, method: str, deadline: float | None, *args, **kwargs) -> Iterator[str]:
+		# a host may be skipped only until its first chunk arrives
+		tried: set[int] = set()
+		last_exc: TransportUnavailableError | None = None
+		while len(tried) < len(self._hosts):
+			# each host only gets what is left of the request's budget
+			extra = _timeout_kwargs(_time_left(deadline, last_exc))
+			try:
+				idx = self._acquire(tried)
+			except TransportUnavailableError:
+				break
+			tried.add(idx)
+			chunks = getattr(self._hosts[idx].transport, method)(*args, **kwargs, **extra)
+			ok = False
+			try:
+				try:
+					first_chunk = next(chunks)
+				except StopIteration:
+					ok = True
+					return
+				except TransportUnavailableError as exc:
+					last_exc = exc
+					continue
+				yield first_chunk
+				yield from chunks
+				ok = True
+				return
+			finally:
+				chunks.close()
+				self._release(idx, ok=ok)
+		# a last host that failed on the deadline reports the deadline
+		_time_left(deadline, last_exc)
+		if last_exc is not None:
+			raise last_exc
+		raise TransportUnavailableError("No Ollama hosts are reachable.")
+
+	#============================================
+	def generate(
+		self,
+		prompt: str,
+		*,
+		purpose: str,
+		max_tokens: int,
+		timeout: float | None = None,
+	) -> str:
+		deadline = _deadline(timeout)
+		return self._call("generate", deadline, prompt, purpose=purpose, max_tokens=max_tokens)
+
+	#============================================
+	def generate_chat(
+		self,
+		messages: list[dict[str, str]],
+		*,
+		purpose: str,
+		max_tokens: int,
+		timeout: float | None = None,
+	) -> str:
+		deadline = _deadline(timeout)
+		return self._call(
+			"generate_chat", deadline, messages, purpose=purpose, max_tokens=max_tokens
+		)
+
+	#============================================
+	def generate_stream(
+		self,
+		prompt: str,
+		*,
+		purpose: str,
+		max_tokens: int,
+		timeout: float | None = None,
+	) -> Iterator[str]:
+		deadline = _deadline(timeout)
+		return self._stream(
+			"generate_stream", deadline, prompt, purpose=purpose, max_tokens=max_tokens
+		)
+
+	#============================================
+	def generate_chat_stream(
+		self,
+		messages: list[dict[str, str]],
+		*,
+		purpose: str,
+		max_tokens: int,
+		timeout: float | None = None,
+	) -> Iterator[str]:
+		deadline = _deadline(timeout)
+		return self._stream(
+			"generate_chat_stream", deadline, messages, purpose=purpose, max_tokens=max_tokens
+		)
+
+	#============================================
+	async def agenerate(
+		self,
+		prompt: str,
+		*,
+		purpose: str,
+		max_tokens: int,
+		timeout: float | None = None,
+	) -> str:
+		deadline = _deadline(timeout)
+		return await self._acall(
+			"agenerate", deadline, prompt, purpose=purpose, max_tokens=max_tokens
+		)
+
+	#============================================
+	async def agenerate_chat(
+		self,
+		messages: list[dict[str, str]],
+		*,
+		purpose: str,
+		max_tokens: int,
+		timeout: float | None = None,
+	) -> str:
+		deadline = _deadline(timeout)
+		return await self._acall(
+			"agenerate_chat", deadline, messages, purpose=purpose, max_tokens=max_tokens
+		)
+
+	#============================================
+	def cache_identity(self) -> object:
+		"""
+		Combine the hosts' identities; a reply may come from any of them.
+		"""
+		identities = []
+		for host in self._hosts:
+			cache_identity = getattr(host.transport, "cache_identity", None)
+			identities.append(cache_identity() if callable(cache_identity) else None)
+		return identities
+
+	#============================================
+	def usage_stats(self) -> dict[str, dict[str, float]]:
+		return self.usage.stats()
+
+	#============================================
+	def host_stats(self) -> list[dict[str, object]]:
+		"""
+		Return per-host request counts, outstanding requests, and model pinning.
+		"""
+		with self._lock:
+			result = [
+				{
+					"base_url": getattr(host.transport, "base_url", ""),
+					"weight": host.weight,
+					"outstanding": host.outstanding,
+					"requests": host.requests,
+					"failures": host.failures,
+					"loaded": idx in self._loaded,
+					"served": host.served,
+				}
+				for idx, host in enumerate(self._hosts)
+			]
+		return result
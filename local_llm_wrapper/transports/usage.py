@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Per-call token and timing accounting for transports that report it.
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import threading
+from collections import deque
+from dataclasses import dataclass
+
+#============================================
+
+
+DEFAULT_RECENT = 100
+# Ollama reports durations in nanoseconds
+_NS_PER_SECOND = 1_000_000_000
+
+
+@dataclass(frozen=True, slots=True)
+class CallUsage:
+	purpose: str
+	prompt_tokens: int = 0
+	completion_tokens: int = 0
+	total_seconds: float = 0.0
+	load_seconds: float = 0.0
+	prompt_eval_seconds: float = 0.0
+	eval_seconds: float = 0.0
+
+	@property
+	def tokens_per_second(self) -> float | None:
+		if self.eval_seconds <= 0:
+			return None
+		return self.completion_tokens / self.eval_seconds
+
+
+def usage_from_ollama(purpose: str, reply: dict) -> CallUsage:
+	"""
+	Build a CallUsage from the counters on an Ollama /api/chat reply.
+
+	Missing fields count as zero, so partial replies are still recorded.
+	"""
+
+	def _seconds(key: str) -> float:
+		return float(reply.get(key) or 0) / _NS_PER_SECOND
+
+	usage = CallUsage(
+		purpose=purpose,
+		prompt_tokens=int(reply.get("prompt_eval_count") or 0),
+		completion_tokens=int(reply.get("eval_count") or 0),
+		total_seconds=_seconds("total_duration"),
+		load_seconds=_seconds("load_duration"),
+		prompt_eval_seconds=_seconds("prompt_eval_duration"),
+		eval_seconds=_seconds("eval_duration"),
+	)
+	return usage
+
+
+class _Totals:
+	def __init__(self) -> None:
+		self.calls = 0
+		self.prompt_tokens = 0
+		self.completion_tokens = 0
+		self.total_seconds = 0.0
+		self.load_seconds = 0.0
+		self.max_load_seconds = 0.0
+		self.eval_seconds = 0.0
+		self.max_prompt_tokens = 0
+
+	def add(self, usage: CallUsage) -> None:
+		self.calls += 1
+		self.prompt_tokens += usage.prompt_tokens
+		self.completion_tokens += usage.completion_tokens
+		self.total_seconds += usage.total_seconds
+		self.load_seconds += usage.load_seconds
+		self.max_load_seconds = max(self.max_load_seconds, usage.load_seconds)
+		self.eval_seconds += usage.eval_seconds
+		self.max_prompt_tokens = max(self.max_prompt_tokens, usage.prompt_tokens)
+
+
+class UsageTracker:
+	"""
+	Aggregate per-call token counts and durations by purpose.
+
+	Transports call record() once per finished request. stats() returns totals
+	per purpose along with tokens per second, mean prompt size, and the
+	longest model load; recent() returns the last few calls as recorded.
+	"""
+
+	def __init__(self, recent: int = DEFAULT_RECENT) -> None:
+		self._lock = threading.Lock()
+		self._totals: dict[str, _Totals] = {}
+		self._recent: deque[CallUsage] = deque(maxlen=max(0, int(recent)))
+
+	#============================================
+	def record(self, usage: CallUsage) -> None:
+		with self._lock:
+			totals = self._totals.get(usage.purpose)
+			if totals is None:
+				totals = _Totals()
+				self._totals[usage.purpose] = totals
+			totals.add(usage)
+			self._recent.append(usage)
+
+	#============================================
+	def recent(self) -> list[CallUsage]:
+		with self._lock:
+			result = list(self._recent)
+		return result
+
+	#============================================
+	def reset(self) -> None:
+		with self._lock:
+			self._totals.clear()
+			self._recent.clear()
+
+	#============================================
+	def stats(self) -> dict[str, dict[str, float]]:
+		"""
+		Return token counts, durations, and throughput per purpose.
+		"""
+		result: dict[str, dict[str, float]] = {}
+		with self._lock:
+			for purpose, totals in self._totals.items():
+				tokens_per_second = None
+				if totals.eval_seconds > 0:
+					tokens_per_second = round(totals.completion_tokens / totals.eval_seconds, 3)
+				result[purpose] = {
+					"calls": totals.calls,
+					"prompt_tokens": totals.prompt_tokens,
+					"completion_tokens": totals.completion_tokens,
+					"mean_prompt_tokens": round(totals.prompt_tokens / totals.calls, 1),
+					"max_prompt_tokens": totals.max_prompt_tokens,
+					"total_seconds": round(totals.total_seconds, 6),
+					"load_seconds": round(totals.load_seconds, 6),
+					"max_load_seconds": round(totals.max_load_seconds, 6),
+					"eval_seconds": round(totals.eval_seconds, 6),
+					"tokens_per_second": tokens_per_second,
+				}
+		return result
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Tests for the Apple transport against a stub applefoundationmodels module.
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import sys
+import types
+
+# Third-Party
+import pytest
+
+# local repo modules
+from local_llm_wrapper.transports.apple import AppleTransport
+from local_llm_wrapper.transports.apple_sessions import AppleSessionPool
+
+#============================================
+
+
+class GuardrailViolationError(Exception):
+	pass
+
+
+class StubSession:
+	created: list[StubSession] = []
+
+	def __init__(self, instructions: str) -> None:
+		self.instructions = instructions
+		self.history: list[str] = []
+		self.entered = False
+		self.closed = False
+		self.fail_next = False
+		StubSession.created.append(self)
+
+	def generate(self, prompt: str, *, max_tokens: int, temperature: float) -> types.SimpleNamespace:
+		if self.fail_next:
+			self.fail_next = False
+			raise RuntimeError("model hiccup")
+		self.history.append(prompt)
+		# the reply exposes how many turns the conversation already had
+		return types.SimpleNamespace(text=f" {self.instructions}:{len(self.history)} ")
+
+	def clear_history(self) -> None:
+		self.history.clear()
+
+	def __enter__(self) -> StubSession:
+		self.entered = True
+		return self
+
+	def __exit__(self, *exc_info: object) -> None:
+		self.closed = True
+
+
+class StubSessionWithoutClear(StubSession):
+	clear_history = None
+
+
+@pytest.fixture
+def stub_apple(monkeypatch: pytest.MonkeyPatch) -> type[StubSession]:
+	StubSession.created = []
+	module = types.ModuleType("applefoundationmodels")
+	module.Session = StubSession
+	module.apple_intelligence_available = lambda: True
+	exceptions = types.ModuleType("applefoundationmodels.exceptions")
+	exceptions.GuardrailViolationError = GuardrailViolationError
+	module.exceptions = exceptions
+	monkeypatch.setitem(sys.modules, "applefoundationmodels", module)
+	monkeypatch.setitem(sys.modules, "applefoundationmodels.exceptions", exceptions)
+	monkeypatch.setattr(AppleTransport, "_require_apple_intelligence", lambda self: None)
+	return StubSession
+
+
+class FakeClock:
+	def __init__(self) -> None:
+		self.now = 50.0
+
+	def monotonic(self) -> float:
+		return self.now
+
+
+#============================================
+
+
+def test_apple_transport_reuses_session_with_clean_history(stub_apple) -> None:
+	transport = AppleTransport(instructions="be brief")
+	for _ in range(3):
+		assert transport.generate("hi", purpose="test", max_tokens=8) == "be brief:1"
+	assert len(stub_apple.created) == 1
+	# the pool enters the Session context manager and exits it on close
+	assert stub_apple.created[0].entered is True
+	stats = transport.session_stats()
+	assert stats["created"] == 1
+	assert stats["reused"] == 2
+	assert stats["idle"] == 1
+	transport.session_pool.close()
+	assert stub_apple.created[0].closed is True
+
+
+def test_apple_transport_keeps_conversation_sessions(stub_apple) -> None:
+	transport = AppleTransport(instructions="be brief")
+	assert transport.generate("hi", purpose="test", max_tokens=8, conversation="a") == "be brief:1"
+	assert transport.generate("hi", purpose="test", max_tokens=8, conversation="a") == "be brief:2"
+	# another conversation, or a keyless call, never sees that history
+	assert transport.generate("hi", purpose="test", max_tokens=8, conversation="b") == "be brief:1"
+	assert transport.generate("hi", purpose="test", max_tokens=8) == "be brief:1"
+	assert len(stub_apple.created) == 3
+
+
+def test_session_pool_reports_sessions_it_cannot_reuse(
+	stub_apple, monkeypatch: pytest.MonkeyPatch
+) -> None:
+	monkeypatch.setattr(sys.modules["applefoundationmodels"], "Session", StubSessionWithoutClear)
+	pool = AppleSessionPool()
+	for _ in range(2):
+		with pool.acquire("x") as keyless:
+			keyless.generate("hi", max_tokens=8, temperature=0.0)
+		assert keyless.closed is True
+	for _ in range(2):
+		with pool.acquire("x", "chat") as kept:
+			reply = kept.generate("hi", max_tokens=8, temperature=0.0)
+	# without clear_history the conversation session is kept and continues
+	assert reply.text.strip() == "x:2"
+	stats = pool.stats()
+	assert stats["created"] == 3
+	assert stats["reused"] == 1
+	assert stats["not_reusable"] == 2
+	assert stats["idle"] == 1
+
+
+def test_apple_transport_discards_session_after_failed_call(
+	stub_apple, monkeypatch: pytest.MonkeyPatch
+) -> None:
+	monkeypatch.setattr("local_llm_wrapper.transports.apple.time.sleep", lambda _seconds: None)
+	transport = AppleTransport(instructions="be brief", max_retries=2)
+	transport.generate("hi", purpose="test", max_tokens=8)
+	stub_apple.created[0].fail_next = True
+	# the retry runs on a fresh session and the broken one is closed
+	assert transport.generate("hi", purpose="test", max_tokens=8) == "be brief:1"
+	assert stub_apple.created[0].closed is True
+	assert len(stub_apple.created) == 2
+	assert transport.session_stats()["discarded"] == 1
+
+
+def test_session_pool_keys_on_instructions_and_bounds_idle(stub_apple) -> None:
+	pool = AppleSessionPool(max_idle=1)
+	with pool.acquire("first") as first:
+		pass
+	with pool.acquire("second") as second:
+		pass
+	# only one idle session is kept; the older one is closed
+	assert first.closed is True
+	assert second.closed is False
+	with pool.acquire("second") as again:
+		assert again is second
+	assert pool.stats()["evicted"] == 1
+
+
+def test_session_pool_evicts_idle_sessions(stub_apple, monkeypatch: pytest.MonkeyPatch) -> None:
+	clock = FakeClock()
+	monkeypatch.setattr("local_llm_wrapper.transports.apple_sessions.time.monotonic", clock.monotonic)
+	pool = AppleSessionPool(idle_timeout=10.0)
+	with pool.acquire("x") as old:
+		pass
+	clock.now += 11.0
+	with pool.acquire("x") as new:
+		assert new is not old
+	assert old.closed is True
+	pool.close()
+	assert new.closed is True
+	assert pool.stats()["idle"] == 0
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Import-time budget for the public client module.
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import os
+import subprocess
+import sys
+
+#============================================
+
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+# cumulative import time of local_llm_wrapper.llm_client in a fresh interpreter;
+# generous so slow CI machines pass, tight enough to catch a heavy eager import
+IMPORT_BUDGET_MS = 200.0
+# modules that only specific backends, the async client, or the disk cache need
+LAZY_MODULES = (
+	"applefoundationmodels",
+	"asyncio",
+	"http.client",
+	"sqlite3",
+	"local_llm_wrapper.transports.apple",
+	"local_llm_wrapper.transports.ollama",
+)
+
+
+def _run_python(*args: str) -> subprocess.CompletedProcess:
+	result = subprocess.run(
+		[sys.executable, *args],
+		cwd=REPO_ROOT,
+		capture_output=True,
+		text=True,
+		timeout=60,
+	)
+	return result
+
+
+#============================================
+
+
+def test_client_import_stays_within_budget() -> None:
+	result = _run_python("-X", "importtime", "-c", "import local_llm_wrapper.llm_client")
+	assert result.returncode == 0, result.stderr
+	cumulative_us = None
+	for line in result.stderr.splitlines():
+		# "import time: self [us] | cumulative | imported package"
+		parts = [part.strip() for part in line.split("|")]
+		if len(parts) == 3 and parts[2] == "local_llm_wrapper.llm_client":
+			cumulative_us = int(parts[1])
+	assert cumulative_us is not None, result.stderr
+	assert cumulative_us / 1000.0 < IMPORT_BUDGET_MS
+
+
+def test_client_import_skips_backend_modules() -> None:
+	code = (
+		"import sys, local_llm_wrapper.llm_client\n"
+		f"print(','.join(name for name in {LAZY_MODULES!r} if name in sys.modules))"
+	)
+	result = _run_python("-c", code)
+	assert result.returncode == 0, result.stderr
+	assert result.stdout.strip() == ""
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Tests for the asyncio LLM engine.
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import time
+import asyncio
+from dataclasses import dataclass, field
+
+# Third-Party
+import pytest
+
+# local repo modules
+import local_llm_wrapper.llm_engine as llm_engine_module
+from local_llm_wrapper.errors import (
+	DeadlineExceededError,
+	GuardrailRefusalError,
+	TransportUnavailableError,
+)
+from local_llm_wrapper.llm_async_engine import AsyncLLMEngine
+from local_llm_wrapper.llm_cache import ResponseCache, ResultMemo
+from local_llm_wrapper.llm_client import AsyncLLMClient
+from local_llm_wrapper.llm_prompts import (
+	RenameRequest,
+	SortItem,
+	RENAME_EXAMPLE_OUTPUT,
+	build_format_fix_prompt,
+	build_rename_prompt,
+	build_rename_prompt_minimal,
+)
+from local_llm_wrapper.llm_router import TransportRouter
+from local_llm_wrapper.llm_singleflight import SingleFlight
+
+#============================================
+
+
+@dataclass(slots=True)
+class AsyncScriptedTransport:
+	name: str
+	responses: dict[str, str] = field(default_factory=dict)
+	default_response: str | None = None
+	default_error: Exception | None = None
+	calls: list[str] = field(default_factory=list)
+
+	def generate(self, prompt: str, *, purpose: str, max_tokens: int) -> str:
+		raise RuntimeError("Async engine should use agenerate.")
+
+	async def agenerate(self, prompt: str, *, purpose: str, max_tokens: int) -> str:
+		self.calls.append(prompt)
+		await asyncio.sleep(0)
+		if prompt in self.responses:
+			return self.responses[prompt]
+		if self.default_error:
+			raise self.default_error
+		if self.default_response is None:
+			raise RuntimeError("No scripted response for prompt.")
+		return self.default_response
+
+
+@dataclass(slots=True)
+class SyncTransport:
+	name: str = "Sync"
+	response: str = "sync-ok"
+
+	def generate(self, prompt: str, *, purpose: str, max_tokens: int) -> str:
+		return self.response
+
+
+def _noop_log_parse_failure(**kwargs) -> None:
+	return None
+
+
+#============================================
+
+
+def test_async_generate_skips_unavailable_transport() -> None:
+	transport_a = AsyncScriptedTransport(
+		name="Unavailable",
+		default_error=TransportUnavailableError("missing"),
+	)
+	transport_b = AsyncScriptedTransport(name="OK", default_response="ready")
+	engine = AsyncLLMEngine(transports=[transport_a, transport_b], quiet=True)
+	assert asyncio.run(engine.generate("ping")) == "ready"
+	assert transport_a.calls == ["ping"]
+
+
+def test_async_generate_runs_sync_transport_in_thread() -> None:
+	engine = AsyncLLMEngine(transports=[SyncTransport()], quiet=True)
+	assert asyncio.run(engine.generate("ping")) == "sync-ok"
+
+
+def test_async_rename_retries_minimal_prompt_on_guardrail() -> None:
+	metadata = {"extension": "pdf"}
+	req = RenameRequest(metadata=metadata, current_name="input.pdf", context=None)
+	minimal_prompt = build_rename_prompt_minimal(req)
+	transport = AsyncScriptedTransport(
+		name="Guardrail",
+		responses={minimal_prompt: "<new_name>My File.pdf</new_name>\n<reason>ok</reason>"},
+		default_error=GuardrailRefusalError("blocked"),
+	)
+	engine = AsyncLLMEngine(transports=[transport], quiet=True)
+	result = asyncio.run(engine.rename("input.pdf", metadata))
+	assert result.new_name == "My-File.pdf"
+
+
+def test_async_rename_retries_format_fix(monkeypatch: pytest.MonkeyPatch) -> None:
+	monkeypatch.setattr(llm_engine_module, "log_parse_failure", _noop_log_parse_failure)
+	metadata = {"extension": "txt"}
+	req = RenameRequest(metadata=metadata, current_name="note.txt", context=None)
+	fix_prompt = build_format_fix_prompt(build_rename_prompt(req), RENAME_EXAMPLE_OUTPUT)
+	transport = AsyncScriptedTransport(
+		name="Formatter",
+		responses={fix_prompt: "<new_name>Note.txt</new_name>\n<reason>short</reason>"},
+		default_response="not valid xml",
+	)
+	engine = AsyncLLMEngine(transports=[transport], quiet=True)
+	result = asyncio.run(engine.rename("note.txt", metadata))
+	assert result.new_name == "Note.txt"
+	assert fix_prompt in transport.calls
+
+
+def test_async_client_sort_merges_in_order() -> None:
+	transport = AsyncScriptedTransport(
+		name="Sorter",
+		default_response="<category>Document</category>\n<reason>manual</reason>",
+	)
+	client = AsyncLLMClient(transports=[transport], quiet=True)
+	items = [
+		SortItem(path="a.txt", name="a", ext="txt", description="notes"),
+		{"path": "b.txt", "name": "b", "ext": "txt", "description": "notes"},
+	]
+	result = asyncio.run(client.sort(items))
+	assert list(result.assignments) == ["a.txt", "b.txt"]
+	assert result.reasons["b.txt"] == "manual"
+
+
+def test_async_engine_shares_cache_memo_and_router(tmp_path) -> None:
+	cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+	router = TransportRouter()
+	down = AsyncScriptedTransport(name="Down", default_error=TransportUnavailableError("missing"))
+	transport = AsyncScriptedTransport(
+		name="Namer",
+		default_response="<new_name>Report.pdf</new_name>\n<reason>ok</reason>",
+	)
+	engine = AsyncLLMEngine(
+		transports=[down, transport],
+		quiet=True,
+		cache=cache,
+		result_memo=ResultMemo(),
+		router=router,
+	)
+	assert asyncio.run(engine.rename("scan.pdf", {"extension": "pdf"})).new_name == "Report.pdf"
+	# the memo answers the repeat; a fresh engine on the same cache skips the model too
+	assert asyncio.run(engine.rename("scan.pdf", {"extension": "pdf"})).new_name == "Report.pdf"
+	fresh = AsyncLLMEngine(transports=[transport], quiet=True, cache=cache)
+	assert asyncio.run(fresh.rename("scan.pdf", {"extension": "pdf"})).new_name == "Report.pdf"
+	assert len(transport.calls) == 1
+	assert router.stats()["Down"]["consecutive_failures"] == 1
+	cache.close()
+
+
+def test_async_engine_coalesces_and_honors_deadline() -> None:
+	transport = AsyncScriptedTransport(
+		name="Keeper",
+		default_response="<stem_action>drop</stem_action>\n<reason>generic label</reason>",
+	)
+	flight = SingleFlight()
+	engine = AsyncLLMEngine(transports=[transport], quiet=True, single_flight=flight)
+
+	async def _both() -> list:
+		calls = [engine.stem_action("IMG_1234", "Beach-Photo.jpg", "jpg") for _ in range(2)]
+		return await asyncio.gather(*calls)
+
+	results = asyncio.run(_both())
+	assert [result.stem_action for result in results] == ["drop", "drop"]
+	assert len(transport.calls) == 1
+	assert flight.stats()["coalesced"] == 1
+	with pytest.raises(DeadlineExceededError):
+		asyncio.run(engine.generate("ping", deadline=time.monotonic() - 1))
+	assert len(transport.calls) == 1
+
+
+def test_async_rename_with_stem_action_uses_one_call() -> None:
+	transport = AsyncScriptedTransport(
+		name="Fused",
+		default_response=(
+			"<new_name>Fan Manual.pdf</new_name>\n<reason>manual</reason>\n"
+			"<stem_action>keep</stem_action>\n<stem_reason>model number</stem_reason>"
+		),
+	)
+	client = AsyncLLMClient(transports=[transport], quiet=True)
+	rename_result, keep_result = asyncio.run(
+		client.rename_with_stem_action("GV60.pdf", {"extension": "pdf"})
+	)
+	assert rename_result.new_name == "Fan-Manual.pdf"
+	assert keep_result.stem_action == "keep"
+	assert len(transport.calls) == 1
+	assert client.stem_action_stats() == {"rules": 0, "model": 1}
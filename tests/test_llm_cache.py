@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Tests for the on-disk response cache.
+"""
+
+from __future__ import annotations
+
+# Standard Library
+from dataclasses import dataclass, field
+
+# Third-Party
+import pytest
+
+# local repo modules
+import local_llm_wrapper.llm_cache as llm_cache
+import local_llm_wrapper.llm_engine as llm_engine_module
+from local_llm_wrapper.llm_cache import ResponseCache, ResultMemo, make_cache_key
+from local_llm_wrapper.llm_engine import LLMEngine
+from local_llm_wrapper.llm_parsers import ParseError
+from local_llm_wrapper.llm_prompts import SortItem
+from local_llm_wrapper.transports.ollama import OllamaTransport
+from local_llm_wrapper.transports.ollama_pool import OllamaPoolTransport
+
+#============================================
+
+
+@dataclass(slots=True)
+class CountingTransport:
+	name: str = "Counter"
+	model: str = "tiny"
+	calls: list[str] = field(default_factory=list)
+
+	def generate(self, prompt: str, *, purpose: str, max_tokens: int) -> str:
+		self.calls.append(prompt)
+		return f"reply {len(self.calls)}"
+
+
+@dataclass(slots=True)
+class StaticTransport:
+	name: str = "Static"
+	reply: str = ""
+	calls: int = 0
+
+	def generate(self, prompt: str, *, purpose: str, max_tokens: int) -> str:
+		self.calls += 1
+		return self.reply
+
+
+def _noop_log_parse_failure(**kwargs) -> None:
+	return None
+
+
+#============================================
+
+
+def test_cache_key_depends_on_model_and_tokens() -> None:
+	base = make_cache_key("Ollama", "a", "hi", None, 10, None)
+	assert base == make_cache_key("Ollama", "a", "hi", None, 10, None)
+	assert base != make_cache_key("Ollama", "b", "hi", None, 10, None)
+	assert base != make_cache_key("Ollama", "a", "hi", None, 11, None)
+	# a reply cut short at closing tags never answers a full-length request
+	assert base != make_cache_key("Ollama", "a", "hi", None, 10, None, ("</reason>",))
+	assert base != make_cache_key("Ollama", "a", "hi", None, 10, None, None, {"system_message": "x"})
+
+
+def test_cache_evicts_least_recently_used(tmp_path) -> None:
+	cache = ResponseCache(str(tmp_path / "cache.sqlite"), max_entries=2)
+	cache.put("a", "1")
+	cache.put("b", "2")
+	assert cache.get("a") == "1"
+	cache.put("c", "3")
+	assert cache.get("b") is None
+	assert cache.get("a") == "1"
+	stats = cache.stats()
+	assert stats["evictions"] == 1
+	assert stats["entries"] == 2
+	cache.close()
+
+
+def test_cache_ttl_expires_entries(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+	cache = ResponseCache(str(tmp_path / "cache.sqlite"), ttl=60)
+	monkeypatch.setattr(llm_cache.time, "time", lambda: 1000.0)
+	cache.put("a", "1")
+	monkeypatch.setattr(llm_cache.time, "time", lambda: 1100.0)
+	assert cache.get("a") is None
+	assert cache.stats()["expired"] == 1
+	cache.close()
+
+
+def test_engine_reuses_cached_response(tmp_path) -> None:
+	cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+	transport = CountingTransport()
+	engine = LLMEngine(transports=[transport], quiet=True, cache=cache)
+	assert engine.generate("ping") == "reply 1"
+	assert engine.generate("ping") == "reply 1"
+	assert engine.generate("other") == "reply 2"
+	assert len(transport.calls) == 2
+	assert cache.stats()["hits"] == 1
+	cache.close()
+
+
+def test_cache_keeps_transports_with_different_system_prompts_apart(tmp_path) -> None:
+	@dataclass(slots=True)
+	class PromptedTransport(CountingTransport):
+		system_message: str = ""
+
+		def cache_identity(self) -> object:
+			identity = {"system_message": self.system_message}
+			return identity
+
+	cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+	terse = PromptedTransport(system_message="be terse")
+	chatty = PromptedTransport(system_message="be chatty")
+	assert LLMEngine(transports=[terse], quiet=True, cache=cache).generate("ping") == "reply 1"
+	# same name, model, and prompt, but another system prompt: no shared reply
+	assert LLMEngine(transports=[chatty], quiet=True, cache=cache).generate("ping") == "reply 1"
+	assert len(chatty.calls) == 1
+	assert LLMEngine(transports=[terse], quiet=True, cache=cache).generate("ping") == "reply 1"
+	assert len(terse.calls) == 1
+	assert cache.stats()["hits"] == 1
+	cache.close()
+	# the real transports expose the settings that change their replies
+	first = OllamaTransport(model="tiny", system_message="one")
+	second = OllamaTransport(model="tiny", system_message="two")
+	assert first.cache_identity() != second.cache_identity()
+	pool = OllamaPoolTransport("tiny", [first, second])
+	assert pool.cache_identity() == [first.cache_identity(), second.cache_identity()]
+
+
+def test_engine_caches_structured_replies_only_after_they_parse(
+	tmp_path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+	monkeypatch.setattr(llm_engine_module, "log_parse_failure", _noop_log_parse_failure)
+	cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+	transport = StaticTransport(reply="no tags here")
+	engine = LLMEngine(transports=[transport], quiet=True, cache=cache)
+	with pytest.raises(ParseError):
+		engine.rename("scan.pdf", {"extension": "pdf"})
+	# neither the reply nor the format-fix reply is stored
+	assert cache.stats()["entries"] == 0
+	transport.reply = "<new_name>Report.pdf</new_name>\n<reason>ok</reason>"
+	assert engine.rename("scan.pdf", {"extension": "pdf"}).new_name == "Report.pdf"
+	calls = transport.calls
+	assert engine.rename("scan.pdf", {"extension": "pdf"}).new_name == "Report.pdf"
+	assert transport.calls == calls
+	cache.close()
+
+
+def test_result_memo_evicts_and_copies() -> None:
+	memo = ResultMemo(capacity=2)
+	memo.put(("k", "a"), {"value": 1})
+	memo.put(("k", "b"), {"value": 2})
+	first = memo.get(("k", "a"))
+	first["value"] = 99
+	assert memo.get(("k", "a")) == {"value": 1}
+	memo.put(("k", "c"), {"value": 3})
+	assert memo.get(("k", "b")) is None
+	assert memo.stats()["evictions"] == 1
+
+
+def test_engine_memoizes_structured_results() -> None:
+	transport = StaticTransport(reply="<new_name>Report.pdf</new_name>\n<reason>ok</reason>")
+	engine = LLMEngine(transports=[transport], quiet=True, result_memo=ResultMemo())
+	first = engine.rename("scan.pdf", {"extension": "pdf"})
+	first.new_name = "mutated"
+	second = engine.rename("scan.pdf", {"extension": "pdf"})
+	assert second.new_name == "Report.pdf"
+	assert transport.calls == 1
+	transport.reply = "<category>Audio</category>"
+	item = SortItem(path="a.mp3", name="a", ext="mp3", description="song")
+	engine.sort([item])
+	result = engine.sort([item])
+	assert result.assignments == {"a.mp3": "Audio"}
+	assert transport.calls == 2
@@ -9,7 +9,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 
 # local repo modules
-from local_llm_wrapper.llm_client import LLMClient
+from local_llm_wrapper.llm_client import AsyncLLMClient, LLMClient
 
 #============================================
 
@@ -41,3 +41,75 @@ def test_client_sort_accepts_dict_items() -> None:
 	}
 	result = client.sort([item])
 	assert result.assignments["notes.txt"] == "Document"
+
+
+def test_client_rename_many_yields_sanitized_results() -> None:
+	transport = StubTransport(response="<new_name>My File.pdf</new_name>\n<reason>N/A</reason>")
+	client = LLMClient(transports=[transport], quiet=True)
+	items = [(f"scan{idx}.pdf", {"extension": "pdf"}) for idx in range(5)]
+	results = list(client.rename_many(items, max_workers=3))
+	assert sorted(result.current_name for result in results) == [name for name, _meta in items]
+	assert all(result.new_name == "My-File.pdf" for result in results)
+	assert all(result.reason == "" for result in results)
+
+
+def test_client_rename_many_ordered() -> None:
+	transport = StubTransport(response="<new_name>x.pdf</new_name>")
+	client = LLMClient(transports=[transport], quiet=True)
+	items = [(f"scan{idx}.pdf", {"extension": "pdf"}) for idx in range(7)]
+	results = client.rename_many(items, max_workers=2, ordered=True)
+	assert [result.current_name for result in results] == [name for name, _meta in items]
+
+
+def test_client_rename_many_reports_failures_and_keeps_going() -> None:
+	class FlakyTransport:
+		name = "Flaky"
+
+		def generate(self, prompt: str, *, purpose: str, max_tokens: int) -> str:
+			if "scan3.pdf" in prompt:
+				raise RuntimeError("model crashed")
+			return "<new_name>x.pdf</new_name>\n<reason>ok</reason>"
+
+	client = LLMClient(transports=[FlakyTransport()], quiet=True)
+	items = [(f"scan{idx}.pdf", {"extension": "pdf"}) for idx in range(9)]
+	results = list(client.rename_many(items, max_workers=2, ordered=True))
+	assert [result.current_name for result in results] == [name for name, _meta in items]
+	failed = [result for result in results if result.error]
+	assert [result.current_name for result in failed] == ["scan3.pdf"]
+	assert failed[0].error == "RuntimeError: model crashed"
+	assert failed[0].new_name == ""
+	assert all(result.new_name == "x.pdf" for result in results if not result.error)
+
+
+def test_client_timeout_reaches_transport() -> None:
+	seen: list[float | None] = []
+
+	class TimedTransport:
+		name = "Timed"
+		accepts_timeout = True
+
+		def generate(self, prompt: str, *, purpose: str, max_tokens: int, timeout: float | None = None) -> str:
+			seen.append(timeout)
+			return "ok"
+
+	client = LLMClient(transports=[TimedTransport(), StubTransport()])
+	assert client.generate("hello", timeout=30.0) == "ok"
+	assert client.generate("hello") == "ok"
+	assert 0 < seen[0] <= 30.0
+	assert seen[1] is None
+
+
+def test_sync_and_async_clients_expose_the_same_calls() -> None:
+	# streaming and the thread-pooled bulk rename have no async counterpart
+	sync_only = {"generate_stream", "rename_many"}
+	sync_names = {name for name in dir(LLMClient) if not name.startswith("_")}
+	async_names = {name for name in dir(AsyncLLMClient) if not name.startswith("_")}
+	assert sync_names - sync_only == async_names
+
+
+def test_client_stem_rules_and_stats() -> None:
+	transport = StubTransport(response="<stem_action>keep</stem_action>\n<reason>model number</reason>")
+	client = LLMClient(transports=[transport], quiet=True, stem_rules=True)
+	assert client.stem_action("IMG_0001", "beach_sunset").source == "rules"
+	assert client.stem_action("RX100_manual", "camera_manual").stem_action == "keep"
+	assert client.stem_action_stats() == {"rules": 1, "model": 1}
@@ -14,15 +14,23 @@ import pytest
 
 # local repo modules
 import local_llm_wrapper.llm_engine as llm_engine_module
-from local_llm_wrapper.errors import GuardrailRefusalError, TransportUnavailableError
+from local_llm_wrapper.errors import (
+	DeadlineExceededError,
+	GuardrailRefusalError,
+	TransportUnavailableError,
+)
 from local_llm_wrapper.llm_engine import LLMEngine
+from local_llm_wrapper.llm_parsers import ParseError
 from local_llm_wrapper.llm_prompts import (
 	RenameRequest,
 	SortItem,
+	SortRequest,
 	RENAME_EXAMPLE_OUTPUT,
 	build_format_fix_prompt,
 	build_rename_prompt,
 	build_rename_prompt_minimal,
+	build_sort_batch_prompt,
+	build_sort_prompt,
 )
 from local_llm_wrapper.llm_utils import format_chat_prompt
 
@@ -70,6 +78,23 @@ class ChatOnlyTransport:
 		return "chat-ok"
 
 
+@dataclass(slots=True)
+class StreamingTransport:
+	name: str
+	chunks: list[str] = field(default_factory=list)
+	calls: list[str] = field(default_factory=list)
+	consumed: int = 0
+
+	def generate(self, prompt: str, *, purpose: str, max_tokens: int) -> str:
+		raise RuntimeError("Streaming transport should use generate_stream.")
+
+	def generate_stream(self, prompt: str, *, purpose: str, max_tokens: int):
+		self.calls.append(prompt)
+		for chunk in self.chunks:
+			self.consumed += 1
+			yield chunk
+
+
 def _noop_log_parse_failure(
 	*,
 	purpose: str,
@@ -224,3 +249,244 @@ def test_sort_assigns_category() -> None:
 	result = engine.sort([item])
 	assert result.assignments["notes.txt"] == "Document"
 	assert result.reasons["notes.txt"] == "manual"
+
+
+def test_generate_stream_yields_chunks_and_ttft() -> None:
+	transport = StreamingTransport(name="Stream", chunks=["Hel", "lo"])
+	engine = LLMEngine(transports=[transport], quiet=True)
+	stream = engine.generate_stream("ping")
+	assert stream.ttft is None
+	assert list(stream) == ["Hel", "lo"]
+	assert stream.text == "Hello"
+	assert stream.ttft is not None
+	assert stream.elapsed is not None
+
+
+def test_generate_stream_wraps_non_streaming_transport() -> None:
+	transport_a = ScriptedTransport(
+		name="Unavailable",
+		default_error=TransportUnavailableError("missing"),
+	)
+	transport_b = ScriptedTransport(name="OK", default_response="ready")
+	engine = LLMEngine(transports=[transport_a, transport_b], quiet=True)
+	stream = engine.generate_stream("ping")
+	assert stream.read() == "ready"
+	assert transport_b.calls == ["ping"]
+
+
+def test_rename_early_stop_closes_stream() -> None:
+	chunks = ["<new_name>Report.pdf</new_name>", "<reason>ok</reason>", "rambling", "more"]
+	transport = StreamingTransport(name="Stream", chunks=chunks)
+	engine = LLMEngine(transports=[transport], quiet=True, early_stop=True)
+	result = engine.rename("input.pdf", {"extension": "pdf"})
+	assert result.new_name == "Report.pdf"
+	assert "rambling" not in result.raw_text
+	assert transport.consumed == 2
+
+
+def test_sort_concurrent_merges_in_order_and_reports_failures() -> None:
+	items = [
+		SortItem(path=f"file{idx}.txt", name=f"file{idx}", ext="txt", description="notes")
+		for idx in range(6)
+	]
+	bad_prompt = build_sort_prompt(SortRequest(files=[items[2]], context=None))
+	transport = ScriptedTransport(
+		name="Sorter",
+		errors={bad_prompt: RuntimeError("boom")},
+		default_response="<category>Document</category>\n<reason>notes</reason>",
+	)
+	engine = LLMEngine(transports=[transport], quiet=True)
+	result = engine.sort(items, max_in_flight=4)
+	expected = [item.path for item in items if item.path != "file2.txt"]
+	assert list(result.assignments) == expected
+	assert result.errors == {"file2.txt": "RuntimeError: boom"}
+
+
+def test_sort_raises_when_every_item_fails() -> None:
+	item = SortItem(path="a.txt", name="a", ext="txt", description="notes")
+	transport = ScriptedTransport(name="Broken", default_error=RuntimeError("down"))
+	engine = LLMEngine(transports=[transport], quiet=True)
+	with pytest.raises(RuntimeError):
+		engine.sort([item], max_in_flight=2)
+
+
+def test_sort_batch_reasks_missing_items_individually() -> None:
+	items = [
+		SortItem(path="a.txt", name="a", ext="txt", description="notes"),
+		SortItem(path="b.jpg", name="b", ext="jpg", description="photo"),
+		SortItem(path="c.mp3", name="c", ext="mp3", description="song"),
+	]
+	batch_prompt = build_sort_batch_prompt(SortRequest(files=items, context=None))
+	single_prompt = build_sort_prompt(SortRequest(files=[items[1]], context=None))
+	batch_reply = (
+		'<item id="1"><category>Document</category><reason>notes</reason></item>'
+		'<item id="3"><category>Audio</category><reason>song</reason></item>'
+	)
+	transport = ScriptedTransport(
+		name="Batcher",
+		responses={
+			batch_prompt: batch_reply,
+			single_prompt: "<category>Image</category>\n<reason>photo</reason>",
+		},
+	)
+	engine = LLMEngine(transports=[transport], quiet=True)
+	result = engine.sort(items, batch_size=3)
+	assert result.assignments == {"a.txt": "Document", "b.jpg": "Image", "c.mp3": "Audio"}
+	assert list(result.assignments) == ["a.txt", "b.jpg", "c.mp3"]
+	assert transport.calls == [batch_prompt, single_prompt]
+
+
+def test_sort_batch_failure_only_falls_back_on_parse_or_transport_errors(
+	monkeypatch: pytest.MonkeyPatch,
+) -> None:
+	items = [
+		SortItem(path="a.txt", name="a", ext="txt", description="notes"),
+		SortItem(path="b.jpg", name="b", ext="jpg", description="photo"),
+	]
+	batch_prompt = build_sort_batch_prompt(SortRequest(files=items, context=None))
+	transport = ScriptedTransport(
+		name="Batcher",
+		errors={batch_prompt: TransportUnavailableError("batch timed out")},
+		default_response="<category>Other</category>\n<reason>fallback</reason>",
+	)
+	engine = LLMEngine(transports=[transport], quiet=True)
+	result = engine.sort(items, batch_size=2)
+	assert result.assignments == {"a.txt": "Other", "b.jpg": "Other"}
+	# a programming error is not mistaken for an unusable batch reply
+	broken = ScriptedTransport(name="Broken", default_error=KeyError("bug"))
+	with pytest.raises(KeyError):
+		LLMEngine(transports=[broken], quiet=True).sort(items, batch_size=2)
+	assert len(broken.calls) == 1
+	# a spent deadline stops the sort instead of re-asking each item
+	clock = [10.0]
+	monkeypatch.setattr(llm_engine_module.time, "monotonic", lambda: clock[0])
+	late = ScriptedTransport(name="Late", default_response="unused")
+	with pytest.raises(DeadlineExceededError):
+		LLMEngine(transports=[late], quiet=True).sort(items, batch_size=2, deadline=5.0)
+	assert late.calls == []
+
+
+def test_stem_action_rules_skip_model_for_clear_cut_stems() -> None:
+	response = "<stem_action>keep</stem_action>\n<reason>model number</reason>"
+	transport = ScriptedTransport(name="Keeper", default_response=response)
+	engine = LLMEngine(transports=[transport], quiet=True, stem_rules=True)
+	generic = engine.stem_action("IMG_0001", "beach_sunset")
+	assert generic.stem_action == "drop"
+	assert generic.source == "rules"
+	assert transport.calls == []
+	ambiguous = engine.stem_action("RX100_manual", "camera_manual")
+	assert ambiguous.stem_action == "keep"
+	assert ambiguous.source == "model"
+	assert engine.stem_action_stats() == {"rules": 1, "model": 1}
+
+
+def test_sort_by_extension_only_asks_model_about_ambiguous_files() -> None:
+	response = "<category>Document</category>\n<reason>manual</reason>"
+	transport = ScriptedTransport(name="Sorter", default_response=response)
+	engine = LLMEngine(transports=[transport], quiet=True, sort_by_extension=True)
+	items = [
+		SortItem(path="song.mp3", name="song", ext="mp3", description=""),
+		SortItem(path="notes.pdf", name="notes", ext="pdf", description="manual"),
+		SortItem(path="tool.py", name="tool", ext="py", description=""),
+	]
+	result = engine.sort(items)
+	assert list(result.assignments) == ["song.mp3", "notes.pdf", "tool.py"]
+	assert result.assignments["song.mp3"] == "Audio"
+	assert result.assignments["notes.pdf"] == "Document"
+	assert result.assignments["tool.py"] == "Code"
+	assert len(transport.calls) == 1
+	assert "notes.pdf" in transport.calls[0]
+
+
+def test_rename_with_stem_action_uses_one_call() -> None:
+	response = (
+		"<new_name>Fan Manual.pdf</new_name>\n<reason>manual</reason>\n"
+		"<stem_action>keep</stem_action>\n<stem_reason>model number</stem_reason>"
+	)
+	transport = ScriptedTransport(name="Fused", default_response=response)
+	engine = LLMEngine(transports=[transport], quiet=True)
+	rename_result, keep_result = engine.rename_with_stem_action("GV60.pdf", {"extension": "pdf"})
+	assert rename_result.new_name == "Fan-Manual.pdf"
+	assert rename_result.current_name == "GV60.pdf"
+	assert keep_result.stem_action == "keep"
+	assert len(transport.calls) == 1
+
+
+def test_rename_with_stem_action_falls_back_to_two_calls(monkeypatch: pytest.MonkeyPatch) -> None:
+	monkeypatch.setattr(llm_engine_module, "log_parse_failure", _noop_log_parse_failure)
+	rename_response = "<new_name>Fan Manual.pdf</new_name>\n<reason>manual</reason>"
+	keep_response = "<stem_action>keep</stem_action>\n<reason>model number</reason>"
+
+	@dataclass(slots=True)
+	class SplitTransport:
+		name: str = "Split"
+		calls: list[str] = field(default_factory=list)
+
+		def generate(self, prompt: str, *, purpose: str, max_tokens: int) -> str:
+			self.calls.append(purpose)
+			if purpose == "how to handle the original filename stem":
+				return keep_response
+			return rename_response
+
+	transport = SplitTransport()
+	engine = LLMEngine(transports=[transport], quiet=True)
+	rename_result, keep_result = engine.rename_with_stem_action("GV60.pdf", {"extension": "pdf"})
+	assert rename_result.new_name == "Fan-Manual.pdf"
+	assert keep_result.stem_action == "keep"
+	assert transport.calls == [
+		"filename and stem action",
+		"filename based on content",
+		"how to handle the original filename stem",
+	]
+	# the file is one model decision even though the stem was asked twice
+	assert engine.stem_action_stats() == {"rules": 0, "model": 1}
+
+
+class SlowTransport:
+	name = "Slow"
+	accepts_timeout = True
+
+	def __init__(self, clock: list[float], cost: float, reply: str | None = None) -> None:
+		self.clock = clock
+		self.cost = cost
+		self.reply = reply
+		self.timeouts: list[float | None] = []
+
+	def generate(self, prompt: str, *, purpose: str, max_tokens: int, timeout: float | None = None) -> str:
+		self.timeouts.append(timeout)
+		self.clock[0] += self.cost
+		if self.reply is None:
+			raise TransportUnavailableError("slow transport timed out")
+		return self.reply
+
+
+def test_deadline_skips_fallback_once_spent(monkeypatch: pytest.MonkeyPatch) -> None:
+	clock = [100.0]
+	monkeypatch.setattr(llm_engine_module.time, "monotonic", lambda: clock[0])
+	first = SlowTransport(clock, cost=5.0)
+	second = ScriptedTransport(name="Second", default_response="late")
+	engine = LLMEngine(transports=[first, second], quiet=True)
+	with pytest.raises(DeadlineExceededError) as excinfo:
+		engine.generate("hi", deadline=104.0)
+	# the transport saw the whole remaining budget and the fallback never ran
+	assert first.timeouts == [4.0]
+	assert second.calls == []
+	assert isinstance(excinfo.value.__cause__, TransportUnavailableError)
+
+
+def test_deadline_passes_remaining_time_and_skips_format_fix(monkeypatch: pytest.MonkeyPatch) -> None:
+	monkeypatch.setattr(llm_engine_module, "log_parse_failure", _noop_log_parse_failure)
+	clock = [0.0]
+	monkeypatch.setattr(llm_engine_module.time, "monotonic", lambda: clock[0])
+	transport = SlowTransport(clock, cost=3.0, reply="no tags here")
+	engine = LLMEngine(transports=[transport], quiet=True)
+	with pytest.raises(DeadlineExceededError):
+		engine.rename("scan.pdf", {"extension": "pdf"}, deadline=2.0)
+	assert transport.timeouts == [2.0]
+	# without a deadline the format fix retry still runs
+	clock[0] = 0.0
+	transport.timeouts.clear()
+	with pytest.raises(ParseError):
+		engine.rename("scan.pdf", {"extension": "pdf"})
+	assert len(transport.timeouts) > 1
+	assert transport.timeouts[0] is None
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tests for hedged structured requests.
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import threading
+
+# local repo modules
+from local_llm_wrapper.llm_engine import LLMEngine
+from local_llm_wrapper.llm_hedge import HedgePolicy
+
+#============================================
+
+
+RENAME_REPLY = "<new_name>{name}.pdf</new_name>\n<reason>manual</reason>"
+
+
+class SlowTransport:
+	def __init__(self, name: str) -> None:
+		self.name = name
+		self.release = threading.Event()
+		self.finished = threading.Event()
+
+	def generate(self, prompt: str, *, purpose: str, max_tokens: int) -> str:
+		self.release.wait(5)
+		self.finished.set()
+		return RENAME_REPLY.format(name=self.name)
+
+
+class FastTransport:
+	def __init__(self, name: str) -> None:
+		self.name = name
+		self.calls = 0
+
+	def generate(self, prompt: str, *, purpose: str, max_tokens: int) -> str:
+		self.calls += 1
+		return RENAME_REPLY.format(name=self.name)
+
+
+class StreamingSlowTransport:
+	name = "Streamer"
+
+	def __init__(self) -> None:
+		self.closed = threading.Event()
+		self.chunks_sent = 0
+
+	def generate(self, prompt: str, *, purpose: str, max_tokens: int) -> str:
+		raise AssertionError("early stop should stream")
+
+	def generate_stream(self, prompt: str, *, purpose: str, max_tokens: int):
+		try:
+			while self.chunks_sent < 200:
+				self.chunks_sent += 1
+				threading.Event().wait(0.01)
+				yield "x"
+		finally:
+			self.closed.set()
+
+
+#============================================
+
+
+def test_hedge_policy_uses_percentile_after_warmup() -> None:
+	policy = HedgePolicy(percentile=90, min_samples=5, initial_delay=3.0)
+	assert policy.delay() == 3.0
+	for latency in (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0):
+		policy.record(latency, hedge_won=False)
+	assert policy.delay() == 0.9
+	assert policy.stats()["primary_wins"] == 10
+
+
+def test_fast_primary_does_not_hedge() -> None:
+	primary = FastTransport("Primary")
+	backup = FastTransport("Backup")
+	policy = HedgePolicy(initial_delay=1.0)
+	engine = LLMEngine(transports=[primary, backup], quiet=True, hedge=policy)
+	assert engine.rename("a.pdf", {"extension": "pdf"}).new_name == "Primary.pdf"
+	assert backup.calls == 0
+	assert policy.stats()["hedged"] == 0
+
+
+def test_slow_primary_is_hedged_to_next_transport() -> None:
+	primary = SlowTransport("Primary")
+	backup = FastTransport("Backup")
+	policy = HedgePolicy(initial_delay=0.05)
+	engine = LLMEngine(transports=[primary, backup], quiet=True, hedge=policy)
+	try:
+		result = engine.rename("a.pdf", {"extension": "pdf"})
+	finally:
+		primary.release.set()
+	assert result.new_name == "Backup.pdf"
+	stats = policy.stats()
+	assert stats["hedged"] == 1
+	assert stats["hedge_wins"] == 1
+
+
+def test_losing_stream_is_closed_early() -> None:
+	primary = StreamingSlowTransport()
+	backup = FastTransport("Backup")
+	policy = HedgePolicy(initial_delay=0.05)
+	engine = LLMEngine(transports=[primary, backup], quiet=True, early_stop=True, hedge=policy)
+	result = engine.rename("a.pdf", {"extension": "pdf"})
+	assert result.new_name == "Backup.pdf"
+	assert primary.closed.wait(2)
+	assert primary.chunks_sent < 200
@@ -11,8 +11,11 @@ import pytest
 # local repo modules
 from local_llm_wrapper.llm_parsers import (
 	ParseError,
+	TagScanner,
 	parse_keep_response,
+	parse_rename_keep_response,
 	parse_rename_response,
+	parse_sort_batch_response,
 	parse_sort_response,
 	parse_tag_response,
 )
@@ -45,6 +48,23 @@ def test_parse_keep_response_invalid_action() -> None:
 		parse_keep_response(text, "abc")
 
 
+def test_parse_rename_keep_response_ok() -> None:
+	text = (
+		"<new_name>Report.pdf</new_name>\n<reason>short</reason>\n"
+		"<stem_action>Drop</stem_action>\n<stem_reason>generic label</stem_reason>"
+	)
+	rename_result, keep_result = parse_rename_keep_response(text, "IMG_0001")
+	assert rename_result.new_name == "Report.pdf"
+	assert rename_result.reason == "short"
+	assert keep_result.stem_action == "drop"
+	assert keep_result.reason == "generic label"
+
+
+def test_parse_rename_keep_response_requires_stem_action() -> None:
+	with pytest.raises(ParseError):
+		parse_rename_keep_response("<new_name>Report.pdf</new_name>\n<reason>short</reason>", "abc")
+
+
 def test_parse_sort_response_expected_path_only() -> None:
 	text = "<category>Document</category>"
 	with pytest.raises(ParseError):
@@ -67,3 +87,43 @@ def test_parse_tag_response_ok() -> None:
 def test_parse_tag_response_missing_tag() -> None:
 	with pytest.raises(ParseError):
 		parse_tag_response("<reason>nope</reason>", "answer")
+
+
+def test_tag_scanner_completes_across_split_chunks() -> None:
+	scanner = TagScanner(("new_name", "reason"))
+	chunks = ["<new_", "name>Report.pdf</new", "_name>\n<reas", "on>short</reason>", " extra"]
+	done_flags = [scanner.feed(chunk) for chunk in chunks]
+	assert done_flags == [False, False, False, True, True]
+	assert scanner.text.startswith("<new_name>Report.pdf")
+
+
+def test_tag_scanner_ignores_longer_tag_names() -> None:
+	scanner = TagScanner(("reason",))
+	assert scanner.feed("<reasoning>x</reasoning>") is False
+	assert scanner.feed("<REASON>y</REASON>") is True
+
+
+def test_parse_sort_batch_response_maps_ids_to_paths() -> None:
+	text = (
+		'<item id="2"><category>Image</category><reason>photo</reason></item>\n'
+		'<item id="1"><category>Document</category></item>\n'
+		'<item id="9"><category>Audio</category></item>'
+	)
+	result = parse_sort_batch_response(text, ["a.txt", "b.jpg", "c.mp3"])
+	assert result.assignments == {"b.jpg": "Image", "a.txt": "Document"}
+	assert result.reasons == {"b.jpg": "photo"}
+
+
+def test_parse_sort_batch_response_drops_duplicate_ids() -> None:
+	text = (
+		'<item id="1"><category>Image</category></item>'
+		'<item id="1"><category>Audio</category></item>'
+		'<item id="2"><category>Data</category></item>'
+	)
+	result = parse_sort_batch_response(text, ["a", "b"])
+	assert result.assignments == {"b": "Data"}
+
+
+def test_parse_sort_batch_response_requires_items() -> None:
+	with pytest.raises(ParseError):
+		parse_sort_batch_response("<category>Document</category>", ["a", "b"])
@@ -8,12 +8,15 @@ from __future__ import annotations
 # local repo modules
 from local_llm_wrapper.llm_prompts import (
 	KeepRequest,
+	RenameKeepRequest,
 	RenameRequest,
 	SortItem,
 	SortRequest,
 	build_format_fix_prompt,
 	build_keep_prompt,
+	build_rename_keep_prompt,
 	build_rename_prompt,
+	build_sort_batch_prompt,
 	build_sort_prompt,
 )
 
@@ -42,6 +45,20 @@ def test_build_rename_prompt_includes_fields() -> None:
 	assert "extension: pdf" in prompt
 
 
+def test_build_rename_keep_prompt_asks_for_both_answers() -> None:
+	req = RenameKeepRequest(
+		metadata={"title": "Annual Report", "extension": "pdf"},
+		current_name="IMG_0001.pdf",
+		original_stem="IMG_0001",
+		features={"generic_label": True},
+	)
+	prompt = build_rename_keep_prompt(req)
+	assert "title: Annual Report" in prompt
+	assert "original_stem: IMG_0001" in prompt
+	assert "- generic_label: True" in prompt
+	assert "<stem_reason>" in prompt
+
+
 def test_build_keep_prompt_includes_features() -> None:
 	features = {"has_letter": True, "length": 5}
 	req = KeepRequest(
@@ -62,3 +79,14 @@ def test_build_sort_prompt_includes_categories_and_file() -> None:
 	assert "Allowed categories:" in prompt
 	assert "- Document" in prompt
 	assert "path=notes.txt" in prompt
+
+
+def test_build_sort_batch_prompt_numbers_files() -> None:
+	items = [
+		SortItem(path="a.txt", name="a", ext="txt", description="notes"),
+		SortItem(path="b.jpg", name="b", ext="jpg", description="photo"),
+	]
+	prompt = build_sort_batch_prompt(SortRequest(files=items, context=None))
+	assert "id=1 | path=a.txt" in prompt
+	assert "id=2 | path=b.jpg" in prompt
+	assert '<item id="1">' in prompt
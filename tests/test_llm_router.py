@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Tests for health-aware transport routing.
+"""
+
+from __future__ import annotations
+
+# Third-Party
+import pytest
+
+# local repo modules
+import local_llm_wrapper.llm_engine as llm_engine_module
+import local_llm_wrapper.llm_router as llm_router_module
+from local_llm_wrapper.errors import (
+	DeadlineExceededError,
+	GuardrailRefusalError,
+	TransportUnavailableError,
+)
+from local_llm_wrapper.llm_engine import LLMEngine
+from local_llm_wrapper.llm_router import TransportRouter
+
+#============================================
+
+
+class FlakyTransport:
+	def __init__(self, name: str, reply: str | None = None) -> None:
+		self.name = name
+		self.reply = reply
+		self.calls = 0
+
+	def generate(self, prompt: str, *, purpose: str, max_tokens: int) -> str:
+		self.calls += 1
+		if self.reply is None:
+			raise TransportUnavailableError(f"{self.name} is down")
+		return self.reply
+
+
+class FakeClock:
+	def __init__(self) -> None:
+		self.now = 1000.0
+
+	def monotonic(self) -> float:
+		return self.now
+
+
+#============================================
+
+
+def test_router_skips_open_circuit(monkeypatch: pytest.MonkeyPatch) -> None:
+	clock = FakeClock()
+	monkeypatch.setattr(llm_router_module.time, "monotonic", clock.monotonic)
+	dead = FlakyTransport("Dead")
+	alive = FlakyTransport("Alive", reply="ok")
+	router = TransportRouter(failure_threshold=1, cooldown=30.0)
+	engine = LLMEngine(transports=[dead, alive], quiet=True, router=router)
+	for _ in range(5):
+		assert engine.generate("hi") == "ok"
+	# the first failure opens the circuit, after which the dead transport is skipped
+	assert dead.calls == 1
+	assert router.stats()["Dead"]["state"] == "open"
+
+
+def test_router_demotes_failing_transport_before_circuit_opens() -> None:
+	flaky = FlakyTransport("Flaky")
+	steady = FlakyTransport("Steady", reply="ok")
+	router = TransportRouter(failure_threshold=3)
+	engine = LLMEngine(transports=[flaky, steady], quiet=True, router=router)
+	assert engine.generate("hi") == "ok"
+	assert router.stats()["Flaky"]["state"] == "closed"
+	assert router.order([flaky, steady]) == [steady, flaky]
+
+
+def test_router_half_open_probe_closes_circuit(monkeypatch: pytest.MonkeyPatch) -> None:
+	clock = FakeClock()
+	monkeypatch.setattr(llm_router_module.time, "monotonic", clock.monotonic)
+	primary = FlakyTransport("Primary")
+	backup = FlakyTransport("Backup", reply="backup")
+	router = TransportRouter(failure_threshold=1, cooldown=30.0)
+	engine = LLMEngine(transports=[primary, backup], quiet=True, router=router)
+	assert engine.generate("hi") == "backup"
+	assert router.order([primary, backup]) == [backup]
+	clock.now += 31.0
+	primary.reply = "primary"
+	# the recovered transport gets one probe ahead of the healthy one
+	assert engine.generate("hi") == "primary"
+	assert router.stats()["Primary"]["state"] == "closed"
+
+
+def test_router_failed_probe_reopens_and_all_open_raises(monkeypatch: pytest.MonkeyPatch) -> None:
+	clock = FakeClock()
+	monkeypatch.setattr(llm_router_module.time, "monotonic", clock.monotonic)
+	only = FlakyTransport("Only")
+	router = TransportRouter(failure_threshold=1, cooldown=10.0)
+	engine = LLMEngine(transports=[only], quiet=True, router=router)
+	with pytest.raises(TransportUnavailableError):
+		engine.generate("hi")
+	with pytest.raises(TransportUnavailableError):
+		engine.generate("hi")
+	assert only.calls == 1
+	clock.now += 11.0
+	with pytest.raises(TransportUnavailableError):
+		engine.generate("hi")
+	assert only.calls == 2
+	assert router.stats()["Only"]["state"] == "open"
+
+
+def test_router_prefers_lower_latency_and_ignores_refusals() -> None:
+	slow = FlakyTransport("Slow", reply="slow")
+	fast = FlakyTransport("Fast", reply="fast")
+	router = TransportRouter(failure_threshold=1)
+	router.record_success(slow, 2.0)
+	router.record_success(fast, 0.1)
+	assert router.order([slow, fast]) == [fast, slow]
+	router.record_failure(fast, GuardrailRefusalError("unsafe guardrail"))
+	assert router.stats()["Fast"]["state"] == "closed"
+	assert router.order([slow, fast]) == [fast, slow]
+
+
+def test_router_keeps_measured_primary_ahead_of_untried_fallback() -> None:
+	primary = FlakyTransport("Primary", reply="primary")
+	backup = FlakyTransport("Backup", reply="backup")
+	router = TransportRouter()
+	engine = LLMEngine(transports=[primary, backup], quiet=True, router=router)
+	for _ in range(3):
+		assert engine.generate("hi") == "primary"
+	assert backup.calls == 0
+	# measured primary at 10 ms stays ahead of a backup that was never tried
+	router = TransportRouter()
+	router.record_success(primary, 0.010)
+	assert router.order([primary, backup]) == [primary, backup]
+	# once both are measured, latency decides
+	router.record_success(backup, 0.001)
+	assert router.order([primary, backup]) == [backup, primary]
+
+
+def test_router_ignores_timeouts_from_a_spent_deadline(monkeypatch: pytest.MonkeyPatch) -> None:
+	clock = FakeClock()
+	monkeypatch.setattr(llm_engine_module.time, "monotonic", clock.monotonic)
+
+	class DeadlineBoundTransport(FlakyTransport):
+		accepts_timeout = True
+
+		def generate(self, prompt: str, *, purpose: str, max_tokens: int, timeout: float | None = None) -> str:
+			# the socket gives up exactly when the caller's budget runs out
+			clock.now += timeout
+			raise TransportUnavailableError("timed out")
+
+	slow = DeadlineBoundTransport("Slow")
+	backup = FlakyTransport("Backup", reply="late")
+	router = TransportRouter(failure_threshold=1)
+	engine = LLMEngine(transports=[slow, backup], quiet=True, router=router)
+	with pytest.raises(DeadlineExceededError):
+		engine.generate("hi", deadline=clock.now + 0.5)
+	assert backup.calls == 0
+	assert router.stats()["Slow"]["state"] == "closed"
+	assert router.stats()["Slow"]["error_rate"] == 0.0
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Tests for single-flight coalescing of identical requests.
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import time
+import asyncio
+import threading
+import concurrent.futures
+
+# Third-Party
+import pytest
+
+# local repo modules
+from local_llm_wrapper.errors import DeadlineExceededError, TransportUnavailableError
+from local_llm_wrapper.llm_engine import LLMEngine
+from local_llm_wrapper.llm_singleflight import SingleFlight
+
+#============================================
+
+
+class GatedTransport:
+	name = "Gated"
+
+	def __init__(self, reply: str) -> None:
+		self.reply = reply
+		self.calls = 0
+		self.started = threading.Event()
+		self.release = threading.Event()
+
+	def generate(self, prompt: str, *, purpose: str, max_tokens: int) -> str:
+		self.calls += 1
+		self.started.set()
+		self.release.wait(timeout=5)
+		return self.reply
+
+
+def _wait_for_waiters(flight: SingleFlight, count: int) -> None:
+	for _ in range(500):
+		if flight.stats()["coalesced"] >= count:
+			return
+		threading.Event().wait(0.01)
+
+
+#============================================
+
+
+def test_single_flight_shares_one_call() -> None:
+	transport = GatedTransport("<stem_action>drop</stem_action>\n<reason>generic label</reason>")
+	flight = SingleFlight()
+	engine = LLMEngine(transports=[transport], quiet=True, single_flight=flight)
+	with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+		futures = [
+			executor.submit(engine.stem_action, "IMG_1234", "Beach-Photo.jpg", "jpg")
+			for _ in range(4)
+		]
+		transport.started.wait(timeout=5)
+		_wait_for_waiters(flight, 3)
+		transport.release.set()
+		results = [future.result() for future in futures]
+	assert transport.calls == 1
+	assert {result.stem_action for result in results} == {"drop"}
+	assert len({id(result) for result in results}) == 4
+	assert flight.stats() == {"leaders": 1, "coalesced": 3, "rerun": 0, "in_flight": 0}
+
+
+def test_single_flight_shares_exceptions() -> None:
+	flight = SingleFlight()
+
+	def _fail() -> object:
+		raise RuntimeError("down")
+
+	with pytest.raises(RuntimeError):
+		flight.do("key", _fail)
+	assert flight.stats()["in_flight"] == 0
+
+
+def test_single_flight_waiters_stop_at_their_deadline() -> None:
+	flight = SingleFlight()
+	started = threading.Event()
+	release = threading.Event()
+
+	def _slow() -> str:
+		started.set()
+		release.wait(timeout=5)
+		return "done"
+
+	with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+		leader = executor.submit(flight.do, "key", _slow)
+		started.wait(timeout=5)
+		with pytest.raises(DeadlineExceededError):
+			flight.do("key", _slow, time.monotonic() + 0.05)
+
+		async def _await_waiter() -> None:
+			await flight.ado("key", _slow, time.monotonic() + 0.05)
+
+		with pytest.raises(DeadlineExceededError):
+			asyncio.run(_await_waiter())
+		# the leader keeps running for everyone else
+		release.set()
+		assert leader.result(timeout=5) == "done"
+	assert flight.stats() == {"leaders": 1, "coalesced": 2, "rerun": 0, "in_flight": 0}
+
+
+class DeadlineBoundTransport:
+	name = "DeadlineBound"
+	accepts_timeout = True
+
+	def __init__(self, seconds: float) -> None:
+		self.seconds = seconds
+		self.timeouts: list[float | None] = []
+		self.started = threading.Event()
+
+	def generate(self, prompt: str, *, purpose: str, max_tokens: int, timeout: float | None = None) -> str:
+		self.timeouts.append(timeout)
+		self.started.set()
+		if timeout is not None and timeout < self.seconds:
+			time.sleep(timeout)
+			raise TransportUnavailableError("timed out")
+		time.sleep(self.seconds)
+		return "<new_name>Scan.pdf</new_name>\n<reason>ok</reason>"
+
+
+def test_single_flight_reruns_for_waiters_with_more_time() -> None:
+	transport = DeadlineBoundTransport(0.3)
+	flight = SingleFlight()
+	engine = LLMEngine(transports=[transport], quiet=True, single_flight=flight)
+	metadata = {"extension": "pdf"}
+	with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+		short = executor.submit(engine.rename, "a.pdf", metadata, deadline=time.monotonic() + 0.1)
+		transport.started.wait(timeout=5)
+		# the waiter has no deadline, so the leader's timeout is not its failure
+		result = engine.rename("a.pdf", metadata)
+		with pytest.raises((DeadlineExceededError, TransportUnavailableError)):
+			short.result(timeout=5)
+	assert result.new_name == "Scan.pdf"
+	assert transport.timeouts[0] is not None and transport.timeouts[-1] is None
+	assert flight.stats() == {"leaders": 2, "coalesced": 1, "rerun": 1, "in_flight": 0}
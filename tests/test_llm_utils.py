@@ -57,6 +57,36 @@ def test_compute_stem_features_basic() -> None:
 	assert features["is_numeric_only"] is False
 
 
+def test_stem_rules_drop_clear_cut_stems() -> None:
+	uuid_stem = "123e4567-e89b-12d3-a456-426614174000"
+	for stem in (uuid_stem, "IMG_0001", "1712345678901", "9f86d081884c7d65"):
+		decided = llm_utils.decide_stem_action_by_rules(llm_utils.compute_stem_features(stem, "x"))
+		assert decided is not None
+		assert decided[0] == "drop"
+
+
+def test_stem_rules_leave_ambiguous_stems_to_model() -> None:
+	for stem in ("quarterly_report", "20240101", "RX-100 manual", "deadbeef"):
+		features = llm_utils.compute_stem_features(stem, "x")
+		assert llm_utils.decide_stem_action_by_rules(features) is None
+
+
+def test_stem_rules_keep_words_with_years_out_of_hash_rule() -> None:
+	for stem in ("facade2024", "cafe2019", "decade1990", "Beef2010", "added2023", "acceded1"):
+		features = llm_utils.compute_stem_features(stem, "x")
+		assert llm_utils.decide_stem_action_by_rules(features) is None
+	sha1 = "da39a3ee5e6b4b0d3255bfef95601890afd80709"
+	decided = llm_utils.decide_stem_action_by_rules(llm_utils.compute_stem_features(sha1, "x"))
+	assert decided == ("drop", "stem is a hex hash with no words")
+
+
+def test_confident_category_only_for_unambiguous_extensions() -> None:
+	assert llm_utils.confident_category("mp3") == "Audio"
+	assert llm_utils.confident_category(".PY") == "Code"
+	for ext in ("pdf", "txt", "html", "xlsx", "zip", ""):
+		assert llm_utils.confident_category(ext) is None
+
+
 def test_choose_model_override_wins(monkeypatch: pytest.MonkeyPatch) -> None:
 	monkeypatch.setattr(llm_utils, "get_vram_size_in_gb", lambda: 0)
 	monkeypatch.setattr(llm_utils, "total_ram_bytes", lambda: 0)
@@ -67,3 +97,113 @@ def test_choose_model_prefers_vram(monkeypatch: pytest.MonkeyPatch) -> None:
 	monkeypatch.setattr(llm_utils, "get_vram_size_in_gb", lambda: 32)
 	monkeypatch.setattr(llm_utils, "total_ram_bytes", lambda: 0)
 	assert llm_utils.choose_model(None) == "gpt-oss:20b"
+
+
+def test_apple_availability_probe_is_cached_until_invalidated(monkeypatch: pytest.MonkeyPatch) -> None:
+	calls: list[int] = []
+
+	def _fake_probe() -> str | None:
+		calls.append(1)
+		return "Apple Intelligence requires Apple Silicon (arm64)."
+
+	monkeypatch.setattr(llm_utils, "_probe_apple_intelligence", _fake_probe)
+	llm_utils.invalidate_apple_availability()
+	try:
+		assert llm_utils.apple_models_available() is False
+		assert llm_utils.apple_unavailable_reason() == "Apple Intelligence requires Apple Silicon (arm64)."
+		assert len(calls) == 1
+		# a zero ttl always probes again
+		llm_utils.apple_unavailable_reason(ttl=0)
+		assert len(calls) == 2
+		llm_utils.invalidate_apple_availability()
+		llm_utils.apple_models_available()
+		assert len(calls) == 3
+	finally:
+		llm_utils.invalidate_apple_availability()
+
+
+def test_apple_transport_uses_shared_availability_probe(monkeypatch: pytest.MonkeyPatch) -> None:
+	from local_llm_wrapper.errors import TransportUnavailableError
+	from local_llm_wrapper.transports.apple import AppleTransport
+
+	calls: list[int] = []
+
+	def _fake_probe() -> str | None:
+		calls.append(1)
+		return "not enabled"
+
+	monkeypatch.setattr(llm_utils, "_probe_apple_intelligence", _fake_probe)
+	llm_utils.invalidate_apple_availability()
+	try:
+		transport = AppleTransport()
+		for _ in range(3):
+			with pytest.raises(TransportUnavailableError, match="not enabled"):
+				transport.generate("hi", purpose="test", max_tokens=8)
+		assert llm_utils.apple_models_available() is False
+		assert len(calls) == 1
+	finally:
+		llm_utils.invalidate_apple_availability()
+
+
+def test_detect_hardware_caches_in_process_and_on_disk(monkeypatch: pytest.MonkeyPatch, tmp_path) -> None:
+	probes: list[int] = []
+
+	def _fake_detect() -> dict[str, int | None]:
+		probes.append(1)
+		return {"vram_gb": 16, "ram_bytes": 32 * 1024 * 1024 * 1024}
+
+	monkeypatch.setattr(llm_utils, "_detect_hardware", _fake_detect)
+	cache_path = str(tmp_path / "hardware.json")
+	llm_utils.invalidate_hardware_cache()
+	try:
+		assert llm_utils.detect_hardware(cache_path)["vram_gb"] == 16
+		assert llm_utils.get_vram_size_in_gb() == 16
+		assert len(probes) == 1
+		# a new process would find the persisted probe
+		llm_utils.invalidate_hardware_cache()
+		assert llm_utils.choose_model(None, cache_path=cache_path) == "phi4:14b-q4_K_M"
+		assert len(probes) == 1
+		# a stale file is probed again
+		llm_utils.invalidate_hardware_cache()
+		llm_utils.detect_hardware(cache_path, max_age=0)
+		assert len(probes) == 2
+	finally:
+		llm_utils.invalidate_hardware_cache()
+
+
+def test_detect_hardware_on_linux_skips_subprocess(monkeypatch: pytest.MonkeyPatch) -> None:
+	def _no_spawn(*args, **kwargs):
+		raise AssertionError("hardware probe should not spawn a process on Linux")
+
+	monkeypatch.setattr(llm_utils.subprocess, "check_output", _no_spawn)
+	monkeypatch.setattr(llm_utils.sys, "platform", "linux")
+	monkeypatch.setattr(llm_utils, "_meminfo_total_bytes", lambda: 8 * 1024 * 1024 * 1024)
+	llm_utils.invalidate_hardware_cache()
+	try:
+		hardware = llm_utils.detect_hardware()
+	finally:
+		llm_utils.invalidate_hardware_cache()
+	assert hardware == {"vram_gb": None, "ram_bytes": 8 * 1024 * 1024 * 1024}
+
+
+@pytest.mark.parametrize(
+	"machine, output, expected",
+	[
+		# Apple Silicon: unified memory from SPHardwareDataType
+		("arm64", "      Chip: Apple M2 Pro\n      Memory: 16 GB\n", "phi4:14b-q4_K_M"),
+		# Intel Mac: discrete VRAM from SPDisplaysDataType wins over 64 GB of RAM
+		("x86_64", "      VRAM (Total): 8192 MB\n", "llama3.2:3b-instruct-q5_K_M"),
+	],
+)
+def test_choose_model_reads_system_profiler_memory(
+	monkeypatch: pytest.MonkeyPatch, machine: str, output: str, expected: str
+) -> None:
+	monkeypatch.setattr(llm_utils.sys, "platform", "darwin")
+	monkeypatch.setattr(llm_utils.platform, "machine", lambda: machine)
+	monkeypatch.setattr(llm_utils.subprocess, "check_output", lambda *args, **kwargs: output)
+	monkeypatch.setattr(llm_utils, "_sysconf_total_bytes", lambda: 64 * 1024 * 1024 * 1024)
+	llm_utils.invalidate_hardware_cache()
+	try:
+		assert llm_utils.choose_model(None) == expected
+	finally:
+		llm_utils.invalidate_hardware_cache()
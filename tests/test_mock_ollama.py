@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Tests for the offline mock Ollama server.
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import json
+
+# Third-Party
+import pytest
+
+# local repo modules
+from local_llm_wrapper.errors import TransportUnavailableError
+from local_llm_wrapper.llm_engine import LLMEngine
+from local_llm_wrapper.llm_prompts import SortItem
+from local_llm_wrapper.mock_ollama import (
+	DEFAULT_TEXT_REPLY,
+	FAIL_EMPTY,
+	FAIL_ERROR_500,
+	FAIL_TIMEOUT,
+	MockOllamaConfig,
+	MockOllamaServer,
+)
+from local_llm_wrapper.transports.http_pool import HTTPConnectionPool
+from local_llm_wrapper.transports.ollama import OllamaTransport
+
+#============================================
+
+
+@pytest.fixture
+def mock_server():
+	config = MockOllamaConfig(models=["tiny"], tokens_per_second=2000.0, hang_seconds=5.0)
+	with MockOllamaServer(config) as server:
+		yield server
+
+
+def _transport(server: MockOllamaServer) -> OllamaTransport:
+	pool = HTTPConnectionPool(server.base_url)
+	return OllamaTransport(model="tiny", base_url=server.base_url, pool=pool)
+
+
+#============================================
+
+
+def test_mock_serves_canned_xml_to_engine(mock_server) -> None:
+	transport = _transport(mock_server)
+	engine = LLMEngine(transports=[transport], quiet=True, sort_batch_size=3)
+	result = engine.rename("scan.pdf", {"extension": "pdf"})
+	assert result.new_name == "GV60_MAX_Fan_Manual_2015.pdf"
+	items = [SortItem(path=f"f{idx}.bin", name=f"f{idx}", ext="bin", description="") for idx in range(3)]
+	sorted_result = engine.sort(items)
+	assert set(sorted_result.assignments.values()) == {"Document"}
+	assert transport.usage_stats()["filename based on content"]["completion_tokens"] > 0
+	transport.pool.close()
+
+
+def test_mock_streams_ndjson_and_reports_loaded_model(mock_server) -> None:
+	transport = _transport(mock_server)
+	chunks = list(transport.generate_stream("hello", purpose="test", max_tokens=8))
+	assert len(chunks) > 1
+	assert "".join(chunks) == DEFAULT_TEXT_REPLY
+	assert transport.loaded_models() == ["tiny:latest"]
+	transport.pool.close()
+
+
+def test_mock_generate_and_tags_endpoints(mock_server) -> None:
+	pool = HTTPConnectionPool(mock_server.base_url)
+	body = json.dumps({"model": "tiny", "prompt": "hi", "stream": False}).encode("utf-8")
+	status, raw = pool.request("POST", "/api/generate", body=body)
+	assert status == 200
+	reply = json.loads(raw)
+	assert reply["response"] == DEFAULT_TEXT_REPLY
+	assert reply["eval_count"] > 0
+	status, raw = pool.request("GET", "/api/tags")
+	assert json.loads(raw)["models"][0]["name"] == "tiny"
+	pool.close()
+
+
+def test_mock_injects_failures(mock_server) -> None:
+	transport = _transport(mock_server)
+	mock_server.fail_next(FAIL_ERROR_500)
+	with pytest.raises(TransportUnavailableError, match="status 500"):
+		transport.generate("hi", purpose="test", max_tokens=8)
+	mock_server.fail_next(FAIL_EMPTY)
+	with pytest.raises(RuntimeError, match="empty content"):
+		transport.generate("hi", purpose="test", max_tokens=8)
+	mock_server.fail_next(FAIL_TIMEOUT)
+	with pytest.raises(TransportUnavailableError):
+		transport.generate("hi", purpose="test", max_tokens=8, timeout=0.2)
+	assert transport.generate("hi", purpose="test", max_tokens=8) == DEFAULT_TEXT_REPLY
+	stats = mock_server.stats()
+	assert stats["failure_error_500"] == 1
+	assert stats["failure_timeout"] == 1
+	transport.pool.close()
+
+
+def test_mock_failure_rate_is_seeded() -> None:
+	config = MockOllamaConfig(failure_rate=1.0, failure_modes=(FAIL_ERROR_500,), seed=7)
+	with MockOllamaServer(config) as server:
+		transport = OllamaTransport(
+			model="mock", base_url=server.base_url, pool=HTTPConnectionPool(server.base_url)
+		)
+		with pytest.raises(TransportUnavailableError):
+			transport.generate("hi", purpose="test", max_tokens=8)
+		transport.pool.close()
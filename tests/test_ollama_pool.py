@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Tests for the multi-host Ollama pool transport.
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import time
+import asyncio
+import threading
+
+# Third-Party
+import pytest
+
+# local repo modules
+import local_llm_wrapper.transports.ollama_pool as ollama_pool_module
+from local_llm_wrapper.errors import DeadlineExceededError, TransportUnavailableError
+from local_llm_wrapper.llm_engine import LLMEngine
+from local_llm_wrapper.transports.ollama_pool import OllamaPoolTransport
+
+#============================================
+
+
+class FakeHost:
+	def __init__(self, base_url: str, loaded: list[str] | None = None, down: bool = False) -> None:
+		self.base_url = base_url
+		self.loaded = loaded or []
+		self.down = down
+		self.calls = 0
+		self.gate: threading.Event | None = None
+		self.entered = threading.Event()
+		self.timeouts: list[float | None] = []
+		self.probe_gate: threading.Event | None = None
+
+	def loaded_models(self) -> list[str]:
+		if self.probe_gate is not None:
+			self.probe_gate.wait(5)
+		return self.loaded
+
+	def generate(self, prompt: str, *, purpose: str, max_tokens: int, timeout: float | None = None) -> str:
+		self.calls += 1
+		self.timeouts.append(timeout)
+		if self.down:
+			raise TransportUnavailableError("Ollama is unreachable.")
+		self.entered.set()
+		if self.gate is not None:
+			self.gate.wait(5)
+		return self.base_url
+
+	def generate_stream(self, prompt: str, *, purpose: str, max_tokens: int):
+		self.calls += 1
+		if self.down:
+			raise TransportUnavailableError("Ollama is unreachable.")
+		yield self.base_url
+
+	async def agenerate(self, prompt: str, *, purpose: str, max_tokens: int) -> str:
+		self.calls += 1
+		return self.base_url
+
+
+def _wait_until(check, timeout: float = 2.0) -> bool:
+	deadline = time.monotonic() + timeout
+	while time.monotonic() < deadline:
+		if check():
+			return True
+		time.sleep(0.01)
+	return check()
+
+
+#============================================
+
+
+def test_pool_prefers_host_with_model_loaded() -> None:
+	cold = FakeHost("cold")
+	warm = FakeHost("warm", loaded=["tiny:latest"])
+	pool = OllamaPoolTransport("tiny", [cold, warm])
+	pool.refresh_loaded()
+	for _ in range(3):
+		assert pool.generate("hi", purpose="test", max_tokens=8) == "warm"
+	assert cold.calls == 0
+	assert pool.host_stats()[1]["loaded"] is True
+
+
+def test_pool_least_outstanding_spreads_concurrent_requests() -> None:
+	first = FakeHost("first")
+	second = FakeHost("second")
+	first.gate = threading.Event()
+	pool = OllamaPoolTransport("tiny", [first, second], spill_after=1)
+	results: list[str] = []
+	worker = threading.Thread(
+		target=lambda: results.append(pool.generate("hi", purpose="test", max_tokens=8))
+	)
+	worker.start()
+	assert first.entered.wait(2)
+	# the first host is busy, so the next request goes to the idle one
+	assert pool.generate("hi", purpose="test", max_tokens=8) == "second"
+	first.gate.set()
+	worker.join(2)
+	assert results == ["first"]
+	assert [host["outstanding"] for host in pool.host_stats()] == [0, 0]
+
+
+def test_pool_weighted_round_robin_follows_weights() -> None:
+	heavy = FakeHost("heavy", loaded=["tiny"])
+	light = FakeHost("light", loaded=["tiny"])
+	pool = OllamaPoolTransport("tiny", [heavy, light], weights=[3, 1], strategy="weighted")
+	picks = [pool.generate("hi", purpose="test", max_tokens=8) for _ in range(8)]
+	assert picks.count("heavy") == 6
+	assert picks.count("light") == 2
+
+
+def test_pool_skips_unreachable_host_and_works_with_engine() -> None:
+	down = FakeHost("down", down=True)
+	up = FakeHost("up")
+	pool = OllamaPoolTransport("tiny", [down, up])
+	engine = LLMEngine(transports=[pool], quiet=True)
+	assert engine.generate("hi") == "up"
+	assert list(pool.generate_stream("hi", purpose="test", max_tokens=8)) == ["up"]
+	assert pool.host_stats()[0]["failures"] >= 1
+
+
+def test_pool_raises_when_every_host_is_down() -> None:
+	pool = OllamaPoolTransport("tiny", [FakeHost("a", down=True), FakeHost("b", down=True)])
+	with pytest.raises(TransportUnavailableError):
+		pool.generate("hi", purpose="test", max_tokens=8)
+
+
+def test_pool_rejects_bad_configuration() -> None:
+	with pytest.raises(ValueError):
+		OllamaPoolTransport("tiny", [])
+	with pytest.raises(ValueError):
+		OllamaPoolTransport("tiny", ["http://a:1"], weights=[1, 2])
+	with pytest.raises(ValueError):
+		OllamaPoolTransport("tiny", ["http://a:1"], strategy="random")
+
+
+def test_pool_forwards_timeout_to_failover_host() -> None:
+	down = FakeHost("down", down=True)
+	up = FakeHost("up")
+	pool = OllamaPoolTransport("tiny", [down, up])
+	assert pool.generate("hi", purpose="test", max_tokens=8, timeout=2.5) == "up"
+	assert 0.0 < down.timeouts[0] <= 2.5
+	assert 0.0 < up.timeouts[0] <= down.timeouts[0]
+
+
+def test_pool_splits_one_deadline_across_failing_hosts(monkeypatch: pytest.MonkeyPatch) -> None:
+	clock = [100.0]
+	monkeypatch.setattr(ollama_pool_module.time, "monotonic", lambda: clock[0])
+
+	class TimingOutHost(FakeHost):
+		def generate(self, prompt: str, *, purpose: str, max_tokens: int, timeout: float | None = None) -> str:
+			self.timeouts.append(timeout)
+			# each host burns a quarter second before its socket gives up
+			clock[0] += min(0.25, timeout)
+			raise TransportUnavailableError("timed out")
+
+	hosts = [TimingOutHost("a"), TimingOutHost("b"), TimingOutHost("c")]
+	pool = OllamaPoolTransport("tiny", hosts)
+	with pytest.raises(DeadlineExceededError) as excinfo:
+		pool.generate("hi", purpose="test", max_tokens=8, timeout=0.3)
+	# the second host only got what the first left over, and the third none
+	assert [host.timeouts for host in hosts] == [[pytest.approx(0.3)], [pytest.approx(0.05)], []]
+	assert isinstance(excinfo.value.__cause__, TransportUnavailableError)
+
+
+def test_pool_probes_loaded_models_off_the_request_path() -> None:
+	host = FakeHost("slow", loaded=["tiny"])
+	host.probe_gate = threading.Event()
+	pool = OllamaPoolTransport("tiny", [host])
+	assert pool.name != "Ollama"
+	# the /api/ps probe is stuck, yet requests are answered right away
+	assert pool.generate("hi", purpose="test", max_tokens=8) == "slow"
+	assert asyncio.run(pool.agenerate("hi", purpose="test", max_tokens=8)) == "slow"
+	assert pool.host_stats()[0]["loaded"] is False
+	host.probe_gate.set()
+	assert _wait_until(lambda: pool.host_stats()[0]["loaded"])
@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+Tests for the Ollama transport and its HTTP connection pool.
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import json
+import time
+import asyncio
+import threading
+import http.server
+
+# Third-Party
+import pytest
+
+# local repo modules
+import local_llm_wrapper.transports.admission as admission_module
+from local_llm_wrapper.errors import DeadlineExceededError, TransportUnavailableError
+from local_llm_wrapper.llm_engine import LLMEngine
+from local_llm_wrapper.mock_ollama import FAIL_ERROR_500, MockOllamaConfig, MockOllamaServer
+from local_llm_wrapper.transports.admission import AdmissionController
+from local_llm_wrapper.transports.http_pool import HTTPConnectionPool
+from local_llm_wrapper.transports.ollama import OllamaTransport
+from local_llm_wrapper.transports.usage import UsageTracker, usage_from_ollama
+
+#============================================
+
+
+# counters as Ollama reports them; durations are nanoseconds
+USAGE_FIELDS = {
+	"prompt_eval_count": 40,
+	"eval_count": 10,
+	"total_duration": 2_500_000_000,
+	"load_duration": 1_000_000_000,
+	"prompt_eval_duration": 500_000_000,
+	"eval_duration": 1_000_000_000,
+}
+
+
+class ChatHandler(http.server.BaseHTTPRequestHandler):
+	protocol_version = "HTTP/1.1"
+
+	def do_POST(self) -> None:
+		length = int(self.headers.get("Content-Length", "0"))
+		payload = json.loads(self.rfile.read(length).decode("utf-8"))
+		self.server.payloads.append(payload)
+		self.server.ports.add(self.client_address[1])
+		if payload.get("stream"):
+			self._send_stream(["po", "ng"])
+			return
+		reply = {"message": {"role": "assistant", "content": "pong"}, "done": True, **USAGE_FIELDS}
+		body = json.dumps(reply).encode("utf-8")
+		self.send_response(200)
+		self.send_header("Content-Type", "application/json")
+		self.send_header("Content-Length", str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def _send_stream(self, parts: list[str]) -> None:
+		self.send_response(200)
+		self.send_header("Content-Type", "application/x-ndjson")
+		self.send_header("Transfer-Encoding", "chunked")
+		self.end_headers()
+		lines = [{"message": {"content": part}, "done": False} for part in parts]
+		lines.append({"message": {"content": ""}, "done": True, **USAGE_FIELDS})
+		try:
+			for item in lines:
+				data = (json.dumps(item) + "\n").encode("utf-8")
+				self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+			self.wfile.write(b"0\r\n\r\n")
+		except (BrokenPipeError, ConnectionResetError):
+			# tests that stop reading early close the socket mid-stream
+			self.close_connection = True
+
+	def log_message(self, format: str, *args) -> None:
+		return None
+
+
+@pytest.fixture
+def chat_server():
+	server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), ChatHandler)
+	server.payloads = []
+	server.ports = set()
+	thread = threading.Thread(
+		target=server.serve_forever,
+		kwargs={"poll_interval": 0.05},
+		daemon=True,
+	)
+	thread.start()
+	yield server
+	server.shutdown()
+	server.server_close()
+
+
+def _base_url(server: http.server.ThreadingHTTPServer) -> str:
+	host, port = server.server_address[:2]
+	return f"http://{host}:{port}"
+
+
+#============================================
+
+
+def test_pool_reuses_connection(chat_server) -> None:
+	pool = HTTPConnectionPool(_base_url(chat_server), max_size=2)
+	for _ in range(3):
+		status, body = pool.request("POST", "/api/chat", body=b"{}")
+		assert status == 200
+		assert b"pong" in body
+	stats = pool.stats()
+	assert stats["misses"] == 1
+	assert stats["hits"] == 2
+	assert len(chat_server.ports) == 1
+	pool.close()
+
+
+def test_pool_caps_idle_connections(chat_server) -> None:
+	pool = HTTPConnectionPool(_base_url(chat_server), max_size=1)
+	conn_a, _ = pool.acquire()
+	conn_b, _ = pool.acquire()
+	pool.release(conn_a)
+	pool.release(conn_b)
+	stats = pool.stats()
+	assert stats["idle"] == 1
+	assert stats["discarded"] == 1
+	pool.close()
+
+
+def test_pool_rejects_unknown_scheme() -> None:
+	with pytest.raises(ValueError):
+		HTTPConnectionPool("ftp://localhost")
+
+
+def test_transport_uses_pool(chat_server) -> None:
+	pool = HTTPConnectionPool(_base_url(chat_server))
+	transport = OllamaTransport(model="tiny", base_url=_base_url(chat_server), pool=pool)
+	assert transport.generate("ping", purpose="test", max_tokens=8) == "pong"
+	assert transport.generate("ping", purpose="test", max_tokens=8) == "pong"
+	assert chat_server.payloads[0]["messages"][-1]["content"] == "ping"
+	assert transport.pool_stats()["hits"] == 1
+	pool.close()
+
+
+def test_transport_streams_ndjson_chunks(chat_server) -> None:
+	pool = HTTPConnectionPool(_base_url(chat_server))
+	transport = OllamaTransport(model="tiny", base_url=_base_url(chat_server), pool=pool)
+	chunks = list(transport.generate_stream("ping", purpose="test", max_tokens=8))
+	assert chunks == ["po", "ng"]
+	assert chat_server.payloads[0]["stream"] is True
+	# a fully consumed stream returns its connection to the pool
+	assert transport.generate("ping", purpose="test", max_tokens=8) == "pong"
+	assert pool.stats()["hits"] == 1
+	pool.close()
+
+
+def test_transport_stream_closed_early_discards_connection(chat_server) -> None:
+	pool = HTTPConnectionPool(_base_url(chat_server))
+	transport = OllamaTransport(model="tiny", base_url=_base_url(chat_server), pool=pool)
+	stream = transport.generate_stream("ping", purpose="test", max_tokens=8)
+	assert next(stream) == "po"
+	stream.close()
+	stats = pool.stats()
+	assert stats["idle"] == 0
+	assert stats["discarded"] == 1
+	pool.close()
+
+
+def test_transport_agenerate_reuses_async_connection(chat_server) -> None:
+	transport = OllamaTransport(model="tiny", base_url=_base_url(chat_server))
+
+	async def _run() -> list[str]:
+		first = await transport.agenerate("ping", purpose="test", max_tokens=8)
+		second = await transport.agenerate("ping", purpose="test", max_tokens=8)
+		return [first, second]
+
+	assert asyncio.run(_run()) == ["pong", "pong"]
+	stats = transport.async_pool.stats()
+	assert stats["misses"] == 1
+	assert stats["hits"] == 1
+	transport.async_pool.close()
+
+
+def test_admission_default_adds_no_delay(monkeypatch: pytest.MonkeyPatch) -> None:
+	slept: list[float] = []
+	monkeypatch.setattr(admission_module.time, "sleep", slept.append)
+	controller = AdmissionController()
+	for _ in range(5):
+		with controller.admit():
+			pass
+	assert slept == []
+	assert controller.stats()["throttled"] == 0
+
+
+def test_admission_token_bucket_throttles_past_burst(monkeypatch: pytest.MonkeyPatch) -> None:
+	slept: list[float] = []
+	monkeypatch.setattr(admission_module.time, "monotonic", lambda: 100.0)
+	monkeypatch.setattr(admission_module.time, "sleep", slept.append)
+	controller = AdmissionController(rate_per_second=2.0, burst=2)
+	for _ in range(4):
+		with controller.admit():
+			pass
+	# two tokens in the bucket, then one token every half second
+	assert slept == [0.5, 1.0]
+	assert controller.stats()["throttled"] == 2
+
+
+def test_admission_caps_in_flight_requests() -> None:
+	controller = AdmissionController(max_in_flight=1)
+	entered = threading.Event()
+	release = threading.Event()
+	order: list[str] = []
+
+	def _holder() -> None:
+		with controller.admit():
+			entered.set()
+			release.wait(2)
+			order.append("first")
+
+	thread = threading.Thread(target=_holder)
+	thread.start()
+	entered.wait(2)
+
+	async def _second() -> None:
+		async with controller.admit_async():
+			order.append("second")
+
+	release_timer = threading.Timer(0.05, release.set)
+	release_timer.start()
+	asyncio.run(_second())
+	thread.join(2)
+	assert order == ["first", "second"]
+	assert controller.stats()["throttled"] == 1
+
+
+def test_admission_waits_stop_at_the_timeout(monkeypatch: pytest.MonkeyPatch) -> None:
+	slept: list[float] = []
+	monkeypatch.setattr(admission_module.time, "sleep", slept.append)
+	bucket = AdmissionController(rate_per_second=1.0, burst=1)
+	with bucket.admit(2.0) as remaining:
+		assert 0.0 < remaining <= 2.0
+	# the next token is a second away, so a half-second budget fails at once
+	with pytest.raises(DeadlineExceededError):
+		with bucket.admit(0.5):
+			pass
+	assert slept == []
+	# the refused request handed its token back
+	with bucket.admit(5.0):
+		pass
+	assert len(slept) == 1 and slept[0] <= 1.0
+	monkeypatch.undo()
+	slots = AdmissionController(max_in_flight=1)
+	with slots.admit():
+		with pytest.raises(DeadlineExceededError):
+			with slots.admit(0.05):
+				pass
+
+		async def _second() -> None:
+			async with slots.admit_async(0.05):
+				pass
+
+		with pytest.raises(DeadlineExceededError):
+			asyncio.run(_second())
+	# failed waits do not leak the slot
+	with slots.admit(0.05):
+		pass
+
+
+def test_admission_async_waiters_park_until_a_slot_frees() -> None:
+	controller = AdmissionController(max_in_flight=2)
+	holding = threading.Event()
+	release = threading.Event()
+	finished: list[int] = []
+
+	def _thread_holder() -> None:
+		with controller.admit():
+			holding.set()
+			release.wait(5)
+
+	async def _worker(idx: int) -> None:
+		async with controller.admit_async(5.0):
+			await asyncio.sleep(0)
+			finished.append(idx)
+
+	async def _run() -> int:
+		async with controller.admit_async():
+			tasks = [asyncio.create_task(_worker(idx)) for idx in range(50)]
+			await asyncio.sleep(0.05)
+			# every task is parked on a future instead of polling the slots
+			parked = len(controller._async_waiters)
+			# a slot freed by another thread wakes the parked tasks
+			release.set()
+			await asyncio.gather(*tasks)
+		return parked
+
+	thread = threading.Thread(target=_thread_holder)
+	thread.start()
+	assert holding.wait(2)
+	assert asyncio.run(_run()) == 50
+	thread.join(2)
+	assert sorted(finished) == list(range(50))
+	assert controller._in_flight == 0
+
+
+def test_transport_uses_admission_controller(chat_server) -> None:
+	pool = HTTPConnectionPool(_base_url(chat_server))
+	controller = AdmissionController(max_in_flight=2)
+	transport = OllamaTransport(
+		model="tiny", base_url=_base_url(chat_server), pool=pool, admission=controller
+	)
+	assert transport.generate("ping", purpose="test", max_tokens=8) == "pong"
+	assert list(transport.generate_stream("ping", purpose="test", max_tokens=8)) == ["po", "ng"]
+	assert controller.stats()["admitted"] == 2
+	pool.close()
+
+
+def test_transport_sends_keep_alive_and_warms_up(chat_server) -> None:
+	pool = HTTPConnectionPool(_base_url(chat_server))
+	transport = OllamaTransport(
+		model="tiny", base_url=_base_url(chat_server), pool=pool, keep_alive="30m"
+	)
+	assert transport.warm_up() >= 0.0
+	assert transport.generate("ping", purpose="test", max_tokens=8) == "pong"
+	warm_payload, chat_payload = chat_server.payloads
+	assert warm_payload["messages"] == []
+	assert warm_payload["keep_alive"] == "30m"
+	assert chat_payload["keep_alive"] == "30m"
+	pool.close()
+
+
+def test_transport_omits_keep_alive_by_default(chat_server) -> None:
+	pool = HTTPConnectionPool(_base_url(chat_server))
+	transport = OllamaTransport(model="tiny", base_url=_base_url(chat_server), pool=pool)
+	transport.generate("ping", purpose="test", max_tokens=8)
+	assert "keep_alive" not in chat_server.payloads[0]
+	pool.close()
+
+
+def test_transport_heartbeat_repeats_warm_up(chat_server) -> None:
+	pool = HTTPConnectionPool(_base_url(chat_server))
+	transport = OllamaTransport(model="tiny", base_url=_base_url(chat_server), pool=pool)
+	transport.start_heartbeat(interval=0.02)
+	deadline = time.monotonic() + 2
+	while len(chat_server.payloads) < 2 and time.monotonic() < deadline:
+		time.sleep(0.01)
+	transport.stop_heartbeat()
+	assert len(chat_server.payloads) >= 2
+	assert all(payload["messages"] == [] for payload in chat_server.payloads)
+	pool.close()
+
+
+def test_transport_records_usage_per_purpose(chat_server) -> None:
+	pool = HTTPConnectionPool(_base_url(chat_server))
+	transport = OllamaTransport(model="tiny", base_url=_base_url(chat_server), pool=pool)
+	transport.generate("ping", purpose="rename", max_tokens=8)
+	transport.generate("ping", purpose="rename", max_tokens=8)
+	assert "".join(transport.generate_stream("ping", purpose="sort", max_tokens=8)) == "pong"
+	stats = transport.usage_stats()
+	assert stats["rename"]["calls"] == 2
+	assert stats["rename"]["prompt_tokens"] == 80
+	assert stats["rename"]["completion_tokens"] == 20
+	assert stats["rename"]["load_seconds"] == 2.0
+	assert stats["rename"]["tokens_per_second"] == 10.0
+	# a stream is recorded once, from its final line
+	assert stats["sort"]["calls"] == 1
+	last = transport.usage.recent()[-1]
+	assert last.purpose == "sort"
+	assert last.total_seconds == 2.5
+	pool.close()
+
+
+def test_usage_from_ollama_tolerates_missing_fields() -> None:
+	usage = usage_from_ollama("warm_up", {"done": True})
+	assert usage.prompt_tokens == 0
+	assert usage.tokens_per_second is None
+	tracker = UsageTracker(recent=1)
+	tracker.record(usage)
+	tracker.record(usage)
+	assert tracker.stats()["warm_up"]["calls"] == 2
+	assert tracker.stats()["warm_up"]["tokens_per_second"] is None
+	assert len(tracker.recent()) == 1
+
+
+class BackupTransport:
+	name = "Backup"
+
+	def generate(self, prompt: str, *, purpose: str, max_tokens: int) -> str:
+		return "backup"
+
+
+def test_transport_http_error_falls_back_to_next_transport() -> None:
+	with MockOllamaServer(MockOllamaConfig(models=["tiny"])) as server:
+		pool = HTTPConnectionPool(server.base_url)
+		transport = OllamaTransport(model="tiny", base_url=server.base_url, pool=pool)
+		engine = LLMEngine(transports=[transport, BackupTransport()], quiet=True)
+		server.fail_next(FAIL_ERROR_500)
+		assert engine.generate("hi") == "backup"
+		# a model that is not pulled answers 404, which also falls back
+		missing = OllamaTransport(model="absent", base_url=server.base_url, pool=pool)
+		with pytest.raises(TransportUnavailableError, match="status 404"):
+			missing.generate("hi", purpose="test", max_tokens=8)
+		pool.close()
+
+
+def test_transport_stream_http_error_settles_connection() -> None:
+	with MockOllamaServer(MockOllamaConfig(models=["tiny"])) as server:
+		pool = HTTPConnectionPool(server.base_url)
+		transport = OllamaTransport(model="tiny", base_url=server.base_url, pool=pool)
+		server.fail_next(FAIL_ERROR_500)
+		with pytest.raises(TransportUnavailableError, match="status 500"):
+			list(transport.generate_stream("hi", purpose="test", max_tokens=8))
+		# the error reply was read in full, so its connection went back to the pool
+		assert pool.stats()["idle"] == 1
+		pool.close()
+
+
+def test_transport_chat_stream_closed_early_keeps_history(chat_server) -> None:
+	pool = HTTPConnectionPool(_base_url(chat_server))
+	transport = OllamaTransport(
+		model="tiny", base_url=_base_url(chat_server), pool=pool, use_history=True
+	)
+	messages = [{"role": "user", "content": "ping"}]
+	stream = transport.generate_chat_stream(messages, purpose="test", max_tokens=8)
+	assert next(stream) == "po"
+	stream.close()
+	assert transport.messages == [
+		{"role": "user", "content": "ping"},
+		{"role": "assistant", "content": "po"},
+	]
+	pool.close()